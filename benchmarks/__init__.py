@@ -0,0 +1,3 @@
+"""
+基准测试，见 `render_benchmark.py` 。
+"""
@@ -0,0 +1,192 @@
+r"""
+生成基准测试用的文档：文字密集、矢量图形密集、图片密集的 PDF ，以及 EPUB 和 CBZ 。
+
+文档内容由固定的随机数种子生成，同一版本的 PyMuPDF 每次生成的文档完全相同，因此不同版本的测试结果可以相互比较。
+"""
+
+from __future__ import annotations
+
+from math import ceil
+import os
+import random
+from typing import Callable, Dict, List
+import zipfile
+
+import fitz  # PyMuPDF
+
+
+# 页面大小：A4（单位：磅）
+PAGE_WIDTH  = 595
+PAGE_HEIGHT = 842
+
+# 生成文字用的单词
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore et dolore "
+    "magna aliqua enim ad minim veniam quis nostrud exercitation ullamco laboris nisi aliquip ex ea commodo consequat"
+).split()
+
+
+def _paragraph(rng: random.Random, words: int) -> str:
+    """
+    随机生成一段包含 `words` 个单词的文字。
+    """
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _noise_pixmap(rng: random.Random, width: int, height: int, grain: int = 1) -> fitz.Pixmap:
+    """
+    生成一张带噪声的渐变图片（难以压缩，接近照片的解码开销）。噪声颗粒的边长为 `grain` 像素。
+    """
+    if grain > 1:
+        return fitz.Pixmap(_noise_pixmap(rng, ceil(width / grain), ceil(height / grain)), width, height, None)
+
+    samples = bytearray(width * height * 3)
+    for y in range(height):
+        row = y * width * 3
+        base = y * 255 // max(height - 1, 1)
+        noise = rng.randbytes(width)
+        for x in range(width):
+            i = row + x * 3
+            samples[i]     = (base + noise[x]) & 0xFF
+            samples[i + 1] = (x * 255 // max(width - 1, 1)) ^ (noise[x] >> 2)
+            samples[i + 2] = (255 - base + (noise[x] >> 1)) & 0xFF
+    return fitz.Pixmap(fitz.csRGB, width, height, bytes(samples), False)
+
+
+def make_text_pdf(path: str, pages: int = 20, seed: int = 1) -> None:
+    """
+    文字密集的 PDF ：每页排满小字号的文字（约 100 行，每行约 130 个字符）。
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page(width = PAGE_WIDTH, height = PAGE_HEIGHT)
+        lines = []
+        while len(lines) < 100:
+            line = ""
+            while len(line) < 125:
+                line += rng.choice(WORDS) + " "
+            lines.append(line)
+        page.insert_text(fitz.Point(36, 44), lines, fontsize = 6.5, fontname = "helv", lineheight = 1.18)
+    doc.save(path, garbage = 3, deflate = True)
+    doc.close()
+
+
+def make_vector_pdf(path: str, pages: int = 20, seed: int = 2) -> None:
+    """
+    矢量图形密集的 PDF ：每页有近千条直线、贝塞尔曲线和半透明填充的多边形。
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page(width = PAGE_WIDTH, height = PAGE_HEIGHT)
+        shape = page.new_shape()
+        point = lambda: fitz.Point(rng.uniform(0, PAGE_WIDTH), rng.uniform(0, PAGE_HEIGHT))
+        for _ in range(600):
+            shape.draw_line(point(), point())
+        shape.finish(color = (0.1, 0.2, 0.6), width = 0.3)
+        for _ in range(300):
+            shape.draw_bezier(point(), point(), point(), point())
+        shape.finish(color = (0.6, 0.1, 0.1), width = 0.5)
+        for _ in range(60):
+            shape.draw_polyline([point() for _ in range(5)])
+            shape.finish(color = None, fill = (rng.random(), rng.random(), rng.random()), fill_opacity = 0.3, closePath = True)
+        shape.commit()
+    doc.save(path, garbage = 3, deflate = True)
+    doc.close()
+
+
+def make_image_pdf(path: str, pages: int = 20, seed: int = 3) -> None:
+    """
+    图片密集的 PDF ：每页有若干张不同大小的图片（同一张图片在文档中只保存一份）。
+    """
+    rng = random.Random(seed)
+    images = [_noise_pixmap(rng, size, size * 3 // 4).tobytes("png") for size in (256, 512, 1024)]
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page(width = PAGE_WIDTH, height = PAGE_HEIGHT)
+        for row in range(3):
+            for column in range(2):
+                rect = fitz.Rect(36 + column * 265, 36 + row * 260, 36 + column * 265 + 255, 36 + row * 260 + 240)
+                page.insert_image(rect, stream = rng.choice(images), keep_proportion = False)
+    doc.save(path, garbage = 3, deflate = True)
+    doc.close()
+
+
+def make_epub(path: str, chapters: int = 10, seed: int = 4) -> None:
+    """
+    EPUB ：若干章节，每章若干段文字，需要排版（reflow）后才能渲染。
+    """
+    rng = random.Random(seed)
+    manifest = []
+    spine = []
+    with zipfile.ZipFile(path, "w") as epub:
+        # mimetype 必须是第一个文件，且不压缩
+        epub.writestr("mimetype", "application/epub+zip", compress_type = zipfile.ZIP_STORED)
+        epub.writestr(
+            "META-INF/container.xml",
+            '<?xml version="1.0"?>\n'
+            '<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+            '<rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles>'
+            '</container>',
+        )
+        for chapter in range(chapters):
+            name = f"chapter{chapter + 1}.xhtml"
+            body = "".join(f"<p>{_paragraph(rng, rng.randint(60, 160))}</p>" for _ in range(40))
+            epub.writestr(
+                f"OEBPS/{name}",
+                '<?xml version="1.0" encoding="utf-8"?>\n'
+                '<html xmlns="http://www.w3.org/1999/xhtml">'
+                f"<head><title>Chapter {chapter + 1}</title></head>"
+                f"<body><h1>Chapter {chapter + 1}</h1>{body}</body></html>",
+                compress_type = zipfile.ZIP_DEFLATED,
+            )
+            manifest.append(f'<item id="c{chapter}" href="{name}" media-type="application/xhtml+xml"/>')
+            spine.append(f'<itemref idref="c{chapter}"/>')
+        epub.writestr(
+            "OEBPS/content.opf",
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<package xmlns="http://www.idpf.org/2007/opf" version="2.0" unique-identifier="id">'
+            '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">'
+            '<dc:title>Benchmark</dc:title><dc:identifier id="id">benchmark</dc:identifier><dc:language>en</dc:language>'
+            "</metadata>"
+            f"<manifest>{''.join(manifest)}</manifest>"
+            f'<spine>{"".join(spine)}</spine>'
+            "</package>",
+            compress_type = zipfile.ZIP_DEFLATED,
+        )
+
+
+def make_cbz(path: str, pages: int = 12, seed: int = 5) -> None:
+    """
+    CBZ ：每页是一张整页的 JPEG 图片。
+    """
+    rng = random.Random(seed)
+    with zipfile.ZipFile(path, "w") as cbz:
+        for page in range(pages):
+            pix = _noise_pixmap(rng, 1200, 1700, grain = 4)
+            cbz.writestr(f"{page + 1:03d}.jpg", pix.tobytes("jpeg"), compress_type = zipfile.ZIP_STORED)
+
+
+# 基准测试的文档：{文件名: 生成函数}
+CORPUS: Dict[str, Callable[[str], None]] = {
+    "text.pdf"  : make_text_pdf,
+    "vector.pdf": make_vector_pdf,
+    "image.pdf" : make_image_pdf,
+    "book.epub" : make_epub,
+    "comic.cbz" : make_cbz,
+}
+
+
+def ensure_corpus(directory: str, rebuild: bool = False) -> List[str]:
+    """
+    在 `directory` 中生成基准测试的文档（已存在的不再重新生成，除非 `rebuild` 为 True），返回文档路径列表。
+    """
+    os.makedirs(directory, exist_ok = True)
+    paths = []
+    for (name, make) in CORPUS.items():
+        path = os.path.join(directory, name)
+        if rebuild or not os.path.exists(path):
+            make(path)
+        paths.append(path)
+    return paths
@@ -0,0 +1,301 @@
+r"""
+渲染基准测试：不创建可见的 Tk 窗口，按 `Tab.render` 的渲染流程渲染生成的文档，统计每个缩放等级的吞吐量和延迟。
+
+用法（在项目根目录下运行）：
+
+```
+python -m benchmarks.render_benchmark --output results.json
+python -m benchmarks.render_benchmark --zoom 1.0 --zoom 4.0 --frames 5 --compare baseline.json
+```
+
+每一帧模拟打开一个新的视图区域：清空渲染缓存后，查找并渲染“用户视界”覆盖的所有图块（`Tab.lookup_page_tiles`
+和 `Tab.render_missing_tiles` ，与 `Tab.render` 相同）。画布相关的部分（PhotoImage 、画布项目）需要 Tk ，
+只在有显示器时计入（见结果中的 `meta.photo`）。
+
+每个缩放等级分别测量两种情况（结果中的 `display_lists`），各帧互不影响，结果与缩放等级的顺序无关：
+
+- `cold`：每帧前同时清空页面对象和显示列表，包括解析页面内容的时间（第一次浏览某页）；
+- `warm`：每帧前先不计时地渲染一次以建立显示列表，只清空渲染缓存（再次浏览某页，如缩放后）。
+
+结果以 JSON 格式保存，可以与其他版本的结果比较：`--compare` 指定的基准结果中，若某一项的 p50 延迟变慢超过
+`--tolerance` ，则列出该项，并以退出码 1 结束。
+"""
+
+from __future__ import annotations
+
+import argparse
+from itertools import count
+import json
+from math import ceil
+import os
+import platform
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+
+import fitz  # PyMuPDF
+
+from config.settings import SETTINGS
+from plugins.Tab.FileState import FileState
+from plugins.Tab.RenderStats import render_stats
+from plugins.Tab.Tab import Tab
+
+from benchmarks.corpus import ensure_corpus
+
+
+# 为每个文档分配唯一标识
+_doc_ids = count(1)
+
+
+
+class HeadlessSettings:
+    """
+    只提供 `get_setting` 的上下文，代替 ReaderAccess 。
+    """
+
+    def __init__(self, settings: Dict[str, Any]):
+        self.settings: Dict[str, Any] = settings
+
+    def get_setting(self, key: str, default: Any = None) -> Any:
+        return self.settings.get(key, default)
+
+
+
+class HeadlessTab(Tab):
+    """
+    没有界面组件的标签页：只打开文档、计算布局和渲染图块，“用户视界”的大小固定为 `viewport` （单位：画布像素）。
+    """
+
+    def __init__(self, file_path: str, settings: Dict[str, Any], viewport: Tuple[int, int]):
+        self.context = HeadlessSettings(settings)
+        self.state = FileState(file_path).to_json()
+        self.viewport: Tuple[int, int] = viewport
+
+        self.init_render_state()
+        self.doc = fitz.open(file_path)
+        self.doc_id = next(_doc_ids)
+        self.load_page_sizes()
+
+
+    def __del__(self):
+        if self.doc:
+            self.doc.close()
+
+
+    def update_view_region(self) -> None:
+        """
+        没有画布，无需同步。
+        """
+
+
+    @property
+    def view_rect(self) -> fitz.Rect:
+        """
+        “用户视界”：当前页左上角偏移 `scroll_pos` 处，大小为 `viewport` 。
+        """
+        page_rect = self.layout.page_rect(self.spread_pages().start)
+        x0 = page_rect.x0 + self.scroll_pos[0]
+        y0 = page_rect.y0 + self.scroll_pos[1]
+        return fitz.Rect(x0, y0, x0 + self.viewport[0] / self.zoom, y0 + self.viewport[1] / self.zoom)
+
+
+    def clear_caches(self, display_lists: bool) -> None:
+        """
+        清空渲染缓存；`display_lists` 为 True 时还清空页面对象和显示列表。
+        """
+        self.render_cache.clear()
+        if display_lists:
+            self._pages.clear()
+            self.display_lists.clear()
+
+
+    def render_frame(self, photo: bool = False) -> int:
+        """
+        渲染一帧：获取“用户视界”覆盖的所有图块，缓存中没有的图块在本进程内渲染。`photo` 为 True 时还转换为 PhotoImage 。
+
+        返回本帧图块的像素总数。
+        """
+        view = self.render_view
+        pixels = 0
+        with render_stats.timer("frame"):
+            for (page, page_rect, _) in self.visible_page_positions:
+                (tiles, missing) = self.lookup_page_tiles(page, page_rect, view)
+                tiles += self.render_missing_tiles(page, missing, view)
+                for (tile_rect, tile) in tiles:
+                    pixels += tile.width * tile.height
+                    if photo:
+                        tile.get_photo()
+        return pixels
+
+
+
+def percentile(samples: List[float], p: float) -> float:
+    """
+    `samples` 的第 `p` 分位数（最近秩法）。
+    """
+    samples = sorted(samples)
+    return samples[max(ceil(p * len(samples)) - 1, 0)] if samples else 0.0
+
+
+def measure(tab: HeadlessTab, frames: int, photo: bool, warm: bool) -> Dict[str, Any]:
+    """
+    以 `tab` 当前的缩放比例渲染 `frames` 帧（每帧一个新的页面，不使用渲染缓存），返回吞吐量、延迟和各阶段的耗时。
+
+    `warm` 为 False 时每帧都重新解析页面内容；为 True 时先不计时地渲染一次，计时的一帧只使用已有的显示列表。
+    """
+    render_stats.reset()
+    latencies = []
+    pixels = 0
+    for frame in range(frames):
+        tab.page_no = frame % tab.total_pages
+        tab.clear_caches(display_lists = True)
+        if warm:
+            enabled = render_stats.enabled
+            render_stats.enabled = False
+            try:
+                tab.render_frame(photo)
+            finally:
+                render_stats.enabled = enabled
+            tab.clear_caches(display_lists = False)
+        start = time.perf_counter()
+        pixels += tab.render_frame(photo)
+        latencies.append(time.perf_counter() - start)
+
+    elapsed = sum(latencies)
+    return {
+        "frames": frames,
+        "fps": frames / elapsed if elapsed else 0.0,
+        "megapixels_per_s": pixels / elapsed / 1e6 if elapsed else 0.0,
+        "latency_ms": {
+            "mean": elapsed / frames * 1000,
+            "p50": percentile(latencies, 0.50) * 1000,
+            "p95": percentile(latencies, 0.95) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+        },
+        "stages": render_stats.summary(),
+    }
+
+
+def benchmark_document(
+    file_path: str,
+    zoom_levels: Iterable[float],
+    frames: int,
+    viewport: Tuple[int, int],
+    settings: Dict[str, Any],
+    photo: bool,
+) -> List[Dict[str, Any]]:
+    """
+    对文档 `file_path` 逐个缩放等级进行测试，每个缩放等级分别测量 `cold` 和 `warm` 两种情况，各渲染 `frames` 帧。
+    """
+    tab = HeadlessTab(file_path, settings, viewport)
+    results = []
+    try:
+        # 预热：解析字体、图片等资源
+        tab.render_frame(photo)
+
+        for zoom in zoom_levels:
+            tab.zoom = zoom
+            for warm in (False, True):
+                results.append({
+                    "document": os.path.basename(file_path),
+                    "zoom": zoom,
+                    "display_lists": "warm" if warm else "cold",
+                    **measure(tab, frames, photo, warm),
+                })
+    finally:
+        tab.doc.close()
+        tab.doc = None
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    与基准结果 `baseline` 比较，返回 p50 延迟变慢超过 `tolerance` （如 0.2 表示 20%）的项目的说明。
+    """
+    old = {(entry["document"], entry["zoom"], entry.get("display_lists")): entry for entry in baseline["results"]}
+    regressions = []
+    for entry in results["results"]:
+        base = old.get((entry["document"], entry["zoom"], entry["display_lists"]))
+        if base is None or not base["latency_ms"]["p50"]:
+            continue
+        ratio = entry["latency_ms"]["p50"] / base["latency_ms"]["p50"]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{entry['document']} @ {entry['zoom']} ({entry['display_lists']}): p50 {base['latency_ms']['p50']:.2f} ms -> {entry['latency_ms']['p50']:.2f} ms ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def tk_available() -> bool:
+    """
+    是否可以创建 Tk 窗口（有显示器）。创建的窗口被隐藏，供 PhotoImage 使用。
+    """
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        return True
+    except Exception:
+        return False
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description = "Headless rendering benchmark.")
+    parser.add_argument("--corpus", default = os.path.join(os.path.dirname(__file__), "corpus"), help = "directory of the generated documents")
+    parser.add_argument("--rebuild", action = "store_true", help = "regenerate the documents")
+    parser.add_argument("--document", action = "append", help = "only benchmark documents with this file name (repeatable)")
+    parser.add_argument("--zoom", type = float, action = "append", help = "zoom level (repeatable), default: SETTINGS['zoom_levels']")
+    parser.add_argument("--frames", type = int, default = 10, help = "frames per document and zoom level")
+    parser.add_argument("--viewport", type = int, nargs = 2, default = (SETTINGS["window_width"], SETTINGS["window_height"]), metavar = ("WIDTH", "HEIGHT"))
+    parser.add_argument("--no-photo", action = "store_true", help = "skip PhotoImage conversion even if Tk is available")
+    parser.add_argument("--output", help = "write JSON results to this file")
+    parser.add_argument("--compare", help = "baseline JSON results to compare against")
+    parser.add_argument("--tolerance", type = float, default = 0.2, help = "allowed p50 slowdown against the baseline (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    settings = dict(SETTINGS)
+    zoom_levels = args.zoom or settings["zoom_levels"]
+    photo = not args.no_photo and tk_available()
+    render_stats.enabled = True
+
+    paths = ensure_corpus(args.corpus, args.rebuild)
+    if args.document:
+        paths = [path for path in paths if os.path.basename(path) in args.document]
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "python": platform.python_version(),
+            "pymupdf": fitz.VersionBind,
+            "platform": platform.platform(),
+            "viewport": list(args.viewport),
+            "frames": args.frames,
+            "photo": photo,
+            "settings": {key: settings.get(key) for key in ("dpi", "render_tile_size", "direct_photo", "color_theme")},
+        },
+        "results": [],
+    }
+    for path in paths:
+        for entry in benchmark_document(path, zoom_levels, args.frames, tuple(args.viewport), settings, photo):
+            results["results"].append(entry)
+            latency = entry["latency_ms"]
+            print(
+                f"{entry['document']:<12} zoom {entry['zoom']:>7.4g} {entry['display_lists']:<4}  {entry['fps']:>8.2f} fps  {entry['megapixels_per_s']:>8.2f} MP/s"
+                f"  p50 {latency['p50']:>8.2f}  p95 {latency['p95']:>8.2f}  p99 {latency['p99']:>8.2f} ms"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding = settings.get("encoding", "utf-8")) as file:
+            json.dump(results, file, indent = 2)
+
+    if args.compare:
+        with open(args.compare, encoding = settings.get("encoding", "utf-8")) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION: {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -21,4 +21,92 @@ SETTINGS = {
 
     # 清晰度，默认为 72
     "dpi": 72,
+
+    # 渲染图块的边长（单位：画布像素）
+    "render_tile_size": 512,
+
+    # 启动时是否恢复上次退出时打开的标签页（除当前标签页外，其余标签页第一次切换到时才打开文档）
+    "restore_session": True,
+
+    # 每个标签页的渲染缓存容量（单位：字节）
+    "render_cache_size": 256 * 1024 * 1024,
+
+    # 所有标签页的缓存合计的内存上限（单位：字节），超过时优先释放后台标签页的缓存；0 表示不限制
+    "memory_limit": 1024 * 1024 * 1024,
+
+    # 每个标签页最多缓存多少个页面的显示列表（解析后的页面内容）
+    "display_list_cache_pages": 16,
+
+    # 每个标签页最多缓存多少个页面的文字布局（划词、判断鼠标是否落在文字上时使用）
+    "text_index_pages": 32,
+
+    # 后台预先渲染当前页前后各多少页，为 0 时不预先渲染
+    "prefetch_pages": 2,
+
+    # 渲染帧率上限，为 0 时不限制
+    "render_fps": 60,
+
+    # 渐进式渲染：缓存中缺少图块时，先显示放大的整页预览图，空闲时再以完整分辨率渲染
+    "progressive_render": True,
+
+    # 整页预览图的缩放比例
+    "preview_zoom": 0.5,
+
+    # 无需转换颜色时，不经过 Pillow ，把渲染结果直接交给 Tk 解码
+    "direct_photo": True,
+
+    # 渲染可见图块的子进程数，0 表示在本进程内渲染
+    "render_processes": 0,
+
+    # 执行后台任务（预先渲染、缩略图、全文索引、关键词查找）的子进程数；0 表示在后台线程中执行（PyMuPDF 执行期间持有 GIL ，界面可能卡顿）
+    "background_processes": 1,
+
+    # 鼠标滚轮缩放停止多久后以完整分辨率渲染（单位：毫秒），在此之前只缩放预览图
+    "zoom_settle_delay": 150,
+
+    # 颜色主题："day"（白天）、"night"（夜晚）、"custom"（自定义，使用下面两种颜色）
+    "color_theme": "day",
+
+    # 自定义主题的文字颜色、背景颜色 (R, G, B)
+    "theme_text_color": [91, 70, 50],
+    "theme_background_color": [249, 241, 228],
+
+    # 是否记录渲染流水线各阶段的耗时（见“视图 → 性能统计”）
+    "render_stats": False,
+
+    # 渲染性能统计保留每个阶段最近多少次的耗时
+    "render_stats_window": 240,
+
+    # 存放磁盘缓存（缩略图、图块等）的目录
+    "cache_directory": "./config/cache",
+
+    # 是否把渲染好的图块保存到磁盘，下次打开同一文档时直接读取
+    "disk_tile_cache": False,
+
+    # 磁盘图块缓存的容量（单位：字节），超过时删除最久未使用的图块；0 表示不限制
+    "disk_tile_cache_size": 1024 * 1024 * 1024,
+
+    # 缩略图长边的长度（单位：屏幕像素）
+    "thumbnail_size": 128,
+
+    # 后台线程每批渲染多少张缩略图
+    "thumbnail_batch_size": 16,
+
+    # 缩略图磁盘缓存的容量（单位：字节），超过时删除最久未使用的缩略图；0 表示不限制
+    "thumbnail_cache_size": 128 * 1024 * 1024,
+
+    # 全文索引磁盘缓存的容量（单位：字节），超过时删除最久未使用的页面；0 表示不限制
+    "fulltext_cache_size": 256 * 1024 * 1024,
+
+    # 查找面板最多列出多少个结果
+    "find_max_results": 1000,
+
+    # 建立书库索引（跨文档搜索）时提取文字的子进程数，0 表示在后台线程中提取
+    "library_index_processes": 2,
+
+    # 书库搜索最多列出多少个结果
+    "library_max_results": 200,
+
+    # 连续视图中相邻页面的间隔（单位：逻辑像素，随页面缩放）
+    "page_gap": 8,
 }
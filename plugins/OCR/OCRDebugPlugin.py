@@ -139,7 +139,7 @@ Other plugins:
                 x0, y0, x1, y1,
                 outline=color,
                 width=2,
-                tags="ocr_debug"
+                tags=tab.layers.overlay_tags("ocr_debug")
             )
             
             # 绘制文本
@@ -148,7 +148,7 @@ Other plugins:
                 text=result["text"][:20],  # 只显示前20个字符
                 anchor=tk.SW,
                 fill=color,
-                tags="ocr_debug",
+                tags=tab.layers.overlay_tags("ocr_debug"),
                 font=("Arial", 8)
             )
 
@@ -0,0 +1,199 @@
+r"""
+画布图层管理：保留画布上的图像项，每帧只修改有变化的图像项，覆盖层（选框、搜索结果、调试框等）不受重新渲染的影响。
+"""
+
+from __future__ import annotations
+
+import tkinter as tk
+from typing import Dict, Hashable, List, Set, Tuple
+
+
+class CanvasLayers:
+    """
+    画布图层管理器。
+
+    画布上的项目自下而上分为：
+    - 页面图层 `IMAGE_LAYERS` ：预览图层（渐进式渲染的整页预览图）、图块图层（完整分辨率的图块），由 `Tab.render` 每帧绘制；
+    - 覆盖层：带有 `OVERLAY_TAG` 标签的项目，由各插件自行绘制和删除，位于所有页面图层之上。
+
+    页面图层中的图像项按调用方给出的键保留：每帧开始时调用 `begin_frame` ，为每个要显示的图像调用 `place_image` ，
+    结束时调用 `end_frame` 。键与上一帧相同的图像项只在位置或图像改变时才修改；本帧未用到的图像项被隐藏，留待复用，
+    因此滚动、缩放时不会反复创建、删除画布项目，也不会删除覆盖层。
+
+    每个页面图层的顶端有一个隐藏的标记项目，新的图像项插入到所属图层的标记之下，从而保持图层的上下顺序。
+    """
+
+    # 页面图层，自下而上
+    IMAGE_LAYERS: Tuple[str, ...] = ("preview", "tile")
+
+    # 所有覆盖层项目共有的标签
+    OVERLAY_TAG: str = "overlay"
+
+    def __init__(self, canvas: tk.Canvas):
+        self.canvas: tk.Canvas = canvas
+
+        # 各页面图层顶端的标记项目
+        self._markers: Dict[str, int] = {}
+
+        # 正在使用的图像项：{键: (图层, 项目)}
+        self._items: Dict[Hashable, Tuple[str, int]] = {}
+
+        # 图像项当前的 (横坐标, 纵坐标, 图像)，同时保持对图像的引用以免被回收
+        self._states: Dict[int, Tuple[float, float, tk.PhotoImage]] = {}
+
+        # 已隐藏、可复用的图像项：{图层: [项目, ...]}
+        self._spares: Dict[str, List[int]] = {layer: [] for layer in self.IMAGE_LAYERS}
+
+        # 本帧用到的键
+        self._placed: Set[Hashable] = set()
+
+        # 覆盖层当前对应的缩放比例和页面布局，见 `transform_overlays`
+        self._zoom: float | None = None
+        self._geometry: Hashable = None
+
+        # 所有覆盖层被清除的次数。插件可据此判断自己绘制的覆盖层是否已被清除、需要重新绘制
+        self.overlay_generation: int = 0
+
+        self._create_markers()
+
+
+    def _create_markers(self) -> None:
+        """
+        创建各页面图层的标记项目。
+        """
+        for layer in self.IMAGE_LAYERS:
+            self._markers[layer] = self.canvas.create_line(0, 0, 0, 0, state = tk.HIDDEN, tags = (f"layer:{layer}",))
+
+
+    def __len__(self) -> int:
+        """
+        正在使用的图像项数量。
+        """
+        return len(self._items)
+
+
+    def image_bytes(self, layer: str | None = None) -> int:
+        """
+        图层 `layer` （默认为所有页面图层）上正在显示的图像占用内存的估计值（单位：字节），按每像素 4 字节计算。
+        """
+        total = 0
+        for (item_layer, item) in self._items.values():
+            if layer is None or item_layer == layer:
+                image = self._states[item][2]
+                total += image.width() * image.height() * 4
+        return total
+
+
+    #### 页面图层 ####
+
+    def begin_frame(self) -> None:
+        """
+        开始绘制新的一帧。
+        """
+        self._placed = set()
+
+
+    def place_image(self, layer: str, key: Hashable, x: float, y: float, image: tk.PhotoImage) -> int:
+        """
+        在图层 `layer` 上以左上角位于 (x, y) 显示图像 `image` ，返回画布项目。
+
+        `key` 标识图像项，如 (页码, 图块位置) ；同一帧内键不能重复。
+        """
+        entry = self._items.get(key)
+        if entry is None:
+            spares = self._spares[layer]
+            if spares:
+                item = spares.pop()
+                self.canvas.itemconfigure(item, state = tk.NORMAL)
+            else:
+                item = self.canvas.create_image(x, y, anchor = tk.NW, image = image)
+                self.canvas.tag_lower(item, self._markers[layer])
+                self._states[item] = (x, y, image)
+            self._items[key] = (layer, item)
+        else:
+            item = entry[1]
+
+        (old_x, old_y, old_image) = self._states.get(item, (None, None, None))
+        # 只修改有变化的属性
+        if (old_x, old_y) != (x, y):
+            self.canvas.coords(item, x, y)
+        if old_image is not image:
+            self.canvas.itemconfigure(item, image = image)
+        self._states[item] = (x, y, image)
+
+        self._placed.add(key)
+        return item
+
+
+    def end_frame(self) -> None:
+        """
+        结束当前帧：隐藏本帧未用到的图像项，并释放它们引用的图像。
+        """
+        for key in [key for key in self._items if key not in self._placed]:
+            (layer, item) = self._items.pop(key)
+            self.canvas.itemconfigure(item, state = tk.HIDDEN, image = "")
+            self._states.pop(item, None)
+            self._spares[layer].append(item)
+        self._placed = set()
+
+
+    def clear_images(self) -> None:
+        """
+        删除所有页面图层的图像项。
+        """
+        for layer in self.IMAGE_LAYERS:
+            for item in self._spares[layer]:
+                self.canvas.delete(item)
+            self._spares[layer].clear()
+        for (_, item) in self._items.values():
+            self.canvas.delete(item)
+        self._items.clear()
+        self._states.clear()
+        self._placed = set()
+
+
+    #### 覆盖层 ####
+
+    def overlay_tags(self, name: str) -> Tuple[str, str]:
+        """
+        覆盖层 `name` 的项目应带有的标签，绘制时传给 `tags` 参数；之后可用 `canvas.delete(name)` 删除该覆盖层。
+        """
+        return (self.OVERLAY_TAG, name)
+
+
+    def clear_overlay(self, name: str | None = None) -> None:
+        """
+        删除覆盖层 `name` 的所有项目，默认删除所有覆盖层。
+        """
+        if name is None:
+            self.overlay_generation += 1
+        self.canvas.delete(self.OVERLAY_TAG if name is None else name)
+
+
+    def transform_overlays(self, zoom: float, geometry: Hashable) -> None:
+        """
+        画布坐标随缩放比例和页面布局改变时，同步覆盖层。
+
+        覆盖层项目使用画布坐标（布局平面坐标乘以缩放比例）：仅缩放比例改变时，按比例缩放所有覆盖层项目；
+        页面布局改变（`geometry` 不同，如切换视图模式、旋转、翻到不连续视图的另一页）时，原来的位置已无意义，删除所有覆盖层。
+        """
+        if self._zoom is None:
+            # 尚未渲染过，覆盖层中的项目就是按当前状态绘制的
+            pass
+        elif geometry != self._geometry:
+            self.clear_overlay()
+        elif zoom != self._zoom:
+            ratio = zoom / self._zoom
+            self.canvas.scale(self.OVERLAY_TAG, 0, 0, ratio, ratio)
+        self._zoom = zoom
+        self._geometry = geometry
+
+
+    def clear(self) -> None:
+        """
+        删除所有图像项和覆盖层。
+        """
+        self.clear_images()
+        self.clear_overlay()
+        self._zoom = None
+        self._geometry = None
@@ -0,0 +1,133 @@
+r"""
+颜色主题：按主题转换渲染结果的颜色，见 `schedule/多样化主题切换的可能实现方案.md` 。
+
+| 主题   | 背景   | 文字   | 图像     |
+| ------ | ------ | ------ | -------- |
+| 白天   | 原色   | 原色   | 原色     |
+| 夜晚   | 黑色   | 白色   | 反色     |
+| 自定义 | 背景色 | 文字色 | 线性映射 |
+
+所有转换都预先计算成 256 项的查找表，由 `Image.point` 在 C 代码中逐像素查表，不在 Python 中逐像素循环。
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+from PIL import Image
+
+
+RGB = Tuple[int, int, int]
+
+
+def linear_lut(text_color: RGB, background_color: RGB) -> List[List[int]]:
+    """
+    “线性映射”的查找表：灰度值 v 映射为 `round(c0 + v / 255 * (c1 - c0))` ，其中 c0 为文字色，c1 为背景色。
+
+    深色映射到靠近文字色，浅色映射到靠近背景色；纯黑恰好映射为文字色，纯白恰好映射为背景色。返回 R 、G 、B 三个通道各自的 256 项查找表。
+    """
+    return [
+        [round(c0 + v / 255 * (c1 - c0)) for v in range(256)]
+        for (c0, c1) in zip(text_color, background_color)
+    ]
+
+
+def _map_gray(img: Image.Image, lut: List[List[int]]) -> Image.Image:
+    """
+    先将 RGB 图像 `img` 转为灰度，再按各通道的查找表 `lut` 映射为 RGB 图像。
+    """
+    gray = img.convert("L")
+    return Image.merge("RGB", [gray.point(channel) for channel in lut])
+
+
+
+class ColorTheme:
+    """
+    颜色主题。
+
+    页面内容（背景和文字）按灰度映射到背景色和文字色之间；页面中的图片区域单独转换：夜晚主题取反色，自定义主题使用线性映射。
+    """
+
+    DAY    = "day"     # 白天：不转换
+    NIGHT  = "night"   # 夜晚：黑底白字，图片反色
+    CUSTOM = "custom"  # 自定义：自选背景色、文字色，图片线性映射
+
+    NAMES = (DAY, NIGHT, CUSTOM)
+
+    def __init__(self, name: str = DAY, text_color: RGB = (0, 0, 0), background_color: RGB = (255, 255, 255)):
+        if name not in self.NAMES:
+            raise ValueError(f"Invalid color theme: {name}. Must in {self.NAMES}.")
+        if name == self.NIGHT:
+            (text_color, background_color) = ((255, 255, 255), (0, 0, 0))
+        elif name == self.DAY:
+            (text_color, background_color) = ((0, 0, 0), (255, 255, 255))
+        self.name            : str = name
+        self.text_color      : RGB = tuple(text_color)
+        self.background_color: RGB = tuple(background_color)
+
+        # 页面内容的查找表（按灰度）；自定义主题中图片的线性映射与此相同
+        self._content_lut: List[List[int]] = linear_lut(self.text_color, self.background_color)
+        # 夜晚主题中图片的反色表，768 项，直接作用于 RGB 图像
+        self._invert_lut: List[int] = [255 - v for v in range(256)] * 3
+
+
+    @classmethod
+    @lru_cache(maxsize = 16)
+    def get(cls, name: str, text_color: RGB = (0, 0, 0), background_color: RGB = (255, 255, 255)) -> ColorTheme:
+        """
+        获取主题对象。相同参数的主题只创建一次，因此可以在每帧调用。
+        """
+        return cls(name, tuple(text_color), tuple(background_color))
+
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.name!r}, text_color={self.text_color}, background_color={self.background_color})"
+
+
+    @property
+    def key(self) -> Tuple[str, RGB, RGB]:
+        """
+        用于渲染缓存键的标识，不同主题的图块分开缓存。
+        """
+        return (self.name, self.text_color, self.background_color)
+
+
+    @property
+    def is_identity(self) -> bool:
+        """
+        是否不改变颜色（白天主题）。
+        """
+        return self.name == self.DAY
+
+
+    @property
+    def maps_images_separately(self) -> bool:
+        """
+        图片区域的转换方式是否与页面内容不同，即是否需要向 `apply` 提供图片区域。
+        """
+        return self.name == self.NIGHT
+
+
+    @property
+    def background_hex(self) -> str:
+        """
+        背景色，形如 `#rrggbb` ，用作画布的背景色。
+        """
+        return "#{:02x}{:02x}{:02x}".format(*self.background_color)
+
+
+    def apply(self, img: Image.Image, image_boxes: Iterable[Tuple[int, int, int, int]] = ()) -> Image.Image:
+        """
+        按主题转换 RGB 图像 `img` 的颜色。`image_boxes` 为图像中图片区域的位置 (x0, y0, x1, y1) ，这些区域单独转换。
+
+        返回新的图像，不修改 `img` 。
+        """
+        if self.is_identity:
+            return img
+        result = _map_gray(img, self._content_lut)
+        if self.maps_images_separately:
+            # 图片保留色彩，只取反色
+            for box in image_boxes:
+                result.paste(img.crop(box).point(self._invert_lut), box[:2])
+        return result
@@ -0,0 +1,266 @@
+r"""
+磁盘缓存：把缩略图等可重新生成的数据保存在 SQLite 数据库中，下次打开同一文档时直接读取。
+
+缓存按文档内容的指纹（见 `file_fingerprint`）区分文档，文件被移动或改名后仍能命中。
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+# 计算指纹时读取文件开头、结尾各多少字节
+FINGERPRINT_SAMPLE_SIZE = 1024 * 1024
+
+
+@lru_cache(maxsize = 256)
+def _fingerprint(file_path: str, size: int, mtime_ns: int) -> str:
+    """
+    计算文件的指纹。参数中的大小和修改时间只用于缓存：文件未被修改时不重复读取。
+    """
+    sha = hashlib.sha1(str(size).encode())
+    with open(file_path, "rb") as file:
+        sha.update(file.read(FINGERPRINT_SAMPLE_SIZE))
+        if size > FINGERPRINT_SAMPLE_SIZE:
+            file.seek(max(size - FINGERPRINT_SAMPLE_SIZE, FINGERPRINT_SAMPLE_SIZE))
+            sha.update(file.read())
+    return sha.hexdigest()
+
+
+def file_fingerprint(file_path: str) -> str:
+    """
+    文件内容的指纹（40 位十六进制字符串）：文件大小及开头、结尾各 `FINGERPRINT_SAMPLE_SIZE` 字节的 SHA-1 。
+
+    只读取文件的首尾部分，因此即使文件有上百 MB 也只需几毫秒。PDF 的增量保存会改变文件结尾，因此修改后指纹随之改变。
+    """
+    stat = os.stat(file_path)
+    return _fingerprint(os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+
+
+class DiskCache:
+    """
+    保存在单个 SQLite 数据库文件中的键值缓存，值为字节串。线程安全。
+
+    所有条目的总大小超过 `max_bytes` 时，按最近访问时间淘汰最久未使用的条目。`max_bytes` 为 0 时不限制。
+
+    读取时不立即写入访问时间，而是先记在内存中，积累 `TOUCH_BATCH` 个后，或下次写入、淘汰、关闭时，在一个事务中一并写入。
+    """
+
+    # 积累多少个访问时间后写入数据库
+    TOUCH_BATCH: int = 500
+
+    def __init__(self, path: str, max_bytes: int = 0):
+        if max_bytes < 0:
+            raise ValueError(f"Cache size cannot be negative, got {max_bytes}")
+        self.path: str = path
+        self.max_bytes: int = max_bytes
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok = True)
+
+        # 自动提交；批量写入时显式使用事务
+        self._db = sqlite3.connect(path, check_same_thread = False, isolation_level = None)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._lock = threading.Lock()
+
+        # 尚未写入数据库的访问时间：{键: 访问时间}
+        self._touched: Dict[str, float] = {}
+
+        # 所有条目的总大小（单位：字节）
+        (self.current_bytes,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+    def get(self, key: str) -> bytes | None:
+        """
+        获取键 `key` 对应的值，不存在时返回 None 。
+        """
+        return self.get_many([key]).get(key)
+
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        """
+        获取多个键对应的值，返回 {键: 值} ，不存在的键不出现在结果中。
+        """
+        keys = list(keys)
+        result: Dict[str, bytes] = {}
+        now = time.time()
+        with self._lock:
+            for chunk in _chunks(keys):
+                placeholders = ", ".join("?" * len(chunk))
+                result.update(self._db.execute(f"SELECT key, value FROM entries WHERE key IN ({placeholders})", chunk))
+            self._touched.update(dict.fromkeys(result, now))
+            if len(self._touched) >= self.TOUCH_BATCH:
+                self._flush_touched()
+        return result
+
+
+    def contains_many(self, keys: Iterable[str]) -> Set[str]:
+        """
+        返回 `keys` 中已缓存的键（不更新访问时间）。
+        """
+        keys = list(keys)
+        present: Set[str] = set()
+        with self._lock:
+            for chunk in _chunks(keys):
+                placeholders = ", ".join("?" * len(chunk))
+                present.update(key for (key,) in self._db.execute(f"SELECT key FROM entries WHERE key IN ({placeholders})", chunk))
+        return present
+
+
+    def put(self, key: str, value: bytes) -> None:
+        """
+        写入一个条目。
+        """
+        self.put_many([(key, value)])
+
+
+    def put_many(self, items: Iterable[Tuple[str, bytes]]) -> None:
+        """
+        在一个事务中写入多个条目，然后按需淘汰旧条目。
+        """
+        items = list(items)
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._write_touched()
+                for (key, value) in items:
+                    old = self._db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                        (key, value, len(value), now),
+                    )
+                    self.current_bytes += len(value) - (old[0] if old else 0)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                (self.current_bytes,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+                raise
+            if self.max_bytes and self.current_bytes > self.max_bytes:
+                self._evict(self.max_bytes)
+
+
+    def evict(self, target_bytes: int) -> None:
+        """
+        淘汰最久未使用的条目，直到总大小不超过 `target_bytes` 字节。
+        """
+        with self._lock:
+            self._evict(target_bytes)
+
+
+    def _evict(self, target_bytes: int) -> None:
+        """
+        `evict` 的具体过程，调用方须持有锁。
+        """
+        excess = self.current_bytes - target_bytes
+        if excess <= 0:
+            return
+        self._flush_touched()
+        # 按访问时间从早到晚累加，删除累计大小达到超出部分的那些条目
+        keys: List[str] = []
+        for (key, size) in self._db.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            keys.append(key)
+            excess -= size
+            if excess <= 0:
+                break
+        self._db.execute("BEGIN")
+        for chunk in _chunks(keys):
+            self._db.execute(f"DELETE FROM entries WHERE key IN ({', '.join('?' * len(chunk))})", chunk)
+        self._db.execute("COMMIT")
+        (self.current_bytes,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+
+
+    def _flush_touched(self) -> None:
+        """
+        在一个事务中写入尚未写入的访问时间，调用方须持有锁。
+        """
+        if not self._touched:
+            return
+        self._db.execute("BEGIN")
+        try:
+            self._write_touched()
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+
+    def _write_touched(self) -> None:
+        """
+        在当前事务中写入尚未写入的访问时间，调用方须持有锁。
+        """
+        if self._touched:
+            self._db.executemany("UPDATE entries SET accessed = ? WHERE key = ?", [(accessed, key) for (key, accessed) in self._touched.items()])
+            self._touched = {}
+
+
+    def clear(self) -> None:
+        """
+        清空缓存。
+        """
+        with self._lock:
+            self._touched = {}
+            self._db.execute("DELETE FROM entries")
+            self.current_bytes = 0
+
+
+    def close(self) -> None:
+        """
+        关闭数据库（先写入尚未写入的访问时间）。
+        """
+        with self._lock:
+            self._flush_touched()
+            self._db.close()
+
+
+
+def _chunks(keys: List[str], size: int = 500) -> Iterable[List[str]]:
+    """
+    把 `keys` 分成每份不超过 `size` 个的若干份（SQLite 限制了一条语句中参数的个数）。
+    """
+    for i in range(0, len(keys), size):
+        yield keys[i:i + size]
+
+
+# 各数据库文件对应的缓存对象，同一进程中打开同一文件的所有标签页共用
+_disk_caches: Dict[str, DiskCache] = {}
+_disk_caches_lock = threading.Lock()
+
+
+def get_disk_cache(path: str, max_bytes: int) -> DiskCache | None:
+    """
+    获取保存在 `path` 的磁盘缓存，首次调用时打开。无法打开（如目录不可写）时返回 None ，调用方应不使用磁盘缓存。
+    """
+    path = os.path.abspath(path)
+    with _disk_caches_lock:
+        cache = _disk_caches.get(path)
+        if cache is None:
+            try:
+                cache = DiskCache(path, max_bytes)
+            except (OSError, sqlite3.Error) as error:
+                print(f"in get_disk_cache: {path}: {error.__class__.__name__}: {error}")
+                return None
+            _disk_caches[path] = cache
+        cache.max_bytes = max_bytes
+        return cache
@@ -0,0 +1,80 @@
+r"""
+DisplayList 缓存：缓存最近浏览的页面解析后的显示列表，重新渲染时无需再次解析页面内容流。
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+import threading
+from typing import Iterable, Tuple
+
+import fitz  # PyMuPDF
+
+
+class DisplayListCache:
+    """
+    `fitz.DisplayList` 的 LRU 缓存，最多缓存 `max_pages` 个页面。
+
+    显示列表只能用于渲染创建它的文档，因此缓存键包含文档对象；Tk 线程和后台渲染线程各自的文档可以共用一个缓存。
+    缓存会持有文档对象的引用，关闭文档前应调用 `discard_document` 。
+    """
+
+    def __init__(self, max_pages: int):
+        if max_pages < 0:
+            raise ValueError(f"Cache size cannot be negative, got {max_pages}")
+        self.max_pages: int = max_pages
+
+        # 键为 (id(文档), 页码)，值为 (文档, 显示列表)，最近使用的排在最后
+        self._lists: OrderedDict[Tuple[int, int], Tuple[fitz.Document, fitz.DisplayList]] = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def __len__(self) -> int:
+        return len(self._lists)
+
+
+    def get(self, page: fitz.Page) -> fitz.DisplayList:
+        """
+        获取页面 `page` 的显示列表，不存在时解析页面并存入缓存。
+        """
+        key = (id(page.parent), page.number)
+        with self._lock:
+            entry = self._lists.get(key)
+            if entry is not None:
+                self._lists.move_to_end(key)
+                return entry[1]
+
+        # 解析页面可能较慢，不持有锁
+        display_list = page.get_displaylist()
+
+        with self._lock:
+            self._lists[key] = (page.parent, display_list)
+            while len(self._lists) > self.max_pages:
+                self._lists.popitem(last = False)
+        return display_list
+
+
+    def discard(self, doc: fitz.Document, page_numbers: Iterable[int]) -> None:
+        """
+        移除文档 `doc` 中页码为 `page_numbers` 的页面的显示列表（例如页面内容被修改后）。
+        """
+        with self._lock:
+            for page_no in page_numbers:
+                self._lists.pop((id(doc), page_no), None)
+
+
+    def discard_document(self, doc: fitz.Document) -> None:
+        """
+        移除文档 `doc` 的所有显示列表。
+        """
+        with self._lock:
+            for key in [key for key in self._lists if key[0] == id(doc)]:
+                del self._lists[key]
+
+
+    def clear(self) -> None:
+        """
+        清空缓存。
+        """
+        with self._lock:
+            self._lists.clear()
@@ -0,0 +1,166 @@
+"""
+在书库（所有打开过的文档）中搜索文字。
+"""
+
+import os
+import sqlite3
+from tkinter import messagebox
+from typing import List, override
+
+from glueous_plugin import Plugin
+
+from plugins.Tab.LibraryIndex import LibraryHit, LibraryIndex
+from plugins.Tab.LibrarySearchWindow import LibrarySearchWindow
+
+
+class LibrarySearchPlugin(Plugin):
+    """
+    书库搜索插件：为所有打开过的文档建立一个全文索引，跨文档查询，并打开查到的文档。
+    """
+
+    # 插件信息
+    name = "LibrarySearchPlugin"
+    description = """
+# LibrarySearchPlugin
+
+- name: LibrarySearchPlugin
+- author: Jerry
+- hotkeys: `Ctrl+Shift+F`
+- menu entrance: `文件 → 在书库中搜索`
+
+## Function
+
+Search all the documents ever opened (the files listed in `data["file_states"]`) at once. Words are matched as a phrase, and the last word also matches as a prefix while typing (end the query with a space to match it exactly). The matching pages of all documents are ranked by relevance (BM25). Double-click a result (or press Enter) to open the document at that page, in its existing tab if it is already open.
+
+The text of every page is kept in a SQLite FTS5 full-text index, `library.sqlite3` in the `cache_directory`. Each time the search window is opened, the index is brought up to date in the background: files whose size and modification time are unchanged are skipped without being read, files whose content fingerprint is unchanged are not extracted again, and only new or modified files are extracted, by `library_index_processes` worker processes (0 extracts them in a background thread). Files that no longer exist or are no longer in the list are removed from the index. Search works on the documents already indexed while updating goes on. At most `library_max_results` results are listed.
+
+## Api
+
+- `context.search_library(query, prefix = False)`: Search the library index and return the matching pages (`LibraryHit(file_path, page_no, score, snippet)` in `plugins/Tab/LibraryIndex.py`), most relevant first. Returns an empty list if the index is unavailable.
+- `context.update_library_index()`: Bring the library index up to date with `data["file_states"]` in the background.
+
+## Depend
+
+Python extension library:
+- fitz (PyMuPDF)
+- sqlite3 with the FTS5 extension
+
+Other plugins:
+- TabPlugin
+
+## Others
+
+See `LibraryIndex` in `plugins/Tab/LibraryIndex.py` and `LibrarySearchWindow` in `plugins/Tab/LibrarySearchWindow.py`.
+"""
+
+    # 快捷键设置
+    hotkeys = ["<Control-Shift-F>"]
+
+
+    @override
+    def loaded(self) -> None:
+        """
+        注册菜单项和接口。
+        """
+        # 书库索引，第一次使用时创建；创建失败（如 SQLite 不支持 FTS5）时为 False
+        self.index: LibraryIndex | None | bool = None
+
+        # 搜索窗口，已关闭时为 None
+        self.window: LibrarySearchWindow | None = None
+
+        self.context.add_menu_command(
+            path = ["文件"],
+            label = "在书库中搜索",
+            command = self.run,
+            accelerator = "Ctrl+Shift+F",
+        )
+        self.context.search_library = self.search_library
+        self.context.update_library_index = self.update_library_index
+
+
+    @override
+    def run(self) -> None:
+        """
+        更新书库索引，并显示搜索窗口（已显示时聚焦到查找框）。
+        """
+        index = self.get_index()
+        if index is None:
+            messagebox.showerror("错误", "无法创建书库索引（SQLite 可能不支持 FTS5），详见控制台输出。")
+            return
+        self.update_library_index()
+        if self.window is None or not self.window.winfo_exists():
+            self.window = LibrarySearchWindow(
+                self.context._reader.root,
+                index,
+                self.context.get_setting("library_max_results", 200),
+                self.open_hit,
+            )
+        else:
+            self.window.poll()
+        self.window.deiconify()
+        self.window.lift()
+        self.window.entry.focus_set()
+        self.window.entry.select_range(0, "end")
+
+
+    def get_index(self) -> LibraryIndex | None:
+        """
+        书库索引，第一次调用时创建；无法创建时返回 None 。
+        """
+        if self.index is None:
+            try:
+                self.index = LibraryIndex(
+                    os.path.join(self.context.get_setting("cache_directory", "./config/cache"), "library.sqlite3"),
+                    self.context.get_setting("library_index_processes", 2),
+                )
+            except sqlite3.Error as error:
+                print(f"in LibrarySearchPlugin.get_index: {error.__class__.__name__}: {error}")
+                self.index = False
+        return self.index or None
+
+
+    def update_library_index(self) -> None:
+        """
+        在后台按 `data["file_states"]` 更新书库索引。
+        """
+        index = self.get_index()
+        if index is not None:
+            index.update(state.get("file_path") for state in self.context.data.get("file_states", []))
+
+
+    def search_library(self, query: str, prefix: bool = False) -> List[LibraryHit]:
+        """
+        在书库索引中查找 `query` ，最相关的排在最前。
+        """
+        index = self.get_index()
+        if index is None:
+            return []
+        return index.search(query, prefix = prefix, limit = self.context.get_setting("library_max_results", 200))
+
+
+    def open_hit(self, hit: LibraryHit) -> None:
+        """
+        打开结果 `hit` 所在的文档（已在某个标签页中打开时切换到该标签页），并跳转到该页。
+        """
+        if not os.path.exists(hit.file_path):
+            messagebox.showerror("错误", f"文件不存在：{hit.file_path}")
+            return
+        for tab in self.context.tabs:
+            if tab.file_path and os.path.normcase(os.path.abspath(tab.file_path)) == os.path.normcase(hit.file_path):
+                self.context.get_notebook().select(tab.frame)
+                # 占位标签页此时打开文档
+                tab.activate()
+                break
+        else:
+            tab = self.context.create_tab(hit.file_path)
+        if tab.doc and hit.page_no < tab.total_pages:
+            tab.page_no = hit.page_no
+
+
+    @override
+    def unloaded(self) -> None:
+        """
+        停止更新索引，关闭数据库。
+        """
+        if self.index:
+            self.index.close()
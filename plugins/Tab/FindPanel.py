@@ -0,0 +1,228 @@
+r"""
+查找面板：标签页右侧的文档内查找框和结果列表，查询文档的全文索引（见 `FullTextIndex`）。
+
+- 输入时即时查询（最后一个词按前缀匹配），索引仍在后台建立时，结果随着已索引的页面增多而更新；
+- 单击结果跳转到该处，回车跳转到下一个结果；
+- 可见页面上的所有结果以覆盖层标出，当前结果颜色不同。
+"""
+
+from __future__ import annotations
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict, List, TYPE_CHECKING
+
+from plugins.Tab.FullTextIndex import DocumentIndexer, SearchHit
+
+if TYPE_CHECKING:
+    from plugins.Tab.Tab import Tab
+
+
+class FindPanel:
+    """
+    标签页 `tab` 右侧的查找面板，插入到标签页的 `paned` 中。查询 `indexer` 正在建立（或已建立）的索引。
+    """
+
+    # 输入停止多久后查询（单位：毫秒）
+    SEARCH_DELAY: int = 150
+
+    # 索引建立期间，检查进度的间隔（单位：毫秒）
+    POLL_INTERVAL: int = 250
+
+    # 结果所在的覆盖层
+    OVERLAY_NAME: str = "find"
+
+    # 结果、当前结果的颜色
+    HIT_COLOR: str = "yellow"
+    CURRENT_HIT_COLOR: str = "orange"
+
+    def __init__(self, tab: Tab, indexer: DocumentIndexer, max_results: int):
+        self.tab: Tab = tab
+        self.indexer: DocumentIndexer = indexer
+        self.max_results: int = max_results
+
+        self.frame = ttk.Frame(tab.paned, width = 260)
+        self.query = tk.StringVar(self.frame)
+        self.entry = ttk.Entry(self.frame, textvariable = self.query)
+        self.entry.pack(side = tk.TOP, fill = tk.X, padx = 4, pady = 4)
+        self.status = ttk.Label(self.frame, anchor = tk.W)
+        self.status.pack(side = tk.TOP, fill = tk.X, padx = 4)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient = tk.VERTICAL)
+        self.scrollbar.pack(side = tk.RIGHT, fill = tk.Y)
+        self.listbox = tk.Listbox(self.frame, activestyle = tk.NONE, exportselection = False, yscrollcommand = self.scrollbar.set)
+        self.listbox.pack(side = tk.LEFT, fill = tk.BOTH, expand = True)
+        self.scrollbar.config(command = self.listbox.yview)
+
+        # 当前的查询结果，及按页码分组的结果
+        self.hits: List[SearchHit] = []
+        self._page_hits: Dict[int, List[SearchHit]] = {}
+        self.current: SearchHit | None = None
+
+        # 查询时已索引的页面数，索引增长后重新查询
+        self._indexed: int = -1
+
+        # 查询的次数，用于判断结果是否改变
+        self._version: int = 0
+
+        # 上次绘制覆盖层时的状态，未改变时不重新绘制
+        self._painted = None
+
+        self._search_id = None
+        self._poll_id = None
+
+        self.entry.bind("<KeyRelease>", lambda event: self.request_search())
+        self.entry.bind("<Return>", lambda event: self.next_hit())
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        self.tab.add_overlay_painter(self.paint)
+        self._poll()
+
+
+    #### 查询 ####
+
+    def request_search(self) -> None:
+        """
+        输入停止 `SEARCH_DELAY` 毫秒后查询。
+        """
+        if self._search_id is not None:
+            self.frame.after_cancel(self._search_id)
+        self._search_id = self.frame.after(self.SEARCH_DELAY, self.search)
+
+
+    def search(self) -> None:
+        """
+        按输入框中的文字查询，更新结果列表和覆盖层；原来的当前结果仍在结果中时保持选中。
+        """
+        self._search_id = None
+        index = self.indexer.index
+        self._indexed = len(index)
+        query = self.query.get()
+        # 输入以空白结尾时，最后一个词已输入完整，不按前缀匹配
+        self.hits = index.search(query, prefix = not query[-1:].isspace(), limit = self.max_results)
+        self._version += 1
+        self._page_hits = {}
+        for hit in self.hits:
+            self._page_hits.setdefault(hit.page_no, []).append(hit)
+
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *(f"{hit.page_no + 1}: {index.snippet(hit)}" for hit in self.hits))
+        if self.current in self.hits:
+            position = self.hits.index(self.current)
+            self.listbox.selection_set(position)
+            self.listbox.see(position)
+        else:
+            self.current = None
+        self.update_status()
+        self.paint()
+
+
+    def update_status(self) -> None:
+        """
+        显示结果数和索引进度。
+        """
+        index = self.indexer.index
+        text = f"{len(self.hits)}{'+' if len(self.hits) >= self.max_results else ''} 个结果"
+        if not index.complete:
+            text += f"（已索引 {len(index)} / {index.total_pages} 页）"
+        self.status.config(text = text)
+
+
+    def _poll(self) -> None:
+        """
+        索引建立期间定期更新进度；已索引的页面增多后重新查询。
+        """
+        self._poll_id = None
+        # 先判断是否仍在建立索引：已停止时，之后读到的页面数就是最终结果
+        running = self.indexer.running
+        indexed = len(self.indexer.index)
+        if indexed != self._indexed:
+            if self.query.get().strip():
+                self.search()
+            else:
+                self._indexed = indexed
+                self.update_status()
+        if running:
+            self._poll_id = self.frame.after(self.POLL_INTERVAL, self._poll)
+
+
+    #### 跳转 ####
+
+    def _on_select(self, event) -> None:
+        """
+        单击结果：跳转到该处。
+        """
+        selection = self.listbox.curselection()
+        if selection:
+            self.show_hit(self.hits[selection[0]])
+
+
+    def next_hit(self) -> None:
+        """
+        跳转到下一个结果（到最后一个后回到第一个）。
+        """
+        if self._search_id is not None:
+            self.frame.after_cancel(self._search_id)
+            self.search()
+        if not self.hits:
+            return
+        position = (self.hits.index(self.current) + 1) % len(self.hits) if self.current in self.hits else 0
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(position)
+        self.listbox.see(position)
+        self.show_hit(self.hits[position])
+
+
+    def show_hit(self, hit: SearchHit) -> None:
+        """
+        跳转到结果 `hit` 所在的位置，并标为当前结果。
+        """
+        self.current = hit
+        rects = self.indexer.index.hit_rects(hit)
+        if rects:
+            self.tab.show_page_rect(hit.page_no, rects[0])
+        else:
+            self.tab.page_no = hit.page_no
+        self.paint()
+
+
+    #### 覆盖层 ####
+
+    def paint(self) -> None:
+        """
+        在可见页面上标出结果。标签页每帧渲染后也会调用（见 `Tab.add_overlay_painter`），状态未改变时直接返回。
+        """
+        tab = self.tab
+        visible = tab.layout.pages_in(tab.view_rect)
+        state = (tab.zoom, tab.layout_key, tab.layers.overlay_generation, visible, self._version, self.current)
+        if state == self._painted:
+            return
+        self._painted = state
+
+        tab.canvas.delete(self.OVERLAY_NAME)
+        index = self.indexer.index
+        for page_no in visible:
+            for hit in self._page_hits.get(page_no, ()):
+                color = self.CURRENT_HIT_COLOR if hit == self.current else self.HIT_COLOR
+                for rect in index.hit_rects(hit):
+                    rect = tab.page_to_canvas(page_no, rect)
+                    if rect is None:
+                        continue
+                    tab.canvas.create_rectangle(
+                        *rect,
+                        outline = color,
+                        fill = color,
+                        stipple = "gray50",
+                        tags = tab.layers.overlay_tags(self.OVERLAY_NAME),
+                    )
+
+
+    def close(self) -> None:
+        """
+        关闭面板，删除覆盖层（不停止建立索引）。
+        """
+        for after_id in (self._search_id, self._poll_id):
+            if after_id is not None:
+                self.frame.after_cancel(after_id)
+        self._search_id = self._poll_id = None
+        self.tab.remove_overlay_painter(self.paint)
+        self.tab.canvas.delete(self.OVERLAY_NAME)
+        self.frame.destroy()
@@ -0,0 +1,438 @@
+r"""
+全文索引：文档的倒排索引（词 → 页码 → 词在该页中的序号），支持短语查询和前缀查询，由后台线程逐页建立，
+提取文字在后台渲染服务的子进程中进行（见 `run_in_background`）。
+
+- 分词（`tokenize`）：字母、数字组成的连续字符为一个词，中日韩文字每个字为一个词，均转为小写；
+- 每页的词序列和各词的位置矩形（`page_terms`）以页为单位保存在磁盘缓存中，键包含文档内容的指纹，
+  再次打开同一文档时直接读取，只提取缓存中没有的页面；
+- 倒排表中每个词对应一个 `array` ，元素为 (页码 << POSITION_BITS) | 词序号，从小到大排列，占用内存很小；
+  查询时按顺序求交集，找到所需个数的结果后即停止。
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, insort
+import heapq
+import json
+from math import inf
+import re
+import threading
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+import zlib
+
+import fitz  # PyMuPDF
+
+from plugins.Tab.DiskCache import DiskCache
+from plugins.Tab.RenderFarm import open_document, run_in_background
+
+
+# 索引格式的版本，格式改变后旧的磁盘缓存不再命中
+INDEX_VERSION = 1
+
+# 词序号占用的位数；每页最多索引 MAX_PAGE_TERMS 个词，多出的忽略
+POSITION_BITS = 20
+POSITION_MASK = (1 << POSITION_BITS) - 1
+MAX_PAGE_TERMS = 1 << (POSITION_BITS - 1)
+
+# 中日韩文字（每个字单独成词）
+_CJK = "぀-ヿ㐀-䶿一-鿿豈-﫿가-힯"
+_TOKEN = re.compile(rf"[{_CJK}]|(?:(?![{_CJK}])[^\W_])+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    把 `text` 分成小写的词。
+    """
+    return [match.group().casefold() for match in _TOKEN.finditer(text)]
+
+
+def page_terms(page: fitz.Page) -> Tuple[List[str], List[float]]:
+    """
+    提取页面 `page` 中的词，返回 (词序列, 各词的位置矩形依次展开 [x0, y0, x1, y1, ...]) ，坐标为未旋转的页面坐标。
+
+    一个单词中分出的多个词（如中文的每个字）按字符位置等分单词的宽度。
+    """
+    terms: List[str] = []
+    boxes: List[float] = []
+    for (x0, y0, x1, y1, word, *_) in page.get_text("words"):
+        width = (x1 - x0) / max(len(word), 1)
+        for match in _TOKEN.finditer(word):
+            terms.append(match.group().casefold())
+            boxes.extend((
+                round(x0 + width * match.start(), 1), round(y0, 1),
+                round(x0 + width * match.end(), 1), round(y1, 1),
+            ))
+    return (terms, boxes)
+
+
+def _page_terms_job(file_path: str, doc_id: int, page_no: int) -> Tuple[List[str], List[float]]:
+    """
+    在后台渲染服务的子进程中提取第 `page_no` 页的词，见 `page_terms` 。
+    """
+    return page_terms(open_document(file_path, doc_id)[page_no])
+
+
+def encode_page(terms: List[str], boxes: List[float]) -> bytes:
+    """
+    把一页的词序列和位置矩形编码为保存在磁盘缓存中的数据。
+    """
+    return zlib.compress(json.dumps([terms, boxes], ensure_ascii = False, separators = (",", ":")).encode("utf-8"), 1)
+
+
+def decode_page(data: bytes) -> Tuple[List[str], List[float]]:
+    """
+    `encode_page` 的逆过程。
+    """
+    (terms, boxes) = json.loads(zlib.decompress(data).decode("utf-8"))
+    return (terms, boxes)
+
+
+def document_prefix(fingerprint: str) -> str:
+    """
+    指纹为 `fingerprint` 的文档各页在磁盘缓存中的键的公共前缀，后接页码。
+    """
+    return f"v{INDEX_VERSION}/{fingerprint}/"
+
+
+
+class SearchHit(NamedTuple):
+    """
+    一个查询结果：第 `page_no` 页从第 `position` 个词开始的 `length` 个词。
+    """
+    page_no: int
+    position: int
+    length: int
+
+
+
+class _PostingCursor:
+    """
+    在一个或多个（前缀查询）已排序的倒排表中，按从小到大的顺序查找位置。
+
+    只有一个倒排表时二分查找；有多个时按顺序归并遍历（避免每次查找都要查看所有倒排表）。之前查找过的更小的位置不再查看。
+    """
+
+    def __init__(self, postings: List[array]):
+        self.codes: array | None = postings[0] if len(postings) == 1 else None
+        self.offset: int = 0
+        self._merged: Iterator[int] | None = None if self.codes is not None else heapq.merge(*postings)
+        self._current: float = -1
+
+
+    def seek(self, code: int) -> bool:
+        """
+        `code` 是否在倒排表中。各次调用的 `code` 须递增。
+        """
+        codes = self.codes
+        if codes is not None:
+            offset = self.offset
+            if offset < len(codes) and codes[offset] < code:
+                offset = self.offset = bisect_left(codes, code, offset)
+            return offset < len(codes) and codes[offset] == code
+
+        current = self._current
+        while current < code:
+            current = next(self._merged, inf)
+        self._current = current
+        return current == code
+
+
+
+class DocumentIndex:
+    """
+    一个文档的倒排索引。线程安全：后台线程添加页面的同时，Tk 线程可以查询已添加的页面。
+    """
+
+    def __init__(self, total_pages: int):
+        self.total_pages: int = total_pages
+
+        # 词表：{词: 词号}，及按词号排列的词
+        self._term_ids: Dict[str, int] = {}
+        self._terms: List[str] = []
+
+        # 倒排表：按词号排列，每项为 (页码 << POSITION_BITS) | 词序号，从小到大排列
+        self._postings: List[array] = []
+
+        # 各页的词号序列和位置矩形（依次展开）
+        self._pages: Dict[int, array] = {}
+        self._boxes: Dict[int, array] = {}
+
+        # 按字母顺序排列的词，用于前缀查询
+        self._sorted_terms: List[str] = []
+
+        self._lock = threading.Lock()
+
+
+    def __len__(self) -> int:
+        """
+        已添加的页面数。
+        """
+        return len(self._pages)
+
+
+    def __contains__(self, page_no: int) -> bool:
+        return page_no in self._pages
+
+
+    @property
+    def complete(self) -> bool:
+        """
+        是否已添加所有页面。
+        """
+        return len(self._pages) >= self.total_pages
+
+
+    @property
+    def nbytes(self) -> int:
+        """
+        占用内存的估计值（单位：字节）。
+        """
+        return (
+            sum(postings.itemsize * len(postings) for postings in self._postings)
+            + sum(terms.itemsize * len(terms) for terms in self._pages.values())
+            + sum(boxes.itemsize * len(boxes) for boxes in self._boxes.values())
+            + 100 * len(self._terms)
+        )
+
+
+    def add_page(self, page_no: int, terms: List[str], boxes: List[float]) -> None:
+        """
+        添加第 `page_no` 页的词序列 `terms` 和位置矩形 `boxes` （见 `page_terms`），已添加的页面忽略。
+        """
+        terms = terms[:MAX_PAGE_TERMS]
+        with self._lock:
+            if page_no in self._pages:
+                return
+            ids = array("I")
+            base = page_no << POSITION_BITS
+            next_base = (page_no + 1) << POSITION_BITS
+            # 页面通常按页码顺序添加，此时只需追加到倒排表末尾；倒排表中已有后面的页面时，找到该页的位置后插入
+            inserts: Dict[int, array] = {}
+            for (position, term) in enumerate(terms):
+                term_id = self._term_ids.get(term)
+                if term_id is None:
+                    term_id = self._term_ids[term] = len(self._terms)
+                    self._terms.append(term)
+                    self._postings.append(array("Q"))
+                    insort(self._sorted_terms, term)
+                postings = self._postings[term_id]
+                if term_id in inserts or (postings and postings[-1] >= next_base):
+                    inserts.setdefault(term_id, array("Q")).append(base | position)
+                else:
+                    postings.append(base | position)
+                ids.append(term_id)
+            for (term_id, codes) in inserts.items():
+                postings = self._postings[term_id]
+                at = bisect_left(postings, base)
+                postings[at:at] = codes
+            self._pages[page_no] = ids
+            self._boxes[page_no] = array("f", boxes[:4 * len(terms)])
+
+
+    def _expand_prefix(self, prefix: str) -> List[int]:
+        """
+        以 `prefix` 开头的所有词的词号。调用方须持有锁。
+        """
+        ids = []
+        for i in range(bisect_left(self._sorted_terms, prefix), len(self._sorted_terms)):
+            term = self._sorted_terms[i]
+            if not term.startswith(prefix):
+                break
+            ids.append(self._term_ids[term])
+        return ids
+
+
+    def search(self, query: str, prefix: bool = False, limit: int = 0) -> List[SearchHit]:
+        """
+        查找短语 `query` （分词后的各词依次相邻）在已添加的页面中出现的位置，按页码和词序号排列。
+
+        `prefix` 为 True 时，最后一个词按前缀匹配（如 "inv" 匹配 "invariant"）。`limit` 为 0 时不限制结果的个数。
+
+        按顺序遍历出现次数最少的词的倒排表，逐个检查其余的词是否在相应的位置（各倒排表都已排序，
+        只需向后查找），找到 `limit` 个结果后即停止，因此常见词的查询也只需读取倒排表的开头部分。
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+        hits: List[SearchHit] = []
+        with self._lock:
+            # 各词可能的词号
+            candidates: List[List[int]] = []
+            for (i, word) in enumerate(words):
+                if prefix and i == len(words) - 1:
+                    ids = self._expand_prefix(word)
+                else:
+                    term_id = self._term_ids.get(word)
+                    ids = [] if term_id is None else [term_id]
+                if not ids:
+                    return []
+                candidates.append(ids)
+
+            counts = [sum(len(self._postings[term_id]) for term_id in ids) for ids in candidates]
+            rarest = min(range(len(words)), key = counts.__getitem__)
+            others = [(i, _PostingCursor([self._postings[term_id] for term_id in ids])) for (i, ids) in enumerate(candidates) if i != rarest]
+            for code in self._iter_postings(candidates[rarest]):
+                # 短语不跨页：起点须在本页之内
+                if code & POSITION_MASK < rarest:
+                    continue
+                start = code - rarest
+                for (i, cursor) in others:
+                    if not cursor.seek(start + i):
+                        break
+                else:
+                    hits.append(SearchHit(start >> POSITION_BITS, start & POSITION_MASK, len(words)))
+                    if len(hits) == limit:
+                        break
+        return hits
+
+
+    def _iter_postings(self, ids: List[int]) -> Iterator[int]:
+        """
+        按从小到大的顺序遍历多个词（前缀查询）的倒排表。调用方须持有锁。
+        """
+        if len(ids) == 1:
+            return iter(self._postings[ids[0]])
+        return heapq.merge(*(self._postings[term_id] for term_id in ids))
+
+
+    def hit_rects(self, hit: SearchHit) -> List[fitz.Rect]:
+        """
+        查询结果 `hit` 中各词的位置矩形（未旋转的页面坐标）。
+        """
+        with self._lock:
+            boxes = self._boxes.get(hit.page_no)
+            if boxes is None:
+                return []
+            return [
+                fitz.Rect(*boxes[4 * i:4 * i + 4])
+                for i in range(hit.position, min(hit.position + hit.length, len(boxes) // 4))
+            ]
+
+
+    def snippet(self, hit: SearchHit, context: int = 6) -> str:
+        """
+        查询结果 `hit` 前后各 `context` 个词组成的摘要（小写）。
+        """
+        with self._lock:
+            ids = self._pages.get(hit.page_no)
+            if ids is None:
+                return ""
+            start = max(hit.position - context, 0)
+            stop = min(hit.position + hit.length + context, len(ids))
+            return " ".join(self._terms[term_id] for term_id in ids[start:stop])
+
+
+
+class DocumentIndexer:
+    """
+    为文档 `file_path` 建立全文索引的后台线程。
+
+    - 页面由后台渲染服务的子进程提取（见 `run_in_background`），`processes` 为 0 或渲染服务不可用时，线程用自己的文档对象提取；
+    - 先从磁盘缓存 `cache` 分批读取已保存的页面，再逐页提取其余页面，每 `batch_size` 页写入一次磁盘缓存；
+    - 已添加的页面立即可以查询，进度见 `len(indexer.index)` 。
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        fingerprint: str,
+        total_pages: int,
+        cache: DiskCache | None,
+        batch_size: int = 32,
+        doc_id: int = 0,
+        processes: int = 0,
+    ):
+        self.file_path: str = file_path
+        # 文档标识（见 `Tab.doc_id`），子进程据此判断文档是否已被重新打开
+        self.doc_id: int = doc_id
+        self.processes: int = processes
+        self.prefix: str = document_prefix(fingerprint)
+        self.cache: DiskCache | None = cache
+        self.batch_size: int = max(batch_size, 1)
+        self.index = DocumentIndex(total_pages)
+
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target = self._run, daemon = True)
+        self._thread.start()
+
+
+    @property
+    def running(self) -> bool:
+        """
+        后台线程是否仍在建立索引。
+        """
+        return self._thread.is_alive()
+
+
+    def stop(self) -> None:
+        """
+        停止后台线程（已添加的页面保留在索引中）。
+        """
+        self._stopped.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout = 2)
+
+
+    def _run(self) -> None:
+        """
+        线程主循环。
+        """
+        doc = None
+
+        def extract_in_thread(page_no: int) -> Tuple[List[str], List[float]]:
+            nonlocal doc
+            if doc is None:
+                doc = fitz.open(self.file_path)
+            return page_terms(doc[page_no])
+
+        try:
+            pages = range(self.index.total_pages)
+
+            # 磁盘缓存中已有的页面
+            if self.cache is not None:
+                for first in range(0, len(pages), 256):
+                    if self._stopped.is_set():
+                        return
+                    keys = {f"{self.prefix}{page_no}": page_no for page_no in pages[first:first + 256]}
+                    for (key, data) in self.cache.get_many(keys).items():
+                        try:
+                            self.index.add_page(keys[key], *decode_page(data))
+                        except (ValueError, zlib.error):
+                            # 数据损坏，重新提取
+                            continue
+
+            # 其余页面
+            batch: List[Tuple[str, bytes]] = []
+            for page_no in pages:
+                if self._stopped.is_set():
+                    break
+                if page_no in self.index:
+                    continue
+                try:
+                    (terms, boxes) = run_in_background(
+                        self.processes, _page_terms_job, self.file_path, self.doc_id, page_no,
+                        fallback = lambda: extract_in_thread(page_no),
+                    )
+                except Exception as error:
+                    print(f"in DocumentIndexer._run: page {page_no}: {error.__class__.__name__}: {error}")
+                    (terms, boxes) = ([], [])
+                self.index.add_page(page_no, terms, boxes)
+                batch.append((f"{self.prefix}{page_no}", encode_page(terms, boxes)))
+                if len(batch) >= self.batch_size:
+                    self._flush(batch)
+            self._flush(batch)
+        except Exception as error:
+            print(f"in DocumentIndexer._run: {error.__class__.__name__}: {error}")
+        finally:
+            if doc is not None:
+                doc.close()
+
+
+    def _flush(self, batch: List[Tuple[str, bytes]]) -> None:
+        """
+        把一批页面写入磁盘缓存。
+        """
+        if self.cache is not None and batch:
+            self.cache.put_many(batch)
+        batch.clear()
@@ -2,11 +2,13 @@
 PDF 高亮和标记插件 - 支持关键词搜索和高亮
 """
 
-import fitz
 from tkinter import messagebox, simpledialog
+from typing import Dict, Set
 
 from glueous_plugin import Plugin
 
+from plugins.Tab.KeywordHighlight import KeywordHighlights
+
 
 class HighLightPlugin(Plugin):
     """
@@ -20,15 +22,18 @@ class HighLightPlugin(Plugin):
 - name: HighLightPlugin
 - author: Zhenghongbo
 - hotkeys: `Ctrl+H`
-- menu entrance: `工具 → 高亮关键词`
+- menu entrance: `工具 → 高亮关键词` / `工具 → 将关键词高亮保存为注释` / `工具 → 清除关键词高亮`
 
 ## Function
 
 在 PDF 中搜索并高亮关键词。支持以下功能：
-- 输入关键词进行搜索
+- 输入关键词进行搜索（多个关键词用逗号分隔，不区分大小写）
 - 用矩形框标记找到的所有匹配
-- 保存带高亮的 PDF 文件
-- 清除已有的高亮标记
+- 将高亮保存为文档中的矩形注释
+- 清除关键词高亮
+
+查找在后台线程中进行，从当前页开始逐页查找，不阻塞界面：每页只提取一次文字（在 `background_processes` 个子进程中提取，为 0 时在后台线程中提取），一遍扫描找出所有关键词，查完一页即显示该页的结果。
+高亮以覆盖层画在画布上，只绘制可见页面上的结果，不修改文档；选择“将关键词高亮保存为注释”后才一次性写入为矩形注释，只重新渲染被修改的页面。
 
 ## Api
 
@@ -41,6 +46,10 @@ Python extension library:
 
 Other plugins:
 - TabPlugin
+
+## Others
+
+See `KeywordHighlights` in `plugins/Tab/KeywordHighlight.py`.
 """
 
     hotkeys = ["<Control-h>"]
@@ -49,19 +58,35 @@ Other plugins:
         """
         插件加载时：注册菜单项和快捷键
         """
+        # 各标签页的关键词高亮：{id(标签页): 高亮}
+        self.highlights: Dict[int, KeywordHighlights] = {}
+
+        # 已注册关闭回调的标签页：{id(标签页)}，标签页关闭（回调被调用并清除）时移除
+        self._watched_tabs: Set[int] = set()
+
         self.context.add_menu_command(
             path=["工具"],
             label="高亮关键词",
             command=self.run,
             accelerator="Ctrl+H"
         )
+        self.context.add_menu_command(
+            path=["工具"],
+            label="将关键词高亮保存为注释",
+            command=self.commit
+        )
+        self.context.add_menu_command(
+            path=["工具"],
+            label="清除关键词高亮",
+            command=self.clear
+        )
 
     def run(self) -> None:
         """
         执行高亮操作
         """
         current_tab = self.context.get_current_tab()
-        if current_tab is None:
+        if current_tab is None or not current_tab.doc:
             messagebox.showwarning("提示", "请先打开一个 PDF 文件")
             return
 
@@ -82,54 +107,64 @@ Other plugins:
             messagebox.showwarning("提示", "请输入至少一个关键词")
             return
 
-        # 执行高亮操作
+        # 在后台查找，结果逐页显示
+        self._highlight_keywords(current_tab, keywords)
+
+    def _highlight_keywords(self, tab, keywords: list) -> None:
+        """
+        在 PDF 的所有页面中高亮关键词（取代该标签页原有的关键词高亮）
+        """
+        if id(tab) not in self._watched_tabs:
+            self._watched_tabs.add(id(tab))
+            tab.add_close_callback(lambda: self._on_tab_closed(tab))
+        self._close(tab)
+
+        def on_finished(count: int) -> None:
+            if count == 0:
+                messagebox.showinfo("提示", f"未找到关键词：{', '.join(keywords)}")
+
+        self.highlights[id(tab)] = KeywordHighlights(tab, keywords, on_finished)
+
+    def commit(self) -> None:
+        """
+        将当前标签页的关键词高亮一次性写入文档，成为矩形注释
+        """
+        current_tab = self.context.get_current_tab()
+        highlights = self.highlights.get(id(current_tab)) if current_tab is not None else None
+        if highlights is None or not highlights.hits:
+            messagebox.showwarning("提示", "当前没有关键词高亮")
+            return
+        if highlights.search.running:
+            messagebox.showwarning("提示", "仍在查找关键词，请稍后再试")
+            return
         try:
-            self._highlight_keywords(current_tab, keywords)
-            messagebox.showinfo("成功", f"已在全部页面高亮 {len(keywords)} 个关键词")
+            count = highlights.commit()
+            messagebox.showinfo("成功", f"已添加 {count} 个高亮注释")
         except Exception as e:
             messagebox.showerror("错误", f"高亮失败: {str(e)}")
 
-    def _highlight_keywords(self, tab, keywords: list) -> None:
+    def clear(self) -> None:
         """
-        在 PDF 的所有页面中高亮关键词
+        清除当前标签页的关键词高亮（已保存为注释的不受影响）
         """
-        if not tab.doc:
-            return
+        current_tab = self.context.get_current_tab()
+        if current_tab is not None:
+            self._close(current_tab)
+
+    def _close(self, tab) -> None:
+        """
+        停止查找并移除标签页 `tab` 的关键词高亮（若有）
+        """
+        highlights = self.highlights.pop(id(tab), None)
+        if highlights is not None:
+            highlights.close()
 
-        total_highlights = 0
-
-        # 遍历所有页面
-        for page_num in range(len(tab.doc)):
-            page = tab.doc[page_num]
-
-            # 为每个关键词进行搜索和高亮
-            for keyword in keywords:
-                # 搜索关键词的所有位置
-                text_instances = page.search_for(keyword)
-
-                for rect in text_instances:
-                    # 添加矩形注释（高亮框）
-                    highlight_rect = page.add_rect_annot(rect)
-                    
-                    # 设置边框
-                    highlight_rect.set_border(width=2)
-                    
-                    # 设置颜色（蓝色边框，黄色填充）
-                    highlight_rect.set_colors(
-                        stroke=[0, 0, 1],      # 蓝色边框 RGB
-                        fill=[1, 1, 0]         # 黄色填充 RGB
-                    )
-                    
-                    # 设置透明度
-                    highlight_rect.set_opacity(0.3)
-                    
-                    # 更新注释
-                    highlight_rect.update()
-                    
-                    total_highlights += 1
-
-        # 【修改】刷新显示：调用 Tab 的 render 方法
-        tab.render()
+    def _on_tab_closed(self, tab) -> None:
+        """
+        标签页 `tab` 关闭时调用：移除其关键词高亮；关闭回调随之被清除，因此不再视为已注册（id 可能被新的标签页复用）
+        """
+        self._close(tab)
+        self._watched_tabs.discard(id(tab))
 
     def unloaded(self) -> None:
         """
@@ -0,0 +1,323 @@
+r"""
+关键词高亮：后台线程逐页查找关键词，结果以覆盖层画在可见页面上，不修改文档；需要时再一次性写入为矩形注释。
+
+- 所有关键词合并为一个正则表达式，每页只提取一次文字（`rawdict`），扫描一遍即找出所有关键词；
+- 后台线程从当前页开始查找，每查完一页把结果放入队列，Tk 线程定期取出；提取文字在后台渲染服务的子进程中进行
+  （见 `run_in_background`），不占用 GIL ；
+- 覆盖层只绘制可见页面上的结果，画布坐标改变（缩放、滚动到其他页面等）后在下一帧重新绘制。
+"""
+
+from __future__ import annotations
+
+import queue
+import re
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple, TYPE_CHECKING
+
+import fitz  # PyMuPDF
+
+from plugins.Tab.RenderFarm import open_document, run_in_background
+
+if TYPE_CHECKING:
+    from plugins.Tab.Tab import Tab
+
+
+# 矩形：(x0, y0, x1, y1)
+BBox = Tuple[float, float, float, float]
+
+
+def keyword_pattern(keywords: Sequence[str]) -> re.Pattern:
+    """
+    把关键词合并为一个不区分大小写的正则表达式。较长的关键词优先匹配；关键词中的空白可以匹配任意空白（包括换行）。
+    """
+    alternatives = [
+        r"\s+".join(re.escape(part) for part in keyword.split())
+        for keyword in sorted(set(keywords), key = len, reverse = True)
+        if keyword.strip()
+    ]
+    return re.compile("|".join(alternatives), re.IGNORECASE)
+
+
+def find_keywords(page: fitz.Page, pattern: re.Pattern) -> List[BBox]:
+    """
+    在页面 `page` 中查找 `pattern` 的所有匹配，返回各匹配在每一行中的边界框（未旋转的页面坐标），跨行的匹配每行一个。
+    """
+    # 页面上所有字符连成的字符串，行与行之间以换行符分隔；boxes[i] 为 text[i] 的 (边界框, 行号) ，换行符为 None
+    chars: List[str] = []
+    boxes: List[Tuple[BBox, int] | None] = []
+    line_no = 0
+    # 不需要图片块，不提取图片数据
+    for block in page.get_text("rawdict", flags = fitz.TEXTFLAGS_RAWDICT & ~fitz.TEXT_PRESERVE_IMAGES)["blocks"]:
+        for line in block.get("lines", []):
+            for span in line["spans"]:
+                for char in span["chars"]:
+                    chars.append(char["c"])
+                    boxes.append((char["bbox"], line_no))
+            chars.append("\n")
+            boxes.append(None)
+            line_no += 1
+
+    rects: List[BBox] = []
+    for match in pattern.finditer("".join(chars)):
+        lines: Dict[int, List[float]] = {}
+        for entry in boxes[match.start():match.end()]:
+            if entry is None:
+                continue
+            ((x0, y0, x1, y1), line) = entry
+            box = lines.get(line)
+            if box is None:
+                lines[line] = [x0, y0, x1, y1]
+            else:
+                box[0] = min(box[0], x0)
+                box[1] = min(box[1], y0)
+                box[2] = max(box[2], x1)
+                box[3] = max(box[3], y1)
+        rects.extend(tuple(box) for box in lines.values())
+    return rects
+
+
+def _find_keywords_job(file_path: str, doc_id: int, page_no: int, pattern: re.Pattern) -> List[BBox]:
+    """
+    在后台渲染服务的子进程中查找第 `page_no` 页，见 `find_keywords` 。
+    """
+    return find_keywords(open_document(file_path, doc_id)[page_no], pattern)
+
+
+
+class KeywordSearch:
+    """
+    在文档 `file_path` 中查找关键词 `keywords` 的后台线程，从第 `first_page` 页开始，到最后一页后回到第一页。
+
+    每查完一页，把 (页码, 边界框列表) 放入队列，由 `collect` 取出。页面由后台渲染服务的子进程查找（`doc_id` 为文档标识），
+    `processes` 为 0 或渲染服务不可用时，线程用自己的文档对象查找。
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        total_pages: int,
+        keywords: Sequence[str],
+        first_page: int = 0,
+        doc_id: int = 0,
+        processes: int = 0,
+    ):
+        self.file_path: str = file_path
+        self.doc_id: int = doc_id
+        self.processes: int = processes
+        self.total_pages: int = total_pages
+        self.pattern: re.Pattern = keyword_pattern(keywords)
+        self.first_page: int = first_page
+
+        # 已查完的页面数
+        self.searched: int = 0
+
+        self._results: queue.SimpleQueue[Tuple[int, List[BBox]]] = queue.SimpleQueue()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target = self._run, daemon = True)
+        self._thread.start()
+
+
+    @property
+    def running(self) -> bool:
+        """
+        后台线程是否仍在查找。
+        """
+        return self._thread.is_alive()
+
+
+    def stop(self) -> None:
+        """
+        停止查找。
+        """
+        self._stopped.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout = 2)
+
+
+    def collect(self) -> List[Tuple[int, List[BBox]]]:
+        """
+        取出所有已查完的页面的结果，不阻塞。
+        """
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+
+    def _run(self) -> None:
+        """
+        线程主循环。
+        """
+        doc = None
+
+        def find_in_thread(page_no: int) -> List[BBox]:
+            nonlocal doc
+            if doc is None:
+                doc = fitz.open(self.file_path)
+            return find_keywords(doc[page_no], self.pattern)
+
+        try:
+            for i in range(self.total_pages):
+                if self._stopped.is_set():
+                    return
+                page_no = (self.first_page + i) % self.total_pages
+                try:
+                    rects = run_in_background(
+                        self.processes, _find_keywords_job, self.file_path, self.doc_id, page_no, self.pattern,
+                        fallback = lambda: find_in_thread(page_no),
+                    )
+                except Exception as error:
+                    print(f"in KeywordSearch._run: page {page_no}: {error.__class__.__name__}: {error}")
+                    rects = []
+                self._results.put((page_no, rects))
+                self.searched += 1
+        except Exception as error:
+            print(f"in KeywordSearch._run: {error.__class__.__name__}: {error}")
+        finally:
+            if doc is not None:
+                doc.close()
+
+
+
+class KeywordHighlights:
+    """
+    标签页 `tab` 中关键词 `keywords` 的高亮：启动后台查找，把结果画在覆盖层上。只能在 Tk 线程中使用。
+
+    查找结束后调用 `on_finished(高亮的个数)` （若提供）。
+    """
+
+    # 查找期间，取出结果的间隔（单位：毫秒）
+    POLL_INTERVAL: int = 100
+
+    # 高亮所在的覆盖层
+    OVERLAY_NAME: str = "keyword-highlight"
+
+    # 高亮的边框、填充颜色（写入注释时也使用），及写入注释时的不透明度
+    STROKE_COLOR: str = "blue"
+    FILL_COLOR: str = "yellow"
+    ANNOT_STROKE: Tuple[float, float, float] = (0, 0, 1)
+    ANNOT_FILL: Tuple[float, float, float] = (1, 1, 0)
+    ANNOT_OPACITY: float = 0.3
+
+    def __init__(self, tab: Tab, keywords: Sequence[str], on_finished: Callable[[int], None] | None = None):
+        self.tab: Tab = tab
+        self.keywords: List[str] = list(keywords)
+        self.on_finished: Callable[[int], None] | None = on_finished
+
+        # 查找时的文档标识，文档重新打开后不再绘制
+        self.doc_id: int = tab.doc_id
+
+        # 各页的结果：{页码: [边界框, ...]}
+        self.hits: Dict[int, List[BBox]] = {}
+
+        # 结果改变的次数，及上次绘制时的状态，未改变时不重新绘制
+        self._version: int = 0
+        self._painted = None
+
+        self.search = KeywordSearch(
+            tab.file_path,
+            tab.total_pages,
+            self.keywords,
+            tab.page_no,
+            doc_id = tab.doc_id,
+            processes = tab.context.get_setting("background_processes", 1),
+        )
+        self._poll_id = None
+        self.tab.add_overlay_painter(self.paint)
+        self._poll()
+
+
+    @property
+    def count(self) -> int:
+        """
+        目前找到的高亮个数（跨行的匹配每行算一个）。
+        """
+        return sum(len(rects) for rects in self.hits.values())
+
+
+    def _poll(self) -> None:
+        """
+        取出后台线程的结果；可见页面上有新结果时重新绘制。
+        """
+        self._poll_id = None
+        # 先判断是否仍在查找：已停止时，之后取出的就是全部结果
+        running = self.search.running
+        visible = set(self.tab.layout.pages_in(self.tab.view_rect))
+        for (page_no, rects) in self.search.collect():
+            if rects:
+                self.hits[page_no] = rects
+                if page_no in visible:
+                    self._version += 1
+        self.paint()
+        if running:
+            self._poll_id = self.tab.canvas.after(self.POLL_INTERVAL, self._poll)
+        elif self.on_finished is not None:
+            self.on_finished(self.count)
+
+
+    def paint(self) -> None:
+        """
+        在可见页面上画出高亮。标签页每帧渲染后也会调用（见 `Tab.add_overlay_painter`），状态未改变时直接返回。
+        """
+        tab = self.tab
+        if tab.doc_id != self.doc_id:
+            tab.canvas.delete(self.OVERLAY_NAME)
+            return
+        visible = tab.layout.pages_in(tab.view_rect)
+        state = (tab.zoom, tab.layout_key, tab.layers.overlay_generation, visible, self._version)
+        if state == self._painted:
+            return
+        self._painted = state
+
+        tab.canvas.delete(self.OVERLAY_NAME)
+        for page_no in visible:
+            for box in self.hits.get(page_no, ()):
+                rect = tab.page_to_canvas(page_no, fitz.Rect(box))
+                if rect is None:
+                    continue
+                tab.canvas.create_rectangle(
+                    *rect,
+                    outline = self.STROKE_COLOR,
+                    fill = self.FILL_COLOR,
+                    stipple = "gray25",
+                    tags = tab.layers.overlay_tags(self.OVERLAY_NAME),
+                )
+
+
+    def commit(self) -> int:
+        """
+        把目前找到的高亮一次性写入文档，成为矩形注释，然后移除覆盖层；只重新渲染被修改的页面。返回写入的注释个数。
+        """
+        tab = self.tab
+        if tab.doc_id != self.doc_id or not self.hits:
+            return 0
+        count = 0
+        for (page_no, rects) in sorted(self.hits.items()):
+            page = tab.load_page(page_no)
+            for box in rects:
+                annot = page.add_rect_annot(fitz.Rect(box))
+                annot.set_border(width = 2)
+                annot.set_colors(stroke = self.ANNOT_STROKE, fill = self.ANNOT_FILL)
+                annot.set_opacity(self.ANNOT_OPACITY)
+                annot.update()
+                count += 1
+        tab.invalidate_render_cache(self.hits.keys())
+        self.hits = {}
+        self._version += 1
+        self.paint()
+        tab.request_render()
+        return count
+
+
+    def close(self) -> None:
+        """
+        停止查找，移除覆盖层。
+        """
+        self.search.stop()
+        if self._poll_id is not None:
+            self.tab.canvas.after_cancel(self._poll_id)
+            self._poll_id = None
+        self.tab.remove_overlay_painter(self.paint)
+        self.tab.canvas.delete(self.OVERLAY_NAME)
@@ -0,0 +1,387 @@
+r"""
+书库索引：把打开过的所有文档（`data["file_states"]`）的文字放进一个 SQLite FTS5 全文索引，跨文档查询，结果按 BM25 排序。
+
+- 每页为索引中的一行，内容为该页分词（见 `FullTextIndex.tokenize`）后以空格连接的词，因此中文也按字查询；
+- 文字在进程池的子进程中提取，子进程只导入本模块和 PyMuPDF ，不涉及 Tk ；
+- 清单表记录每个文件索引时的大小、修改时间和指纹：大小和修改时间未变时不再读取文件；
+  改变后再比较指纹，指纹也未变（如文件只是被 touch）时只更新清单，不重新提取。
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Future, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+import fitz  # PyMuPDF
+
+from plugins.Tab.DiskCache import file_fingerprint
+from plugins.Tab.FullTextIndex import _CJK, tokenize
+
+
+# 索引格式的版本，格式改变后重建索引
+LIBRARY_INDEX_VERSION = 1
+
+# 行号中页码占用的位数：行号 = (文件号 << PAGE_BITS) | 页码
+PAGE_BITS = 20
+
+# 摘要中相邻的两个中日韩文字之间的空格（分词时加入），两侧的文字可能带有命中标记
+_CJK_GAP = re.compile(rf"(?<=[{_CJK}])(】?) (【?)(?=[{_CJK}])")
+
+# 摘要中两侧都是中日韩文字的相邻命中标记（一个短语中的多个字各自被标出）
+_CJK_MARKS = re.compile(rf"(?<=[{_CJK}])】【(?=[{_CJK}])")
+
+
+#### 子进程 ####
+
+def _extract_document(file_path: str) -> List[str]:
+    """
+    提取文档 `file_path` 各页的文字，返回各页分词后以空格连接的词。
+    """
+    with fitz.open(file_path) as doc:
+        pages: List[str] = []
+        for page in doc:
+            try:
+                pages.append(" ".join(tokenize(page.get_text())))
+            except Exception as error:
+                print(f"in _extract_document: {file_path} page {page.number}: {error.__class__.__name__}: {error}")
+                pages.append("")
+        return pages
+
+
+
+#### 主进程 ####
+
+class LibraryHit(NamedTuple):
+    """
+    一个查询结果：文档 `file_path` 的第 `page_no` 页，`score` 越大越相关，`snippet` 为命中处附近的文字（命中的词以【】标出）。
+    """
+    file_path: str
+    page_no: int
+    score: float
+    snippet: str
+
+
+
+def _match_expression(query: str, prefix: bool) -> str | None:
+    """
+    把查询 `query` 转为 FTS5 的短语查询：分词后的各词依次相邻；`prefix` 为 True 时最后一个词按前缀匹配。无词时返回 None 。
+    """
+    words = tokenize(query)
+    if not words:
+        return None
+    # 分词结果只含字母、数字和中日韩文字，无需转义
+    return f'"{" ".join(words)}"' + (" *" if prefix else "")
+
+
+
+def _tidy_snippet(snippet: str) -> str:
+    """
+    去掉摘要中分词时在中日韩文字之间加入的空格，并把相邻的中日韩文字的命中标记合并；其他文字（如相邻的两个英文单词）保持不变。
+    """
+    return _CJK_MARKS.sub("", _CJK_GAP.sub(r"\1\2", snippet))
+
+
+
+class LibraryIndex:
+    """
+    保存在 SQLite 数据库 `path` 中的书库索引。
+
+    - `update(file_paths)` 启动后台线程：比较清单，把需要重新索引的文件交给 `processes` 个子进程提取，
+      结果由后台线程逐个文件写入数据库；`processes` 为 0 或进程池崩溃时在后台线程中提取；
+    - `search` 可以在更新期间调用，读取已写入的文档（写入与查询使用不同的数据库连接，互不阻塞）。
+    """
+
+    def __init__(self, path: str, processes: int = 2):
+        self.path: str = path
+        self.processes: int = max(processes, 0)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok = True)
+
+        # 写入连接（后台线程使用）和查询连接（Tk 线程使用），均为自动提交，写入时显式使用事务
+        self._writer = sqlite3.connect(path, check_same_thread = False, isolation_level = None)
+        self._writer.execute("PRAGMA journal_mode = WAL")
+        self._writer.execute("PRAGMA synchronous = NORMAL")
+        (version,) = self._writer.execute("PRAGMA user_version").fetchone()
+        if version != LIBRARY_INDEX_VERSION:
+            self._writer.execute("DROP TABLE IF EXISTS files")
+            self._writer.execute("DROP TABLE IF EXISTS pages")
+            self._writer.execute(f"PRAGMA user_version = {LIBRARY_INDEX_VERSION}")
+        self._writer.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+            "fingerprint TEXT NOT NULL, page_count INTEGER NOT NULL, error TEXT)"
+        )
+        # 未安装 FTS5 的 SQLite 在此抛出 sqlite3.OperationalError
+        self._writer.execute("CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(terms)")
+        self._reader = sqlite3.connect(path, check_same_thread = False, isolation_level = None)
+        self._reader_lock = threading.Lock()
+
+        # 本次更新需要检查的文件数、已检查完的文件数
+        self.total: int = 0
+        self.done: int = 0
+
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+
+    #### 更新 ####
+
+    @property
+    def running(self) -> bool:
+        """
+        后台线程是否仍在更新索引。
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+
+    def update(self, file_paths: Iterable[str]) -> None:
+        """
+        在后台更新索引，使其恰好包含 `file_paths` 中存在的文件；不在其中或已不存在的文件从索引中删除。正在更新时忽略。
+        """
+        if self.running:
+            return
+        paths = list(dict.fromkeys(os.path.abspath(file_path) for file_path in file_paths if file_path))
+        self.total = len(paths)
+        self.done = 0
+        self._stopped.clear()
+        self._thread = threading.Thread(target = self._run, args = (paths,), daemon = True)
+        self._thread.start()
+
+
+    def stop(self) -> None:
+        """
+        停止更新（已写入的文档保留在索引中）。
+        """
+        self._stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout = 2)
+
+
+    def _run(self, paths: List[str]) -> None:
+        """
+        后台线程：找出需要重新索引的文件，提取并写入。
+        """
+        try:
+            changed = self._check_manifest(paths)
+            if changed:
+                self._index_files(changed)
+        except Exception as error:
+            print(f"in LibraryIndex._run: {error.__class__.__name__}: {error}")
+
+
+    def _check_manifest(self, paths: List[str]) -> Dict[str, Tuple[int, int, str]]:
+        """
+        与清单比较，返回需要重新索引的文件：{路径: (大小, 修改时间, 指纹)} 。同时删除已不在书库中的文件。
+        """
+        manifest = {
+            path: (file_id, size, mtime_ns, fingerprint)
+            for (file_id, path, size, mtime_ns, fingerprint) in self._writer.execute(
+                "SELECT id, path, size, mtime_ns, fingerprint FROM files"
+            )
+        }
+
+        changed: Dict[str, Tuple[int, int, str]] = {}
+        for path in paths:
+            if self._stopped.is_set():
+                return {}
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self.done += 1
+                continue
+            entry = manifest.get(path)
+            if entry is not None and (entry[1], entry[2]) == (stat.st_size, stat.st_mtime_ns):
+                self.done += 1
+                continue
+            try:
+                fingerprint = file_fingerprint(path)
+            except OSError:
+                self.done += 1
+                continue
+            if entry is not None and entry[3] == fingerprint:
+                # 内容未变，只更新清单
+                self._writer.execute(
+                    "UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?",
+                    (stat.st_size, stat.st_mtime_ns, entry[0]),
+                )
+                self.done += 1
+                continue
+            changed[path] = (stat.st_size, stat.st_mtime_ns, fingerprint)
+
+        # 已不在书库中或已被删除的文件
+        present = set(paths)
+        for (path, (file_id, *_)) in manifest.items():
+            if path not in present or not os.path.exists(path):
+                self._remove(file_id)
+        return changed
+
+
+    def _index_files(self, changed: Dict[str, Tuple[int, int, str]]) -> None:
+        """
+        提取 `changed` 中各文件的文字并写入。同时在进程池中提取的文件数不超过子进程数的两倍，避免结果积压在内存中。
+        """
+        executor = None
+        if self.processes > 0:
+            # 子进程一律用 spawn 方式启动，不复制主进程中的 Tk 和线程
+            executor = ProcessPoolExecutor(
+                max_workers = self.processes,
+                mp_context = multiprocessing.get_context("spawn"),
+            )
+        try:
+            queue = list(changed)
+            running: Dict[Future, str] = {}
+            while (queue or running) and not self._stopped.is_set():
+                while executor is not None and queue and len(running) < 2 * self.processes:
+                    path = queue.pop(0)
+                    try:
+                        running[executor.submit(_extract_document, path)] = path
+                    except (BrokenProcessPool, RuntimeError):
+                        queue.insert(0, path)
+                        executor = self._shutdown(executor)
+                        break
+
+                if running:
+                    (finished, _) = wait(running, timeout = 0.5, return_when = FIRST_COMPLETED)
+                    for future in finished:
+                        path = running.pop(future)
+                        try:
+                            self._store(path, changed[path], future.result())
+                        except BrokenProcessPool:
+                            # 进程池崩溃，其余文件在本线程中提取
+                            executor = self._shutdown(executor)
+                            queue.append(path)
+                        except Exception as error:
+                            self._store(path, changed[path], error)
+                elif queue:
+                    # 没有可用的进程池时在本线程中提取
+                    path = queue.pop(0)
+                    try:
+                        result = _extract_document(path)
+                    except Exception as error:
+                        result = error
+                    self._store(path, changed[path], result)
+        finally:
+            self._shutdown(executor)
+
+
+    @staticmethod
+    def _shutdown(executor: ProcessPoolExecutor | None) -> None:
+        """
+        关闭进程池（若有），返回 None 。
+        """
+        if executor is not None:
+            executor.shutdown(wait = False, cancel_futures = True)
+        return None
+
+
+    def _store(self, path: str, stat: Tuple[int, int, str], result: List[str] | BaseException) -> None:
+        """
+        写入一个文件的提取结果 `result` （各页的词，或提取时的异常）及其清单 `stat` = (大小, 修改时间, 指纹) 。
+
+        提取失败的文件也记入清单（无页面），文件改变之前不再尝试。
+        """
+        (size, mtime_ns, fingerprint) = stat
+        error = None
+        if isinstance(result, BaseException):
+            error = f"{result.__class__.__name__}: {result}"
+            print(f"in LibraryIndex: {path}: {error}")
+            result = []
+
+        row = self._writer.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+        self._writer.execute("BEGIN")
+        try:
+            if row is None:
+                file_id = self._writer.execute(
+                    "INSERT INTO files (path, size, mtime_ns, fingerprint, page_count, error) VALUES (?, ?, ?, ?, ?, ?)",
+                    (path, size, mtime_ns, fingerprint, len(result), error),
+                ).lastrowid
+            else:
+                file_id = row[0]
+                self._writer.execute(
+                    "UPDATE files SET size = ?, mtime_ns = ?, fingerprint = ?, page_count = ?, error = ? WHERE id = ?",
+                    (size, mtime_ns, fingerprint, len(result), error, file_id),
+                )
+                self._delete_pages(file_id)
+            base = file_id << PAGE_BITS
+            self._writer.executemany(
+                "INSERT INTO pages (rowid, terms) VALUES (?, ?)",
+                ((base | page_no, terms) for (page_no, terms) in enumerate(result[:1 << PAGE_BITS]) if terms),
+            )
+            self._writer.execute("COMMIT")
+        except BaseException:
+            self._writer.execute("ROLLBACK")
+            raise
+        self.done += 1
+
+
+    def _remove(self, file_id: int) -> None:
+        """
+        从索引中删除文件号为 `file_id` 的文件。
+        """
+        self._writer.execute("BEGIN")
+        try:
+            self._delete_pages(file_id)
+            self._writer.execute("DELETE FROM files WHERE id = ?", (file_id,))
+            self._writer.execute("COMMIT")
+        except BaseException:
+            self._writer.execute("ROLLBACK")
+            raise
+
+
+    def _delete_pages(self, file_id: int) -> None:
+        """
+        删除文件号为 `file_id` 的文件的所有页面。调用方须已开始事务。
+        """
+        self._writer.execute(
+            "DELETE FROM pages WHERE rowid BETWEEN ? AND ?",
+            (file_id << PAGE_BITS, ((file_id + 1) << PAGE_BITS) - 1),
+        )
+
+
+    #### 查询 ####
+
+    def __len__(self) -> int:
+        """
+        已索引的文件数。
+        """
+        with self._reader_lock:
+            return self._reader.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+
+    def search(self, query: str, prefix: bool = False, limit: int = 100) -> List[LibraryHit]:
+        """
+        在已索引的所有文档中查找短语 `query` ，返回最相关的 `limit` 个页面，按 BM25 得分从高到低排列。
+
+        `prefix` 为 True 时，最后一个词按前缀匹配。
+        """
+        expression = _match_expression(query, prefix)
+        if expression is None:
+            return []
+        with self._reader_lock:
+            rows = self._reader.execute(
+                "SELECT pages.rowid, bm25(pages), snippet(pages, 0, '【', '】', '…', 16), files.path "
+                "FROM pages JOIN files ON files.id = (pages.rowid >> ?) "
+                "WHERE pages MATCH ? ORDER BY bm25(pages) LIMIT ?",
+                (PAGE_BITS, expression, limit),
+            ).fetchall()
+        return [
+            LibraryHit(path, rowid & ((1 << PAGE_BITS) - 1), -score, _tidy_snippet(snippet))
+            for (rowid, score, snippet, path) in rows
+        ]
+
+
+    def close(self) -> None:
+        """
+        停止更新并关闭数据库。
+        """
+        self.stop()
+        self._writer.close()
+        self._reader.close()
@@ -0,0 +1,144 @@
+r"""
+书库搜索窗口：在所有打开过的文档中查找文字（见 `LibraryIndex`），双击结果打开该文档并跳转到该页。
+"""
+
+from __future__ import annotations
+
+import os
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, List
+
+from plugins.Tab.LibraryIndex import LibraryHit, LibraryIndex
+
+
+class LibrarySearchWindow(tk.Toplevel):
+    """
+    查询书库索引 `index` 的窗口。选择结果后调用 `open_hit(结果)` 。
+    """
+
+    # 输入停止多久后查询（单位：毫秒）
+    SEARCH_DELAY: int = 200
+
+    # 索引更新期间，检查进度的间隔（单位：毫秒）
+    POLL_INTERVAL: int = 500
+
+    def __init__(self, parent, index: LibraryIndex, max_results: int, open_hit: Callable[[LibraryHit], None]):
+        super().__init__(parent)
+        self.title("在书库中搜索")
+        self.geometry("760x480")
+
+        self.index: LibraryIndex = index
+        self.max_results: int = max_results
+        self.open_hit: Callable[[LibraryHit], None] = open_hit
+
+        self.query = tk.StringVar(self)
+        self.entry = ttk.Entry(self, textvariable = self.query)
+        self.entry.pack(side = tk.TOP, fill = tk.X, padx = 6, pady = 6)
+        self.status = ttk.Label(self, anchor = tk.W)
+        self.status.pack(side = tk.BOTTOM, fill = tk.X, padx = 6, pady = 2)
+
+        self.tree = ttk.Treeview(self, columns = ("document", "page", "snippet"), show = "headings", selectmode = tk.BROWSE)
+        self.tree.heading("document", text = "文档", anchor = tk.W)
+        self.tree.heading("page", text = "页码", anchor = tk.W)
+        self.tree.heading("snippet", text = "摘要", anchor = tk.W)
+        self.tree.column("document", width = 180, stretch = False)
+        self.tree.column("page", width = 50, stretch = False)
+        self.tree.column("snippet", width = 500)
+        self.scrollbar = ttk.Scrollbar(self, orient = tk.VERTICAL, command = self.tree.yview)
+        self.tree.config(yscrollcommand = self.scrollbar.set)
+        self.scrollbar.pack(side = tk.RIGHT, fill = tk.Y)
+        self.tree.pack(side = tk.LEFT, fill = tk.BOTH, expand = True)
+
+        # 当前的查询结果，与结果列表中的行一一对应
+        self.hits: List[LibraryHit] = []
+
+        # 查询时已检查完的文件数，索引更新后重新查询
+        self._done: int = -1
+
+        self._search_id = None
+        self._poll_id = None
+
+        self.entry.bind("<KeyRelease>", lambda event: self.request_search())
+        self.entry.bind("<Return>", lambda event: self.open_selected())
+        self.entry.bind("<Escape>", lambda event: self.close())
+        self.tree.bind("<Double-Button-1>", lambda event: self.open_selected())
+        self.tree.bind("<Return>", lambda event: self.open_selected())
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.poll()
+
+
+    def request_search(self) -> None:
+        """
+        输入停止 `SEARCH_DELAY` 毫秒后查询。
+        """
+        if self._search_id is not None:
+            self.after_cancel(self._search_id)
+        self._search_id = self.after(self.SEARCH_DELAY, self.search)
+
+
+    def search(self) -> None:
+        """
+        按输入框中的文字查询，更新结果列表。
+        """
+        self._search_id = None
+        self._done = self.index.done
+        query = self.query.get()
+        # 输入以空白结尾时，最后一个词已输入完整，不按前缀匹配
+        self.hits = self.index.search(query, prefix = not query[-1:].isspace(), limit = self.max_results)
+        self.tree.delete(*self.tree.get_children())
+        for (i, hit) in enumerate(self.hits):
+            self.tree.insert("", tk.END, iid = str(i), values = (os.path.basename(hit.file_path), hit.page_no + 1, hit.snippet))
+        if self.hits:
+            self.tree.selection_set("0")
+        self.update_status()
+
+
+    def update_status(self) -> None:
+        """
+        显示结果数和索引进度。
+        """
+        text = f"{len(self.hits)}{'+' if len(self.hits) >= self.max_results else ''} 个结果"
+        if self.index.running:
+            text += f"（正在更新索引：{self.index.done} / {self.index.total} 个文档）"
+        self.status.config(text = text)
+
+
+    def poll(self) -> None:
+        """
+        索引更新期间定期更新进度；有文档写入后重新查询。
+        """
+        self._poll_id = None
+        running = self.index.running
+        if self.index.done != self._done:
+            if self.query.get().strip():
+                self.search()
+            else:
+                self._done = self.index.done
+        self.update_status()
+        if running:
+            self._poll_id = self.after(self.POLL_INTERVAL, self.poll)
+
+
+    def open_selected(self) -> None:
+        """
+        打开选中的结果（未选中时打开第一个）。
+        """
+        if self._search_id is not None:
+            self.after_cancel(self._search_id)
+            self.search()
+        if not self.hits:
+            return
+        selection = self.tree.selection()
+        self.open_hit(self.hits[int(selection[0]) if selection else 0])
+
+
+    def close(self) -> None:
+        """
+        关闭窗口（不停止更新索引）。
+        """
+        for after_id in (self._search_id, self._poll_id):
+            if after_id is not None:
+                self.after_cancel(after_id)
+        self._search_id = self._poll_id = None
+        self.destroy()
@@ -0,0 +1,147 @@
+r"""
+全局内存管理：统计所有标签页的缓存占用的内存，总量超过上限时，优先从最久未使用的后台标签页中释放。
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Protocol
+
+
+class MemoryConsumer(Protocol):
+    """
+    受内存管理的对象（如标签页）需要提供的接口。
+    """
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        各项缓存占用的内存（单位：字节），如 {"render_cache": ..., "canvas": ...} 。
+        """
+
+    def release_memory(self, target_bytes: int, background: bool) -> int:
+        """
+        释放缓存，使占用的内存不超过 `target_bytes` 字节，返回释放的字节数。
+
+        `background` 为 True 时该对象当前不可见，可以释放显示所需的内容（如画布上的图像），重新激活时再生成。
+        """
+
+
+
+class MemoryGovernor:
+    """
+    全局内存管理器，整个进程共用一个（见 `memory_governor`）。
+
+    每个标签页创建时调用 `register` 登记、关闭时调用 `unregister` 注销，切换到某个标签页时调用 `activate` 。
+    `enforce` 统计所有已登记对象的内存占用，超过上限 `limit` 时按激活时间从早到晚释放：
+    先释放后台标签页（必要时清空），最后才淘汰当前标签页的缓存。
+
+    `limit` 为 0 时不限制。
+    """
+
+    def __init__(self, limit: int = 0):
+        if limit < 0:
+            raise ValueError(f"Memory limit cannot be negative, got {limit}")
+        self.limit: int = limit
+
+        # 已登记的对象：{id(对象): 对象}，最近激活的排在最后
+        self._consumers: OrderedDict[int, MemoryConsumer] = OrderedDict()
+
+        # 累计释放的字节数
+        self.released_bytes: int = 0
+
+
+    def __len__(self) -> int:
+        return len(self._consumers)
+
+
+    def register(self, consumer: MemoryConsumer) -> None:
+        """
+        登记 `consumer` ，视为最近激活的对象。
+        """
+        self._consumers[id(consumer)] = consumer
+
+
+    def unregister(self, consumer: MemoryConsumer) -> None:
+        """
+        注销 `consumer` 。未登记的对象被忽略。
+        """
+        self._consumers.pop(id(consumer), None)
+
+
+    def activate(self, consumer: MemoryConsumer) -> None:
+        """
+        将 `consumer` 标记为最近激活（当前可见）的对象。
+        """
+        if id(consumer) in self._consumers:
+            self._consumers.move_to_end(id(consumer))
+
+
+    @property
+    def active(self) -> MemoryConsumer | None:
+        """
+        最近激活的对象。
+        """
+        return next(reversed(self._consumers.values()), None)
+
+
+    @property
+    def total_bytes(self) -> int:
+        """
+        所有已登记对象占用的内存总量（单位：字节）。
+        """
+        return sum(sum(consumer.memory_usage().values()) for consumer in self._consumers.values())
+
+
+    def usage(self) -> Dict[str, Any]:
+        """
+        当前的内存占用：
+
+        - `limit`：上限，0 表示不限制；
+        - `total`：总量；
+        - `released`：累计释放的字节数；
+        - `consumers`：按激活时间从早到晚排列的各对象的占用，每项为 {"name": 名称, "active": 是否为当前对象, "total": 合计, 各项缓存: 字节数} 。
+        """
+        active = self.active
+        consumers: List[Dict[str, Any]] = []
+        for consumer in self._consumers.values():
+            detail = consumer.memory_usage()
+            consumers.append({
+                "name": getattr(consumer, "file_path", None) or repr(consumer),
+                "active": consumer is active,
+                "total": sum(detail.values()),
+                **detail,
+            })
+        return {
+            "limit": self.limit,
+            "total": sum(entry["total"] for entry in consumers),
+            "released": self.released_bytes,
+            "consumers": consumers,
+        }
+
+
+    def enforce(self) -> int:
+        """
+        若内存占用超过上限，按激活时间从早到晚释放各对象的缓存，直到不超过上限。返回释放的字节数。
+        """
+        if not self.limit:
+            return 0
+
+        consumers = list(self._consumers.values())
+        usages = [sum(consumer.memory_usage().values()) for consumer in consumers]
+        excess = sum(usages) - self.limit
+        released = 0
+        for (i, (consumer, usage)) in enumerate(zip(consumers, usages)):
+            if excess <= 0:
+                break
+            background = i < len(consumers) - 1
+            freed = consumer.release_memory(max(usage - excess, 0), background)
+            excess -= freed
+            released += freed
+
+        self.released_bytes += released
+        return released
+
+
+
+# 整个进程共用的内存管理器，由 TabPlugin 按设置项 `memory_limit` 设置上限
+memory_governor = MemoryGovernor()
@@ -0,0 +1,264 @@
+r"""
+页面布局：计算各个页面在画布上的位置，并按坐标查找页面。
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Iterable, Sequence, Tuple
+
+import fitz  # PyMuPDF
+
+
+def rotate_size(width: float, height: float, rotation: int) -> Tuple[float, float]:
+    """
+    页面顺时针旋转 `rotation` 度（0/90/180/270）后的 (宽度, 高度) 。
+    """
+    return (height, width) if rotation % 180 else (width, height)
+
+
+def rotated_rect(page_rect: fitz.Rect, rotation: int) -> fitz.Rect:
+    """
+    页面矩形 `page_rect` 顺时针旋转 `rotation` 度后的矩形，左上角位于原点。
+    """
+    return fitz.Rect(0, 0, *rotate_size(page_rect.width, page_rect.height, rotation))
+
+
+def rotation_matrix(page_rect: fitz.Rect, rotation: int) -> fitz.Matrix:
+    """
+    将页面坐标顺时针旋转 `rotation` 度，再平移使旋转后的页面左上角位于原点的变换矩阵。
+    """
+    matrix = fitz.Matrix(rotation)
+    bbox = page_rect * matrix
+    return matrix * fitz.Matrix(1, 0, 0, 1, -bbox.x0, -bbox.y0)
+
+
+def render_transform(page_rect: fitz.Rect, clip: fitz.Rect, scale: float, rotation: int) -> Tuple[fitz.Matrix, fitz.Rect]:
+    """
+    渲染旋转后的页面上的 `clip` 区域时，传给 `get_pixmap` 的 (变换矩阵, 页面坐标上的裁剪区域) 。
+
+    `page_rect` 为页面矩形（未旋转），`clip` 为旋转后的页面上的区域；渲染结果恰好是 `clip` 放大 `scale` 倍。
+    """
+    matrix = fitz.Matrix(scale, scale)
+    if not rotation % 360:
+        return (matrix, clip)
+    rotate = rotation_matrix(page_rect, rotation)
+    return (rotate * matrix, clip * ~rotate)
+
+
+
+class PageLayout:
+    """
+    页面布局：页面按行自上而下排列，相邻两行之间间隔 `gap` 。
+
+    - 单页视图（`columns = 1`）：每行一页，水平居中。
+    - 双页视图（`columns = 2`）：每行两页（跨页），第 1 、2 页为一行，第 3 、4 页为一行……
+    - 书本视图（`columns = 2, cover = True`）：第 1 页（封面）单独一行，位于右侧；第 2 、3 页为一行……
+
+    双页、书本视图中，同一行的页面垂直居中，左右两页之间间隔 `gap` ，所有行靠中缝线对齐。
+    `r2l` 为 True 时从右到左排列，即每行的第一页在右侧，封面位于左侧。
+
+    坐标均为未缩放的布局平面上的坐标（单位：逻辑像素），乘以 `zoom` 即为画布坐标。
+    布局只包含第 `start` 页起的 `len(page_sizes)` 个页面，且必须由完整的行组成，如不连续视图的布局只包含当前页所在的行。
+
+    页面的位置和各行的顶端位置（行高的前缀和）保存在紧凑的数组中，按纵坐标查找页面时二分查找，
+    因此即使文档有上千页，每次查找也只需 O(log n) 。
+    """
+
+    def __init__(
+        self,
+        page_sizes: Iterable[Tuple[float, float]],
+        gap: float = 0,
+        start: int = 0,
+        columns: int = 1,
+        cover: bool = False,
+        r2l: bool = False,
+    ):
+        if columns not in (1, 2):
+            raise ValueError(f"Number of columns must be 1 or 2, got {columns}")
+        self.gap    : float = gap     # 相邻两行、同一行相邻两页之间的间隔
+        self.start  : int = start     # 第一个页面的页码
+        self.columns: int = columns   # 每行最多几页
+        self.cover  : bool = cover    # 封面是否单独一行
+        self.r2l    : bool = r2l      # 是否从右到左排列
+
+        self.widths : array = array("d") # 页面宽度
+        self.heights: array = array("d") # 页面高度
+        for (width, height) in page_sizes:
+            self.widths.append(width)
+            self.heights.append(height)
+
+        # 每行的第一个页面在布局中的序号，最后一项为页面总数
+        self.row_starts: array = array("l")
+        i = 0
+        while i < len(self):
+            self.row_starts.append(i)
+            i = self.row_pages(self.start + i).stop - self.start
+        self.row_starts.append(len(self))
+
+        # 每行的高度；tops[r] 为第 r 行的顶端位置，tops[-1] 为总高度加一个间隔
+        row_heights = [max(self.heights[a:b]) for (a, b) in zip(self.row_starts, self.row_starts[1:])]
+        self.tops: array = array("d", accumulate((height + gap for height in row_heights), initial = 0))
+
+        # 页面左上角的位置
+        self.xs: array = array("d", bytes(8 * len(self)))
+        self.ys: array = array("d", bytes(8 * len(self)))
+        self.width: float = self._arrange(row_heights)
+
+
+    def _arrange(self, row_heights: Sequence[float]) -> float:
+        """
+        计算每个页面左上角的位置，返回布局平面的宽度。
+        """
+        # 每个页面所在的栏：0 为左栏，1 为右栏；单页视图只有一栏
+        slots = array("b", bytes(len(self)))
+        if self.columns == 2:
+            for (a, b) in zip(self.row_starts, self.row_starts[1:]):
+                for i in range(a, b):
+                    # 按阅读顺序的位置：封面占第二个位置（右侧）
+                    position = 1 if (self.start + i == 0 and self.cover) else i - a
+                    slots[i] = 1 - position if self.r2l else position
+
+        # 两栏的宽度，中缝线位于左栏右侧
+        left_width  = max((self.widths[i] for i in range(len(self)) if slots[i] == 0), default = 0)
+        right_width = max((self.widths[i] for i in range(len(self)) if slots[i] == 1), default = 0)
+        middle_gap = self.gap if left_width and right_width else 0
+
+        for (row, (a, b)) in enumerate(zip(self.row_starts, self.row_starts[1:])):
+            for i in range(a, b):
+                if self.columns == 1:
+                    self.xs[i] = (left_width - self.widths[i]) / 2
+                elif slots[i] == 0:
+                    self.xs[i] = left_width - self.widths[i]
+                else:
+                    self.xs[i] = left_width + middle_gap
+                self.ys[i] = self.tops[row] + (row_heights[row] - self.heights[i]) / 2
+
+        return left_width + middle_gap + right_width
+
+
+    def __len__(self) -> int:
+        return len(self.heights)
+
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(pages={self.start}..{self.stop - 1}, rows={len(self.row_starts) - 1}, size={self.width}x{self.height})"
+
+
+    def __contains__(self, page_no: int) -> bool:
+        return self.start <= page_no < self.stop
+
+
+    @property
+    def stop(self) -> int:
+        """
+        布局中最后一个页面的页码加 1 。
+        """
+        return self.start + len(self)
+
+
+    @property
+    def height(self) -> float:
+        """
+        布局平面的高度。
+        """
+        return self.tops[-1] - self.gap if len(self) else 0
+
+
+    @property
+    def rect(self) -> fitz.Rect:
+        """
+        布局平面的矩形。
+        """
+        return fitz.Rect(0, 0, self.width, self.height)
+
+
+    def row_pages(self, page_no: int, total_pages: int | None = None) -> range:
+        """
+        按本布局的分行方式，第 `page_no` 页所在的行包含的页码（与该页是否在本布局中无关）。
+
+        `total_pages` 为文档总页数，默认为本布局的最后一页加 1 。
+        """
+        if total_pages is None:
+            total_pages = self.stop
+        return self.spread(page_no, total_pages, self.columns, self.cover)
+
+
+    @staticmethod
+    def spread(page_no: int, total_pages: int, columns: int = 1, cover: bool = False) -> range:
+        """
+        每行 `columns` 页、封面是否单独一行为 `cover` 时，第 `page_no` 页所在的行包含的页码。
+        """
+        if columns == 1:
+            return range(page_no, page_no + 1)
+        if cover:
+            if page_no == 0:
+                return range(0, 1)
+            first = page_no - (page_no + 1) % 2
+        else:
+            first = page_no - page_no % 2
+        return range(first, min(first + 2, total_pages))
+
+
+    def page_rect(self, page_no: int) -> fitz.Rect:
+        """
+        第 `page_no` 页在布局平面上的位置矩形。
+        """
+        if page_no not in self:
+            raise IndexError(f"Page {page_no} is not in the layout (pages {self.start}..{self.stop - 1})")
+        i = page_no - self.start
+        return fitz.Rect(self.xs[i], self.ys[i], self.xs[i] + self.widths[i], self.ys[i] + self.heights[i])
+
+
+    def _row_at(self, y: float) -> int:
+        """
+        纵坐标 `y` 处的行号；位于两行之间的间隔时，返回上一行，超出布局平面时返回第一行或最后一行。
+        """
+        row = bisect_right(self.tops, y) - 1
+        return min(max(row, 0), len(self.row_starts) - 2)
+
+
+    def page_at(self, y: float) -> int:
+        """
+        纵坐标 `y` 处的行的第一页的页码；位于两行之间的间隔时，返回上一行，超出布局平面时返回第一行或最后一行。
+        """
+        return self.start + self.row_starts[self._row_at(y)]
+
+
+    def page_containing(self, point: fitz.Point) -> int | None:
+        """
+        布局平面上的点 `point` 所在页面的页码；不在任何页面上（如位于页面之间的间隔）时返回 None 。
+        """
+        if not len(self):
+            return None
+        row = self._row_at(point.y)
+        for i in range(self.row_starts[row], self.row_starts[row + 1]):
+            if self.page_rect(self.start + i).contains(point):
+                return self.start + i
+        return None
+
+
+    def pages_in(self, rect: fitz.Rect) -> range:
+        """
+        与布局平面上的矩形 `rect` 在纵向上重叠的行包含的页码。
+        """
+        if not len(self) or rect.is_empty:
+            return range(0)
+        first_row = self._row_at(rect.y0)
+        stop_row = bisect_left(self.tops, rect.y1, hi = len(self.row_starts) - 1)
+        return range(self.start + self.row_starts[first_row], self.start + self.row_starts[max(stop_row, first_row)])
+
+
+    def visible_pages(self, rect: fitz.Rect) -> Iterable[Tuple[int, fitz.Rect, fitz.Rect]]:
+        """
+        与布局平面上的矩形 `rect` 相交的页面。
+
+        逐个生成 (页码, 页面在布局平面上的位置矩形, 相交部分在布局平面上的矩形) 。
+        """
+        for page_no in self.pages_in(rect):
+            page_rect = self.page_rect(page_no)
+            visible = page_rect & rect
+            if not visible.is_empty:
+                yield (page_no, page_rect, visible)
@@ -74,7 +74,8 @@ Page number calculation: 'Tab.page_no' is a 0-based index.
         else:
             prev_button.config(state = "normal")
 
-        if current_tab.page_no >= current_tab.total_pages - 1:
+        # 双页、书本视图中，当前页所在的跨页已包含最后一页时也不能再向后翻页
+        if current_tab.spread_pages().stop >= current_tab.total_pages:
             next_button.config(state = "disabled")
         else:
             next_button.config(state = "normal")
@@ -126,6 +127,14 @@ Page number calculation: 'Tab.page_no' is a 0-based index.
         if current_tab.display_mode == "single":
             self.page_down_single(current_tab)
 
+        # 单页连续视图
+        elif current_tab.display_mode == "continuous":
+            self.page_down_continuous(current_tab)
+
+        # 双页、书本视图
+        else:
+            self.page_down_spread(current_tab)
+
 
     def page_down_single(self, tab) -> bool:
         """
@@ -146,11 +155,30 @@ Page number calculation: 'Tab.page_no' is a 0-based index.
 
     def page_down_continuous(self, tab) -> bool:
         """
-        对单页视图的文档进行向下翻页。
+        对单页连续视图的文档进行向下翻页。
 
         返回是否成功翻页。
         """
-        pass
+        # 当前页是视图顶端所在的页面，滚动位置相对于当前页，因此与单页视图一样：让下一页的顶端对齐视图顶端
+        return self.page_down_single(tab)
+
+
+    def page_down_spread(self, tab) -> bool:
+        """
+        对双页、书本视图（连续或不连续）的文档进行向下翻页：翻到下一个跨页的第一页。
+
+        返回是否成功翻页。
+        """
+        next_page_no = tab.spread_pages().stop
+        if next_page_no >= tab.total_pages:
+            print("已经是最后一页")
+            return False
+
+        tab.scroll_pos = (tab.scroll_pos[0], 0)
+        tab.page_no = next_page_no
+        self.context.update_page_number()
+        self.context.update_page_turning_button()
+        return True
 
 
     @override
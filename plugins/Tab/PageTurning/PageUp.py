@@ -86,9 +86,10 @@ Page number calculation: 'Tab.page_no' is a 0-based index.
         if current_tab is None:
             return
 
-        # 切换到上一页
-        if current_tab.page_no > 0:
-            current_tab.page_no -= 1
+        # 切换到上一页；双页、书本视图中切换到上一个跨页的第一页
+        first_page_no = current_tab.spread_pages().start
+        if first_page_no > 0:
+            current_tab.page_no = current_tab.spread_pages(first_page_no - 1).start
             self.context.update_page_number()
             self.context.update_page_turning_button()
         else:
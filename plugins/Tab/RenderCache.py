@@ -0,0 +1,222 @@
+r"""
+渲染缓存：以图块为单位缓存已渲染的页面图像，按 LRU 策略淘汰。
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+import threading
+import tkinter as tk
+from typing import Callable, NamedTuple, Tuple
+
+from PIL import Image, ImageTk
+
+from plugins.Tab.ColorTheme import ColorTheme
+from plugins.Tab.RenderStats import render_stats
+
+
+class TileKey(NamedTuple):
+    """
+    图块的缓存键。
+
+    图块按 `render_tile_size` 把缩放后的整页（单位：画布像素）切分成网格，`(column, row)` 为图块在网格中的位置。
+    """
+    doc_id  : int   # 文档标识，每次打开文档时分配
+    page_no : int   # 页码（0-based）
+    zoom    : float # 缩放比例
+    rotation: int   # 旋转角度
+    dpi     : int   # 分辨率
+    theme   : Tuple # 颜色主题的标识（`ColorTheme.key`）
+    column  : int   # 图块所在列
+    row     : int   # 图块所在行
+
+
+
+class RenderView(NamedTuple):
+    """
+    渲染时的视图状态快照，用于生成图块的缓存键。
+
+    后台线程按快照而不是标签页的实时状态进行渲染，这样即使渲染途中缩放比例发生了变化，图块也不会存错位置。
+    """
+    doc_id   : int   # 文档标识
+    zoom     : float # 缩放比例
+    rotation : int   # 旋转角度
+    dpi      : int   # 分辨率
+    theme    : ColorTheme # 颜色主题
+    tile_size: int   # 图块边长（单位：画布像素）
+
+    def tile_key(self, page_no: int, column: int, row: int) -> TileKey:
+        """
+        返回第 `page_no` 页第 `row` 行第 `column` 列图块的缓存键。
+        """
+        return TileKey(self.doc_id, page_no, self.zoom, self.rotation, self.dpi, self.theme.key, column, row)
+
+
+
+class Tile:
+    """
+    一个已渲染的图块。
+
+    图块先以 PIL 图像或 PPM 数据的形式保存（可以在任意线程中创建），第一次被绘制到画布上时才转换为 PhotoImage ，
+    转换后释放原始数据。PPM 数据由 Tk 直接解码，不经过 Pillow 。
+    """
+
+    def __init__(
+        self,
+        image: Image.Image | None = None,
+        ppm: bytes | None = None,
+        size: Tuple[int, int] | None = None,
+    ):
+        if image is not None:
+            size = image.size
+        if size is None:
+            raise ValueError("`size` is required when the tile is created from PPM data")
+        self.image : Image.Image | None = image
+        self.ppm   : bytes | None = ppm
+        self.photo : tk.PhotoImage | ImageTk.PhotoImage | None = None
+        self.width : int = size[0]
+        self.height: int = size[1]
+
+
+    @property
+    def nbytes(self) -> int:
+        """
+        图块占用内存的估计值（单位：字节），按每像素 4 字节计算。
+        """
+        return self.width * self.height * 4
+
+
+    def get_photo(self) -> tk.PhotoImage | ImageTk.PhotoImage:
+        """
+        获取可绘制到画布上的 PhotoImage 。只能在 Tk 线程中调用。
+        """
+        if self.photo is None:
+            with render_stats.timer("photo"):
+                if self.ppm is not None:
+                    self.photo = tk.PhotoImage(data = self.ppm, format = "PPM")
+                else:
+                    self.photo = ImageTk.PhotoImage(image = self.image)
+            self.image = None
+            self.ppm = None
+        return self.photo
+
+
+
+def samples_to_ppm(
+    samples: memoryview,
+    size: Tuple[int, int],
+    stride: int,
+    box: Tuple[int, int, int, int] | None = None,
+) -> bytes:
+    """
+    将 RGB 像素缓冲区 `samples` （大小为 `size` ，每行 `stride` 字节）中 `box = (x0, y0, x1, y1)` 区域（默认为整幅）
+    的像素转换为 PPM 数据，可直接传给 `tk.PhotoImage` 。
+
+    像素按行从 `samples` 中切出，只在最后拼接时复制一次。
+    """
+    (width, height) = size
+    if box is None:
+        box = (0, 0, width, height)
+
+    x0 = max(box[0], 0)
+    y0 = max(box[1], 0)
+    x1 = min(box[2], width)
+    y1 = min(box[3], height)
+
+    chunks = [f"P6\n{x1 - x0} {y1 - y0}\n255\n".encode("ascii")]
+    if x0 == 0 and x1 * 3 == stride:
+        # 整行连续，一次切出
+        chunks.append(samples[y0 * stride : y1 * stride])
+    else:
+        chunks.extend(samples[y * stride + x0 * 3 : y * stride + x1 * 3] for y in range(y0, y1))
+    return b"".join(chunks)
+
+
+
+class RenderCache:
+    """
+    图块的 LRU 缓存，占用的内存不超过 `max_bytes` 字节。
+
+    线程安全：可以在后台渲染线程中写入。
+    """
+
+    def __init__(self, max_bytes: int):
+        if max_bytes < 0:
+            raise ValueError(f"Cache size cannot be negative, got {max_bytes}")
+        self.max_bytes    : int = max_bytes
+        self.current_bytes: int = 0
+
+        # 最近使用的图块排在最后
+        self._tiles: OrderedDict[TileKey, Tile] = OrderedDict()
+        self._lock = threading.RLock()
+
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+
+    def __contains__(self, key: TileKey) -> bool:
+        return key in self._tiles
+
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(tiles={len(self)}, bytes={self.current_bytes}/{self.max_bytes})"
+
+
+    def get(self, key: TileKey) -> Tile | None:
+        """
+        获取图块，并将其标记为最近使用。不存在时返回 None 。
+        """
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+            return tile
+
+
+    def put(self, key: TileKey, tile: Tile) -> None:
+        """
+        存入图块。若超出容量，则淘汰最久未使用的图块。
+        """
+        with self._lock:
+            old_tile = self._tiles.pop(key, None)
+            if old_tile is not None:
+                self.current_bytes -= old_tile.nbytes
+            self._tiles[key] = tile
+            self.current_bytes += tile.nbytes
+            self.evict(self.max_bytes)
+
+
+    def evict(self, target_bytes: int) -> int:
+        """
+        淘汰最久未使用的图块，直到占用的内存不超过 `target_bytes` 字节。
+
+        返回释放的字节数。
+        """
+        freed = 0
+        with self._lock:
+            while self._tiles and self.current_bytes > target_bytes:
+                (_, tile) = self._tiles.popitem(last = False)
+                self.current_bytes -= tile.nbytes
+                freed += tile.nbytes
+        return freed
+
+
+    def discard(self, predicate: Callable[[TileKey], bool]) -> int:
+        """
+        移除所有满足 `predicate(key)` 的图块，返回移除的图块数目。
+        """
+        with self._lock:
+            keys = [key for key in self._tiles if predicate(key)]
+            for key in keys:
+                self.current_bytes -= self._tiles.pop(key).nbytes
+        return len(keys)
+
+
+    def clear(self) -> None:
+        """
+        清空缓存。
+        """
+        with self._lock:
+            self._tiles.clear()
+            self.current_bytes = 0
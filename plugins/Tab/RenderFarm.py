@@ -0,0 +1,410 @@
+r"""
+多进程渲染服务：在进程池中并行渲染图块，渲染结果通过共享内存传回主进程。
+
+除渲染图块外，也可以在子进程中执行其他调用 PyMuPDF 的任务（见 `RenderFarm.run` 和 `run_in_background`）：
+PyMuPDF 执行期间一直持有 GIL ，放在后台线程中执行也会使 Tk 线程卡顿，放在子进程中则不会。
+
+子进程只导入任务函数所在的模块和 PyMuPDF ，不创建 Tk 窗口。
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from math import ceil
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+import queue
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Set, Tuple, TypeVar
+
+import fitz  # PyMuPDF
+
+from plugins.Tab.PageLayout import render_transform
+
+
+T = TypeVar("T")
+
+
+#### 子进程 ####
+
+# 子进程打开的文档：{文件路径: (文档标识, 文档)}
+_documents: Dict[str, Tuple[int, fitz.Document]] = {}
+
+# 子进程缓存的显示列表：{(文件路径, 页码): 显示列表}，最近使用的排在最后
+_display_lists: OrderedDict[Tuple[str, int], fitz.DisplayList] = OrderedDict()
+
+# 子进程最多缓存多少个页面的显示列表
+_MAX_DISPLAY_LISTS = 8
+
+
+def open_document(file_path: str, doc_id: int) -> fitz.Document:
+    """
+    获取子进程自己打开的文档 `file_path` 。文档在主进程中被重新打开（`doc_id` 改变）后，子进程也重新打开。
+    """
+    entry = _documents.get(file_path)
+    if entry is None or entry[0] != doc_id:
+        if entry is not None:
+            for key in [key for key in _display_lists if key[0] == file_path]:
+                del _display_lists[key]
+            entry[1].close()
+        entry = (doc_id, fitz.open(file_path))
+        _documents[file_path] = entry
+    return entry[1]
+
+
+def _get_display_list(file_path: str, doc_id: int, page_no: int) -> fitz.DisplayList:
+    """
+    获取（子进程自己的）文档中某一页的显示列表。
+    """
+    doc = open_document(file_path, doc_id)
+    key = (file_path, page_no)
+    display_list = _display_lists.get(key)
+    if display_list is None:
+        display_list = doc[page_no].get_displaylist()
+        _display_lists[key] = display_list
+        while len(_display_lists) > _MAX_DISPLAY_LISTS:
+            _display_lists.popitem(last = False)
+    else:
+        _display_lists.move_to_end(key)
+    return display_list
+
+
+def _attach_shared_memory(name: str) -> SharedMemory:
+    """
+    连接主进程创建的共享内存。共享内存由主进程负责释放，子进程不应跟踪它。
+    """
+    try:
+        return SharedMemory(name = name, track = False)
+    except TypeError:
+        # Python 3.13 之前没有 `track` 参数；子进程与主进程共用同一个资源跟踪进程，重复登记不会导致提前释放
+        return SharedMemory(name = name)
+
+
+def _render_job(
+    file_path: str,
+    doc_id: int,
+    page_no: int,
+    clip: Tuple[float, float, float, float],
+    scale: float,
+    rotation: int,
+    shm_name: str,
+) -> Tuple[int, int, int]:
+    """
+    在子进程中渲染旋转 `rotation` 度后的页面上的 `clip` 区域，并把 RGB 像素写入名为 `shm_name` 的共享内存。
+
+    返回 (宽度, 高度, 每行字节数)。
+    """
+    display_list = _get_display_list(file_path, doc_id, page_no)
+    (matrix, clip) = render_transform(display_list.rect, fitz.Rect(clip), scale, rotation)
+    pix = display_list.get_pixmap(
+        matrix = matrix,
+        clip = clip,
+        colorspace = fitz.csRGB,
+        alpha = False
+    )
+
+    nbytes = pix.stride * pix.height
+    shm = _attach_shared_memory(shm_name)
+    try:
+        if nbytes > shm.size:
+            raise ValueError(f"shared memory too small: need {nbytes} bytes, got {shm.size}")
+        shm.buf[:nbytes] = pix.samples_mv
+    finally:
+        shm.close()
+    return (pix.width, pix.height, pix.stride)
+
+
+#### 主进程 ####
+
+class RenderResult:
+    """
+    一个已完成的渲染任务的结果，像素存放在共享内存中。用完后必须调用 `release` 。
+    """
+
+    def __init__(self, shm: SharedMemory, width: int, height: int, stride: int):
+        self.shm   : SharedMemory = shm
+        self.width : int = width
+        self.height: int = height
+        self.stride: int = stride
+
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return (self.width, self.height)
+
+
+    @property
+    def samples(self) -> memoryview:
+        """
+        RGB 像素缓冲区（共享内存的视图，不复制）。
+        """
+        return self.shm.buf[: self.stride * self.height]
+
+
+    def release(self) -> None:
+        """
+        释放共享内存。
+        """
+        release_shared_memory(self.shm)
+
+
+
+def release_shared_memory(shm: SharedMemory) -> None:
+    """
+    关闭并删除共享内存。
+    """
+    try:
+        shm.close()
+        shm.unlink()
+    except (BufferError, FileNotFoundError) as error:
+        print(f"in release_shared_memory: {error.__class__.__name__}: {error}")
+
+
+
+class RenderFarm:
+    """
+    多进程渲染服务。
+
+    - 每个子进程打开自己的 `fitz.Document` ，并缓存最近渲染的页面的显示列表。
+    - 主进程为每个任务分配共享内存，子进程把像素直接写进去，避免序列化像素数据。
+    - 任务完成后，结果进入提交者（`submit` 的 `owner` 参数，如标签页）自己的队列，由提交者调用 `collect(owner)` 取出，
+      各提交者互不干扰；提交者不再需要结果时调用 `discard(owner)` 。
+    """
+
+    def __init__(self, processes: int):
+        if processes <= 0:
+            raise ValueError(f"Number of processes must be positive, got {processes}")
+        self.processes: int = processes
+
+        # 子进程一律用 spawn 方式启动，不复制主进程中的 Tk 和线程
+        self._executor = ProcessPoolExecutor(
+            max_workers = processes,
+            mp_context = multiprocessing.get_context("spawn"),
+        )
+        # 各提交者的结果队列：{提交者: 队列}
+        self._results: Dict[Hashable, queue.SimpleQueue[Tuple[Hashable, SharedMemory, Future]]] = {}
+        self._results_lock = threading.Lock()
+
+        # 进程池崩溃后不再可用，调用方应退回到进程内渲染
+        self.broken: bool = False
+
+
+    def run(self, function: Callable[..., T], *args: Any) -> Future:
+        """
+        提交一个任意的任务：在子进程中调用 `function(*args)` 。`function` 须为模块级函数，参数和返回值须可以序列化。
+
+        返回 Future ，其结果为 `function` 的返回值。
+        """
+        try:
+            future = self._executor.submit(function, *args)
+        except (BrokenProcessPool, RuntimeError):
+            self.broken = True
+            raise
+        future.add_done_callback(self._check_broken)
+        return future
+
+
+    def _check_broken(self, future: Future) -> None:
+        """
+        任务结束时调用：子进程崩溃导致任务失败时，标记进程池已崩溃。
+        """
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self.broken = True
+
+
+    def _allocate(self, clip: fitz.Rect, scale: float) -> SharedMemory:
+        """
+        为以 `scale` 倍渲染 `clip` 区域的任务分配共享内存。
+        """
+        # 像素图的大小可能因取整多出 1 像素
+        width  = ceil(clip.width  * scale) + 1
+        height = ceil(clip.height * scale) + 1
+        return SharedMemory(create = True, size = width * height * 3)
+
+
+    def submit(
+        self,
+        owner: Hashable,
+        token: Hashable,
+        file_path: str,
+        doc_id: int,
+        page_no: int,
+        clip: fitz.Rect,
+        scale: float,
+        rotation: int = 0,
+    ) -> Future:
+        """
+        提交一个渲染任务：以 `scale` 倍渲染文档 `file_path` 第 `page_no` 页（旋转 `rotation` 度后）上的 `clip` 区域。
+
+        结果进入提交者 `owner` 的队列；`token` 用于在 `collect(owner)` 的结果中识别这个任务。返回的 Future 可用于取消尚未开始的任务。
+        """
+        shm = self._allocate(clip, scale)
+        try:
+            future = self.run(_render_job, file_path, doc_id, page_no, tuple(clip), scale, rotation, shm.name)
+        except (BrokenProcessPool, RuntimeError):
+            release_shared_memory(shm)
+            raise
+        with self._results_lock:
+            self._results.setdefault(owner, queue.SimpleQueue())
+        future.add_done_callback(lambda future: self._deliver(owner, token, shm, future))
+        return future
+
+
+    def render(
+        self,
+        file_path: str,
+        doc_id: int,
+        page_no: int,
+        clip: fitz.Rect,
+        scale: float,
+        rotation: int = 0,
+    ) -> RenderResult:
+        """
+        与 `submit` 相同，但等待渲染完成并直接返回结果（用完后必须调用 `release`），出错时抛出异常。
+
+        供后台线程调用：等待期间不持有 GIL ，不影响 Tk 线程。
+        """
+        shm = self._allocate(clip, scale)
+        try:
+            (width, height, stride) = self.run(_render_job, file_path, doc_id, page_no, tuple(clip), scale, rotation, shm.name).result()
+        except BaseException as error:
+            release_shared_memory(shm)
+            if isinstance(error, BrokenProcessPool):
+                self.broken = True
+            raise
+        return RenderResult(shm, width, height, stride)
+
+
+    def _deliver(self, owner: Hashable, token: Hashable, shm: SharedMemory, future: Future) -> None:
+        """
+        任务完成（或被取消）时调用：把结果放入提交者 `owner` 的队列；提交者已调用 `discard` 时直接释放共享内存。
+        """
+        with self._results_lock:
+            results = self._results.get(owner)
+        if results is None:
+            release_shared_memory(shm)
+        else:
+            results.put((token, shm, future))
+
+
+    def collect(self, owner: Hashable) -> List[Tuple[Hashable, RenderResult | BaseException]]:
+        """
+        取出提交者 `owner` 所有已完成的任务，不阻塞。
+
+        返回 `[(token, 结果或异常), ...]` ；出错的任务的共享内存已被释放，被取消的任务不会出现在结果中。
+        """
+        results: List[Tuple[Hashable, RenderResult | BaseException]] = []
+        with self._results_lock:
+            pending = self._results.get(owner)
+        if pending is None:
+            return results
+        while True:
+            try:
+                (token, shm, future) = pending.get_nowait()
+            except queue.Empty:
+                break
+
+            if future.cancelled():
+                release_shared_memory(shm)
+                continue
+
+            error = future.exception()
+            if error is None:
+                (width, height, stride) = future.result()
+                results.append((token, RenderResult(shm, width, height, stride)))
+            else:
+                release_shared_memory(shm)
+                if isinstance(error, BrokenProcessPool):
+                    self.broken = True
+                results.append((token, error))
+        return results
+
+
+    def discard(self, owner: Hashable) -> None:
+        """
+        提交者 `owner` 不再需要结果：释放已完成的任务的共享内存，之后完成的任务的共享内存在完成时释放。
+        """
+        with self._results_lock:
+            pending = self._results.pop(owner, None)
+        while pending is not None:
+            try:
+                (_, shm, _) = pending.get_nowait()
+            except queue.Empty:
+                break
+            release_shared_memory(shm)
+
+
+    def shutdown(self) -> None:
+        """
+        关闭进程池。
+        """
+        self._executor.shutdown(wait = False, cancel_futures = True)
+
+
+
+# 各用途的渲染服务：{名称: 渲染服务}，所有标签页共用
+_render_farms: Dict[str, RenderFarm] = {}
+_render_farms_lock = threading.Lock()
+
+# 已崩溃或无法创建的渲染服务的名称，本次运行中不再创建，以免反复启动会崩溃的进程池
+_disabled_farms: Set[str] = set()
+
+
+def get_render_farm(processes: int, name: str = "render") -> RenderFarm | None:
+    """
+    获取名为 `name` 的全局多进程渲染服务，首次调用时创建。可以在任何线程中调用。
+
+    不同名称的渲染服务有各自的进程池：渲染可见图块的（"render"）不会被后台任务（"background"，见 `get_background_farm`）延误。
+
+    `processes` 不大于 0 时返回 None ，调用方应在进程内渲染。进程池创建失败或崩溃后，该名称的渲染服务被关闭，
+    本次运行中一直返回 None 。
+    """
+    if processes <= 0:
+        return None
+    with _render_farms_lock:
+        if name in _disabled_farms:
+            return None
+        farm = _render_farms.get(name)
+        if farm is not None and farm.broken:
+            print(f"in get_render_farm: {name} process pool is broken, disabled for the rest of the session")
+            farm.shutdown()
+            del _render_farms[name]
+            _disabled_farms.add(name)
+            return None
+        if farm is None:
+            try:
+                farm = _render_farms[name] = RenderFarm(processes)
+            except Exception as error:
+                print(f"in get_render_farm: {error.__class__.__name__}: {error}")
+                _disabled_farms.add(name)
+                return None
+        return farm
+
+
+def get_background_farm(processes: int) -> RenderFarm | None:
+    """
+    获取执行后台任务（预先渲染、缩略图、全文索引等）的多进程渲染服务，见 `get_render_farm` 。
+    """
+    return get_render_farm(processes, "background")
+
+
+def run_in_background(processes: int, function: Callable[..., T], *args: Any, fallback: Callable[[], T]) -> T:
+    """
+    供后台线程调用：在后台渲染服务的子进程中执行 `function(*args)` 并等待结果，等待期间不持有 GIL 。
+
+    `processes` 不大于 0 或进程池不可用（包括执行期间崩溃）时，改为在当前线程中调用 `fallback()` 。
+    """
+    farm = get_background_farm(processes)
+    if farm is None:
+        return fallback()
+    try:
+        future = farm.run(function, *args)
+    except (BrokenProcessPool, RuntimeError):
+        return fallback()
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        farm.broken = True
+        return fallback()
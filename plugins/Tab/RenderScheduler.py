@@ -0,0 +1,65 @@
+r"""
+渲染调度器：合并短时间内的多次渲染请求，并限制渲染帧率。
+"""
+
+from __future__ import annotations
+
+from math import ceil
+import time
+import tkinter as tk
+from typing import Callable
+
+
+class RenderScheduler:
+    """
+    渲染调度器。
+
+    调用 `request` 只是把视图标记为“待渲染”，真正的渲染在 Tk 空闲时进行（`after_idle`）；
+    若距上一帧还不到 `1 / fps` 秒，则推迟到下一帧（`after`）。一帧之内的多次请求只会触发一次渲染。
+    """
+
+    def __init__(self, widget: tk.Misc, callback: Callable[[], None], fps: float = 60):
+        self.widget  : tk.Misc = widget            # 用于调用 after / after_idle 的组件
+        self.callback: Callable[[], None] = callback # 每帧执行的渲染函数
+        self.fps     : float = fps                 # 帧率上限，不大于 0 表示不限制
+
+        self._after_id  : str | None = None
+        self._last_frame: float = 0.0
+
+
+    def request(self) -> None:
+        """
+        请求在下一帧渲染。
+        """
+        if self._after_id is not None:
+            return
+
+        delay = 0.0
+        if self.fps > 0:
+            delay = self._last_frame + 1 / self.fps - time.perf_counter()
+
+        if delay <= 0:
+            self._after_id = self.widget.after_idle(self._frame)
+        else:
+            self._after_id = self.widget.after(ceil(delay * 1000), self._frame)
+
+
+    def cancel(self) -> None:
+        """
+        取消尚未执行的渲染请求。
+        """
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except tk.TclError:
+                pass
+            self._after_id = None
+
+
+    def _frame(self) -> None:
+        """
+        执行一帧渲染。
+        """
+        self._after_id = None
+        self._last_frame = time.perf_counter()
+        self.callback()
@@ -0,0 +1,152 @@
+r"""
+渲染性能统计：记录渲染流水线各阶段的耗时，并计算最近若干次的 p50 / p95 / p99 。
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from math import ceil
+import time
+from typing import Deque, Dict, Tuple
+
+
+class _NullTimer:
+    """
+    统计关闭时使用的空计时器，不做任何事。
+    """
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+
+class _StageTimer:
+    """
+    一次计时：退出 `with` 语句块时，把耗时记入统计。
+    """
+
+    __slots__ = ("stats", "stage", "start")
+
+    def __init__(self, stats: RenderStats, stage: str):
+        self.stats: RenderStats = stats
+        self.stage: str = stage
+        self.start: float = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stats.record(self.stage, time.perf_counter() - self.start)
+
+
+
+class RenderStats:
+    """
+    渲染性能统计。
+
+    用法：
+
+    ```python
+    with render_stats.timer("get_pixmap"):
+        pix = ...
+    ```
+
+    每个阶段保留最近 `window` 次的耗时。`enabled` 为 False 时 `timer` 返回共用的空计时器，
+    开销只有一次属性读取和一次函数调用，因此计时代码可以一直保留在渲染流水线中。
+    """
+
+    # 渲染流水线的各个阶段，按在 HUD 中显示的顺序排列；未列出的阶段排在最后
+    STAGES: Tuple[str, ...] = (
+        "frame",          # 一帧（Tab.render）的总耗时
+        "layout",         # 计算页面布局
+        "page_load",      # 加载页面对象
+        "display_list",   # 获取（必要时解析）显示列表
+        "get_pixmap",     # 渲染像素图
+        "frombuffer",     # 把像素图读入 Pillow 图像
+        "convert_color",  # 转换颜色
+        "resize",         # 缩放图像
+        "photo",          # 创建 PhotoImage
+        "canvas",         # 更新画布
+    )
+
+    def __init__(self, window: int = 240, enabled: bool = False):
+        self.window : int = window    # 每个阶段保留最近几次的耗时
+        self.enabled: bool = enabled  # 是否记录耗时
+        self.hud    : bool = False    # 是否在画布上显示统计信息
+
+        # {阶段: 最近的耗时（单位：秒）}
+        self._samples: Dict[str, Deque[float]] = {}
+
+
+    def timer(self, stage: str) -> _StageTimer | _NullTimer:
+        """
+        返回为阶段 `stage` 计时的上下文管理器。
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, stage)
+
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        记录阶段 `stage` 的一次耗时。可以在后台线程中调用。
+        """
+        samples = self._samples.get(stage)
+        if samples is None:
+            samples = self._samples.setdefault(stage, deque(maxlen = self.window))
+        samples.append(seconds)
+
+
+    def percentiles(self, stage: str) -> Tuple[float, float, float]:
+        """
+        阶段 `stage` 最近的耗时的 (p50, p95, p99) （单位：毫秒）。没有记录时均为 0 。
+        """
+        samples = self._samples.get(stage)
+        if not samples:
+            return (0.0, 0.0, 0.0)
+        # 后台线程可能同时写入，先复制（deque.copy 不会被打断）
+        samples = sorted(samples.copy())
+        # 最近秩法
+        return tuple(samples[max(ceil(p * len(samples)) - 1, 0)] * 1000 for p in (0.5, 0.95, 0.99))
+
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        所有阶段的统计信息：{阶段: {"count": 次数, "p50": ..., "p95": ..., "p99": ...}} ，耗时单位为毫秒。
+        """
+        samples = self._samples.copy()
+        stages = [stage for stage in self.STAGES if stage in samples]
+        stages += sorted(stage for stage in samples if stage not in self.STAGES)
+        result = {}
+        for stage in stages:
+            (p50, p95, p99) = self.percentiles(stage)
+            result[stage] = {"count": len(samples[stage]), "p50": p50, "p95": p95, "p99": p99}
+        return result
+
+
+    def format(self) -> str:
+        """
+        统计信息的文本表格，用于 HUD 。
+        """
+        lines = [f"{'stage':<14}{'n':>5}{'p50':>8}{'p95':>8}{'p99':>8}  (ms)"]
+        for (stage, stat) in self.summary().items():
+            lines.append(f"{stage:<14}{stat['count']:>5}{stat['p50']:>8.2f}{stat['p95']:>8.2f}{stat['p99']:>8.2f}")
+        return "\n".join(lines)
+
+
+    def reset(self) -> None:
+        """
+        清空所有记录。
+        """
+        self._samples.clear()
+
+
+
+# 所有标签页共用的统计（渲染线程也记入其中）
+render_stats = RenderStats()
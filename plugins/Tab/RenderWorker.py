@@ -0,0 +1,244 @@
+r"""
+后台渲染线程：在空闲时预先渲染当前页附近的页面，存入标签页的渲染缓存。
+
+PyMuPDF 渲染期间一直持有 GIL ，因此线程把渲染交给后台渲染服务的子进程（见 `Tab.background_farm`），自己只等待结果和切分图块；
+渲染服务不可用时才在线程中渲染。
+"""
+
+from __future__ import annotations
+
+import heapq
+from itertools import count
+import threading
+from typing import Iterable, List, NamedTuple, Tuple, TYPE_CHECKING
+
+import fitz  # PyMuPDF
+
+from plugins.Tab.PageLayout import rotated_rect
+from plugins.Tab.RenderCache import RenderView, TileKey
+from plugins.Tab.TileStore import tile_checksum, tile_ppm
+
+if TYPE_CHECKING:
+    from plugins.Tab.Tab import Tab
+
+
+# 渲染任务：(优先级, 序号, 页码, 页面上要渲染的区域, 视图状态快照)
+RenderJob = Tuple[int, int, int, fitz.Rect, RenderView]
+
+
+
+class Revalidation(NamedTuple):
+    """
+    重新验证任务：重新渲染从磁盘图块缓存中读取的图块，检查它们是否与磁盘中的相同。
+    """
+    page_no: int  # 页码
+    tiles  : List[Tuple[TileKey, fitz.Rect, int]] # [(缓存键, 图块位置矩形, 磁盘中图块的校验和), ...]
+    view   : RenderView # 视图状态快照
+
+
+class RenderWorker:
+    """
+    后台渲染线程。
+
+    - 线程持有自己的 `fitz.Document` 对象，不与 Tk 线程共享文档；显示列表缓存是共用的，但按文档区分。
+    - 页面由后台渲染服务的子进程渲染，等待期间不持有 GIL ；渲染服务不可用时在线程中渲染。
+    - 任务按优先级（数字越小越优先）执行；每次调用 `schedule` 都会取消尚未执行的旧任务。
+    - Tk 线程渲染可见页面时会调用 `pause` ，此时线程不会开始新的任务，以免与可见页面争抢 CPU 。
+    - 重新验证任务（见 `revalidate`）的优先级最低，在没有预先渲染的任务时才执行，且不会被 `schedule` 取消。
+    """
+
+    def __init__(self, tab: Tab):
+        self.tab: Tab = tab
+
+        # 线程自己的文档对象及其对应的文档标识
+        self.doc: fitz.Document | None = None
+        self.doc_id: int = 0
+
+        self._queue: List[RenderJob] = []
+        self._revalidations: List[Revalidation] = []
+
+        # 重新验证时发现与磁盘中不同（已替换为重新渲染的结果）的图块数，由 Tk 线程读取并清零
+        self.stale_tiles: int = 0
+        self._sequence = count()
+        self._condition = threading.Condition()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._stopped = False
+        self._revalidating = False
+        self._thread: threading.Thread | None = None
+
+
+    @property
+    def revalidating(self) -> bool:
+        """
+        是否还有尚未完成的重新验证任务。
+        """
+        return bool(self._revalidations) or self._revalidating
+
+
+    def schedule(self, jobs: Iterable[Tuple[int, int, fitz.Rect]], view: RenderView) -> None:
+        """
+        取消尚未执行的任务，并提交新任务。
+
+        Params:
+
+        - `jobs`: `[(优先级, 页码, 页面上要渲染的区域), ...]`
+        - `view`: 渲染时的视图状态快照
+        """
+        with self._condition:
+            self._queue.clear()
+            for (priority, page_no, page_rect) in jobs:
+                heapq.heappush(self._queue, (priority, next(self._sequence), page_no, page_rect, view))
+            self._condition.notify()
+        self.start()
+
+
+    def revalidate(self, page_no: int, tiles: List[Tuple[TileKey, fitz.Rect, int]], view: RenderView) -> None:
+        """
+        提交重新验证任务：在空闲时重新渲染第 `page_no` 页的图块 `tiles` = [(缓存键, 图块位置矩形, 磁盘中图块的校验和), ...] ，
+        结果与磁盘中的不同时，用新的结果替换缓存中的图块，并增加 `stale_tiles` 。
+        """
+        with self._condition:
+            self._revalidations.append(Revalidation(page_no, tiles, view))
+            self._condition.notify()
+        self.start()
+
+
+    def pause(self) -> None:
+        """
+        暂停：线程执行完当前任务后，在 `resume` 被调用之前不再开始新任务。
+        """
+        self._idle.clear()
+
+
+    def resume(self) -> None:
+        """
+        恢复执行任务。
+        """
+        self._idle.set()
+
+
+    def start(self) -> None:
+        """
+        启动后台线程（若尚未启动）。
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target = self._run, daemon = True)
+            self._thread.start()
+
+
+    def stop(self) -> None:
+        """
+        停止后台线程，并关闭线程自己的文档对象。
+        """
+        with self._condition:
+            self._stopped = True
+            self._queue.clear()
+            self._revalidations.clear()
+            self._condition.notify()
+        self._idle.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout = 2)
+        self._thread = None
+
+
+    def _next_job(self) -> RenderJob | Revalidation | None:
+        """
+        取出下一个任务（预先渲染的任务优先），没有任务时阻塞等待。线程被停止时返回 None 。
+        """
+        with self._condition:
+            self._revalidating = False
+            while not self._queue and not self._revalidations and not self._stopped:
+                self._condition.wait()
+            if self._stopped:
+                return None
+            if self._queue:
+                return heapq.heappop(self._queue)
+            self._revalidating = True
+            return self._revalidations.pop(0)
+
+
+    def _open_document(self, view: RenderView) -> fitz.Document:
+        """
+        获取与视图状态 `view` 对应的文档对象，文档已被重新打开时重新打开。
+        """
+        if self.doc is None or self.doc_id != view.doc_id:
+            if self.doc is not None:
+                self.tab.display_lists.discard_document(self.doc)
+                self.doc.close()
+            self.doc = fitz.open(self.tab.file_path)
+            self.doc_id = view.doc_id
+        return self.doc
+
+
+    def _revalidate(self, job: Revalidation) -> None:
+        """
+        执行重新验证任务。只有与磁盘中不同的图块才重新写入磁盘。
+        """
+        doc = self._open_document(job.view)
+        if not 0 <= job.page_no < len(doc):
+            return
+        cache = self.tab.render_cache
+        old_tiles = {key: cache.get(key) for (key, _, _) in job.tiles}
+        fresh = self.tab.render_missing_tiles(
+            doc[job.page_no], [(key, tile_rect) for (key, tile_rect, _) in job.tiles], job.view,
+            save = False, farm = self.tab.background_farm,
+        )
+        stale: List[Tuple[TileKey, bytes]] = []
+        for ((key, _, checksum), (_, tile)) in zip(job.tiles, fresh):
+            ppm = tile_ppm(tile)
+            old_tile = old_tiles[key]
+            if ppm is not None and tile_checksum(ppm) == checksum and old_tile is not None:
+                # 与磁盘中的相同：换回原来的图块，保留已转换的 PhotoImage
+                cache.put(key, old_tile)
+            else:
+                self.stale_tiles += 1
+                if ppm is not None:
+                    stale.append((key, ppm))
+        prefix = self.tab.tile_store_prefix
+        if stale and prefix is not None:
+            self.tab.tile_store.save_many(prefix, stale)
+
+
+    def _run(self) -> None:
+        """
+        线程主循环。
+        """
+        while True:
+            job = self._next_job()
+            if job is None:
+                break
+
+            # 可见页面优先
+            self._idle.wait()
+            if self._stopped:
+                break
+
+            if isinstance(job, Revalidation):
+                try:
+                    self._revalidate(job)
+                except Exception as error:
+                    print(f"in RenderWorker._run: page {job.page_no}: {error.__class__.__name__}: {error}")
+                continue
+
+            (_, _, page_no, page_rect, view) = job
+            try:
+                doc = self._open_document(view)
+                if not 0 <= page_no < len(doc):
+                    continue
+                page = doc[page_no]
+                page_rect = page_rect & rotated_rect(page.rect, view.rotation)
+                if not page_rect.is_empty:
+                    farm = self.tab.background_farm
+                    # 预览图很小，先渲染它，翻页后渐进式渲染的第一遍可以直接使用
+                    if view.zoom > self.tab.preview_zoom:
+                        self.tab.page_preview(page, view, farm)
+                    self.tab.render_page_tiles(page, page_rect, view, farm)
+            except Exception as error:
+                print(f"in RenderWorker._run: page {page_no}: {error.__class__.__name__}: {error}")
+
+        if self.doc is not None:
+            self.tab.display_lists.discard_document(self.doc)
+            self.doc.close()
+            self.doc = None
@@ -27,21 +27,25 @@ class DragPlugin(Plugin):
 
 - name: DragPlugin
 - author: Little Liu
-- hotkeys: `鼠标拖动`
+- hotkeys: `鼠标拖动`, `双击`
 - menu entrance: None
 
 ## Function
 
 绑定鼠标拖动事件到当前活跃 canvas。
-判断拖动起点是否落在文字上：
-- 若是，视为划词，绘制选择区域
+判断拖动起点是否落在文字上（查询 `context.hit_test_text` ，页面文字只提取一次）：
+- 若是，视为划词：按阅读顺序选中从起点到鼠标所在字符之间的文字（可跨行、跨栏、跨页），拖动时只更新有变化的高亮
 - 否则，视为拖动页面
 
+双击选中一个词，双击后拖动则按词扩展选择。
+
 当接近窗口边缘时，还要滚动。
 
+选择由标签页的 `TextSelection` （`plugins/Tab/TextSelection.py`）管理。
+
 ## Api
 
-- `context.get_selected_text(format=None, **kwargs)` - 获得选中区域内的文字
+- `context.get_selected_text()` - 获得选中的文字
 
 ## Depend
 
@@ -55,65 +59,22 @@ Other plugins:
     hotkeys = []
 
     @staticmethod
-    def get_selected_text(access: ReaderAccess, format=None, **kwargs) -> str:
+    def get_selected_text(access: ReaderAccess) -> str:
         """
-        获取选中区域的文字
+        获取选中的文字
         """
         current_tab = access.get_current_tab()
-        if current_tab is None or not hasattr(current_tab, '_drag_selection_rect'):
-            return ""
-        
-        selection_rect = current_tab._drag_selection_rect
-        if not selection_rect:
+        if current_tab is None or not current_tab.doc:
             return ""
-        
-        # 【修改】设置默认格式为 "text"
-        if format is None:
-            format = "text"
-        
-        # 转换画布坐标到 PDF 坐标（考虑滚动）
-        x_view_start, _ = current_tab.canvas.xview()
-        y_view_start, _ = current_tab.canvas.yview()
-        
-        page_rect = current_tab.page.rect
-        pdf_x1 = (selection_rect[0] / current_tab.zoom) + page_rect.width * x_view_start
-        pdf_y1 = (selection_rect[1] / current_tab.zoom) + page_rect.height * y_view_start
-        pdf_x2 = (selection_rect[2] / current_tab.zoom) + page_rect.width * x_view_start
-        pdf_y2 = (selection_rect[3] / current_tab.zoom) + page_rect.height * y_view_start
-        
-        pdf_rect = fitz.Rect(pdf_x1, pdf_y1, pdf_x2, pdf_y2)
-        
-        # 获取文字
-        return current_tab.page.get_text(format, clip=pdf_rect, **kwargs)
+        return current_tab.selection.text
 
     @staticmethod
-    def _is_on_text(tab, canvas_x, canvas_y) -> bool:
+    def _is_on_text(access: ReaderAccess, canvas_x, canvas_y) -> bool:
         """
-        判断画布坐标 (canvas_x, canvas_y) 是否落在文字上
+        判断画布坐标 (canvas_x, canvas_y) 是否落在文字块上
         """
         try:
-            text_dict = tab.page.get_text("dict")
-            blocks = text_dict.get("blocks", [])
-            
-            # 获取滚动偏移
-            x_view_start, _ = tab.canvas.xview()
-            y_view_start, _ = tab.canvas.yview()
-            
-            page_rect = tab.page.rect
-            
-            # 转换画布坐标到 PDF 坐标（考虑滚动）
-            pdf_x = (canvas_x / tab.zoom) + page_rect.width * x_view_start
-            pdf_y = (canvas_y / tab.zoom) + page_rect.height * y_view_start
-            
-            for block in blocks:
-                if block.get("type") == 0:  # 文本块
-                    bbox = block.get("bbox")
-                    if bbox:
-                        x0, y0, x1, y1 = bbox
-                        if x0 <= pdf_x <= x1 and y0 <= pdf_y <= y1:
-                            return True
-            
-            return False
+            return access.hit_test_text((canvas_x, canvas_y), "block") is not None
         except Exception:
             return False
 
@@ -128,15 +89,16 @@ Other plugins:
         
         canvas = current_tab.canvas
         
+        selection = current_tab.selection
+
         # 初始化拖动状态
         if not hasattr(current_tab, '_drag_state'):
             current_tab._drag_state = {
                 "start": None,
                 "is_text_selection": False,
-                "selection_rect": None,
-                "canvas_id": None,
+                "anchor": None,
+                "by_word": False,
             }
-            current_tab._drag_selection_rect = None
         
         state = current_tab._drag_state
         
@@ -145,16 +107,31 @@ Other plugins:
             if event.state & 0x4:
                 return
             
-            # 【新增】左键按下时清除之前的划词选框
-            if state["is_text_selection"] and state["canvas_id"] is not None:
-                canvas.delete(state["canvas_id"])
-                state["canvas_id"] = None
-                state["selection_rect"] = None
-                current_tab._drag_selection_rect = None
+            # 【新增】左键按下时清除之前的选择
+            selection.clear()
             
             state["start"] = (event.x, event.y)
+            state["by_word"] = False
             # 判断是否在文字上
-            state["is_text_selection"] = DragPlugin._is_on_text(current_tab, event.x, event.y)
+            state["is_text_selection"] = DragPlugin._is_on_text(access, event.x, event.y)
+            state["anchor"] = selection.caret_at((event.x, event.y)) if state["is_text_selection"] else None
+            if state["anchor"] is None:
+                state["is_text_selection"] = False
+        
+        def on_double_click(event):
+            if event.state & 0x4:
+                return
+            
+            # 双击选词，之后拖动时按词扩展
+            found = access.hit_test_text((event.x, event.y), "word")
+            if found is None:
+                return
+            (page_text, word) = found
+            selection.select_word(page_text.page_no, word)
+            state["start"] = (event.x, event.y)
+            state["is_text_selection"] = True
+            state["anchor"] = (page_text.page_no, page_text.words[word].start)
+            state["by_word"] = True
         
         def on_mouse_drag(event):
             # 【修改】检查是否有 Ctrl 键，有则忽略
@@ -168,20 +145,10 @@ Other plugins:
             x2, y2 = event.x, event.y
             
             if state["is_text_selection"]:
-                # 划词模式：绘制选择区域
-                if state["canvas_id"] is not None:
-                    canvas.delete(state["canvas_id"])
-                
-                state["canvas_id"] = canvas.create_rectangle(
-                    x1, y1, x2, y2,
-                    outline="green",
-                    width=2,
-                    fill="lightgreen",
-                    stipple="gray50"
-                )
-                
-                state["selection_rect"] = (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
-                current_tab._drag_selection_rect = state["selection_rect"]
+                # 划词模式：选中从起点到鼠标所在字符之间的文字，只更新有变化的高亮
+                focus = selection.caret_at((x2, y2))
+                if focus is not None:
+                    selection.select_range(state["anchor"], focus, by_word = state["by_word"])
                 
                 # 检查边缘滚动
                 _check_edge_scroll(canvas, event.x, event.y, current_tab)
@@ -200,22 +167,12 @@ Other plugins:
             if event.state & 0x4:
                 return
             
-            if state["start"] is None:
-                return
-            
+            # 选中的文字由 selection 保存，在需要时才生成
             state["start"] = None
-            
-            # 【修改】如果是划词模式，只保存文字，不清除选框
-            if state["is_text_selection"] and state["canvas_id"] is not None and state["selection_rect"] is not None:
-                # 获取选中的文字
-                text = DragPlugin.get_selected_text(access)
-                
-                if text.strip():
-                    # 保存选中文字供其他插件使用
-                    current_tab._selected_text = text
         
         # 绑定事件
         canvas.bind("<Button-1>", on_mouse_down)
+        canvas.bind("<Double-Button-1>", on_double_click)
         canvas.bind("<B1-Motion>", on_mouse_drag)
         canvas.bind("<ButtonRelease-1>", on_mouse_up)
     
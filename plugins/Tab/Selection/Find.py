@@ -0,0 +1,158 @@
+"""
+在文档中查找文字。
+"""
+
+import os
+from typing import Dict, Tuple, override
+
+from glueous_plugin import Plugin
+
+from plugins.Tab.DiskCache import get_disk_cache
+from plugins.Tab.FindPanel import FindPanel
+from plugins.Tab.FullTextIndex import DocumentIndex, DocumentIndexer
+
+
+class FindPlugin(Plugin):
+    """
+    查找插件：在标签页右侧显示查找面板，查询在后台建立的全文索引。
+    """
+
+    # 插件信息
+    name = "FindPlugin"
+    description = """
+# FindPlugin
+
+- name: FindPlugin
+- author: Jerry
+- hotkeys: `Ctrl+F`
+- menu entrance: `选择 → 查找`
+
+## Function
+
+Show a find panel on the right side of the current tab. Type to search the document: words are matched as a phrase, and the last word also matches as a prefix while typing (end the query with a space to match it exactly). Click a result to jump to it; press Enter to jump to the next result. Results on the visible pages are marked on the canvas. Press Escape in the search box to close the panel.
+
+Searching uses a full-text inverted index of the document (term → page → word positions and boxes), built page by page by a background thread the first time the document is searched. The text is extracted in `background_processes` worker processes, so indexing does not make the window stutter (0 extracts it in the background thread). Pages already indexed can be searched right away, and the results are updated as indexing goes on.
+
+The extracted words of each page are saved in `fulltext.sqlite3` in the `cache_directory`, keyed by the document's content fingerprint, so reopening a document loads its index without extracting the text again. The file is limited to `fulltext_cache_size` bytes (least recently used pages are dropped). At most `find_max_results` results are listed.
+
+## Api
+
+- `context.get_document_index()`: The full-text index (`DocumentIndex` in `plugins/Tab/FullTextIndex.py`) of the current tab's document, starting to build it in the background if needed. `index.search(query, prefix = False)` returns the hits on the pages indexed so far; `index.complete` tells whether all pages are indexed. Returns None if no document is open.
+
+## Depend
+
+Python extension library:
+- fitz (PyMuPDF)
+
+Other plugins:
+- TabPlugin
+
+## Others
+
+See `FindPanel` in `plugins/Tab/FindPanel.py` and `DocumentIndexer` in `plugins/Tab/FullTextIndex.py`.
+"""
+
+    # 快捷键设置
+    hotkeys = ["<Control-f>"]
+
+
+    @override
+    def loaded(self) -> None:
+        """
+        注册菜单项和接口。
+        """
+        # 各标签页的索引线程：{id(标签页): (文档标识, 索引线程)}
+        self.indexers: Dict[int, Tuple[int, DocumentIndexer]] = {}
+
+        # 各标签页的查找面板：{id(标签页): 面板}
+        self.panels: Dict[int, FindPanel] = {}
+
+        self.context.add_menu_command(
+            path = ["选择"],
+            label = "查找",
+            command = self.run,
+            accelerator = "Ctrl+F",
+        )
+        self.context.get_document_index = self.get_document_index
+
+
+    @override
+    def run(self) -> None:
+        """
+        显示当前标签页的查找面板（已显示时聚焦到查找框）。
+        """
+        tab = self.context.get_current_tab()
+        if tab is None or not tab.doc:
+            return
+        panel = self.panels.get(id(tab))
+        if panel is None:
+            panel = FindPanel(tab, self.get_indexer(tab), self.context.get_setting("find_max_results", 1000))
+            self.panels[id(tab)] = panel
+            panel.entry.bind("<Escape>", lambda event: self.close_panel(tab))
+            tab.paned.add(panel.frame, weight = 0)
+        panel.entry.focus_set()
+        panel.entry.select_range(0, "end")
+
+
+    def get_indexer(self, tab) -> DocumentIndexer:
+        """
+        标签页 `tab` 当前文档的索引线程，没有时创建。
+        """
+        entry = self.indexers.get(id(tab))
+        if entry is not None and entry[0] == tab.doc_id:
+            return entry[1]
+        if entry is None:
+            tab.add_close_callback(lambda: self.close_tab(tab))
+        else:
+            # 文档已重新打开，原来的索引和面板作废
+            entry[1].stop()
+            self.close_panel(tab)
+        cache = get_disk_cache(
+            os.path.join(self.context.get_setting("cache_directory", "./config/cache"), "fulltext.sqlite3"),
+            self.context.get_setting("fulltext_cache_size", 256 * 1024 * 1024),
+        )
+        indexer = DocumentIndexer(
+            tab.file_path,
+            tab.fingerprint,
+            tab.total_pages,
+            cache,
+            doc_id = tab.doc_id,
+            processes = self.context.get_setting("background_processes", 1),
+        )
+        self.indexers[id(tab)] = (tab.doc_id, indexer)
+        return indexer
+
+
+    def get_document_index(self) -> DocumentIndex | None:
+        """
+        当前标签页文档的全文索引，没有打开文档时返回 None 。
+        """
+        tab = self.context.get_current_tab()
+        if tab is None or not tab.doc:
+            return None
+        return self.get_indexer(tab).index
+
+
+    def close_panel(self, tab) -> None:
+        """
+        关闭标签页 `tab` 的查找面板（若有）。
+        """
+        panel = self.panels.pop(id(tab), None)
+        if panel is not None:
+            tab.paned.forget(panel.frame)
+            panel.close()
+
+
+    def close_tab(self, tab) -> None:
+        """
+        关闭标签页时：关闭查找面板，停止建立索引。
+        """
+        self.close_panel(tab)
+        entry = self.indexers.pop(id(tab), None)
+        if entry is not None:
+            entry[1].stop()
+
+
+    @override
+    def unloaded(self) -> None:
+        pass
@@ -31,12 +31,14 @@ class SelectPlugin(Plugin):
 ## Function
 
 绑定 Ctrl+鼠标拖动 事件到当前活跃 canvas。
-当发生该事件时，在画布上绘制一个半透明的选择区域（矩形）。
+当发生该事件时，在画布上绘制一个半透明的选择区域（矩形），并选中起点所在页面上与该区域相交的文字（每行一段，按阅读顺序）。
 当接近窗口边缘时，还要滚动。
 
+选择由标签页的 `TextSelection` （`plugins/Tab/TextSelection.py`）管理，与划词共用。
+
 ## Api
 
-- `context.get_selected_text(format=None, **kwargs)` - 获得选中区域内的文字
+- `context.get_selected_text()` - 获得选中的文字
 
 ## Depend
 
@@ -50,34 +52,14 @@ Other plugins:
     hotkeys = []
 
     @staticmethod
-    def get_selected_text(access: ReaderAccess, format=None, **kwargs) -> str:
+    def get_selected_text(access: ReaderAccess) -> str:
         """
-        获取选中区域的文字
+        获取选中的文字
         """
         current_tab = access.get_current_tab()
-        if current_tab is None or not hasattr(current_tab, '_selection_rect'):
-            return ""
-        
-        selection_rect = current_tab._selection_rect
-        if not selection_rect:
+        if current_tab is None or not current_tab.doc:
             return ""
-        
-        if format is None:
-            format = "text"
-        
-        # 转换画布坐标到 PDF 坐标（考虑滚动）
-        x_view_start, _ = current_tab.canvas.xview()
-        y_view_start, _ = current_tab.canvas.yview()
-        
-        page_rect = current_tab.page.rect
-        pdf_x1 = (selection_rect[0] / current_tab.zoom) + page_rect.width * x_view_start
-        pdf_y1 = (selection_rect[1] / current_tab.zoom) + page_rect.height * y_view_start
-        pdf_x2 = (selection_rect[2] / current_tab.zoom) + page_rect.width * x_view_start
-        pdf_y2 = (selection_rect[3] / current_tab.zoom) + page_rect.height * y_view_start
-        
-        pdf_rect = fitz.Rect(pdf_x1, pdf_y1, pdf_x2, pdf_y2)
-        
-        return current_tab.page.get_text(format, clip=pdf_rect, **kwargs)
+        return current_tab.selection.text
 
     @staticmethod
     def setup_select_event(access: ReaderAccess) -> None:
@@ -89,38 +71,39 @@ Other plugins:
             return
         
         canvas = current_tab.canvas
+        selection = current_tab.selection
         
         # 初始化选择状态
         if not hasattr(current_tab, '_selection_state'):
             current_tab._selection_state = {
                 "ctrl_start": None,
-                "rect": None,
+                "page_no": None,
                 "canvas_id": None,
             }
-            current_tab._selection_rect = None
         
         state = current_tab._selection_state
         
         def on_button_press(event):
             """处理普通左键按下 - 清除选框"""
             if not (event.state & 0x4):  # 不是 Ctrl+左键
+                selection.clear()
                 if state["canvas_id"] is not None:
                     canvas.delete(state["canvas_id"])
                     state["canvas_id"] = None
-                    state["rect"] = None
-                    current_tab._selection_rect = None
                     state["ctrl_start"] = None
         
         def on_ctrl_button_press(event):
             """Ctrl+左键按下 - 开始选择"""
             # 清除之前的选框
+            selection.clear()
             if state["canvas_id"] is not None:
                 canvas.delete(state["canvas_id"])
                 state["canvas_id"] = None
-                state["rect"] = None
-                current_tab._selection_rect = None
             
             state["ctrl_start"] = (event.x, event.y)
+            # 只选择起点所在页面上的文字
+            found = current_tab.page_point((event.x, event.y))
+            state["page_no"] = None if found is None else found[0]
         
         def on_ctrl_button_drag(event):
             """Ctrl+拖动 - 绘制选框"""
@@ -136,32 +119,25 @@ Other plugins:
             
             # 绘制新选框
             state["canvas_id"] = canvas.create_rectangle(
-                x1, y1, x2, y2,
+                canvas.canvasx(x1), canvas.canvasy(y1), canvas.canvasx(x2), canvas.canvasy(y2),
                 outline="blue",
                 width=2,
                 fill="lightblue",
-                stipple="gray50"
+                stipple="gray50",
+                tags=current_tab.layers.overlay_tags("selection")
             )
             
-            state["rect"] = (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
-            current_tab._selection_rect = state["rect"]
+            # 选中该区域内的文字
+            if state["page_no"] is not None:
+                rect = fitz.Rect(canvas.canvasx(x1), canvas.canvasy(y1), canvas.canvasx(x2), canvas.canvasy(y2)).normalize()
+                selection.select_area(state["page_no"], rect * ~current_tab.page_matrix(state["page_no"]))
             
             # 检查边缘滚动
             _check_edge_scroll(canvas, event.x, event.y, current_tab)
         
         def on_ctrl_button_release(event):
-            """Ctrl+释放 - 保存文字"""
-            if state["ctrl_start"] is None:
-                return
-            
+            """Ctrl+释放 - 结束选择（不清除选框，选中的文字由 selection 保存）"""
             state["ctrl_start"] = None
-            
-            # 只保存选中文字，不清除选框
-            if state["canvas_id"] is not None and state["rect"] is not None:
-                text = SelectPlugin.get_selected_text(access)
-                
-                if text.strip():
-                    current_tab._selected_text = text
         
         # 【修改】绑定专用的 Ctrl 组合键事件
         canvas.bind("<Button-1>", on_button_press)
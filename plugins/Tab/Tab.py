@@ -1,21 +1,46 @@
 from __future__ import annotations
 
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future
+from itertools import count
 from math import ceil
 import tkinter as tk
 from tkinter import messagebox, ttk
 import os
-from typing import Any, List, Tuple, override
+from typing import Any, Callable, Dict, Iterable, List, Tuple, override
 from types import MethodType
 
 from PIL import Image, ImageTk
 import fitz  # PyMuPDF
 
-from plugins.Tab.FileState import FileState
+from plugins.Tab.CanvasLayers import CanvasLayers
+from plugins.Tab.ColorTheme import ColorTheme
+from plugins.Tab.DiskCache import file_fingerprint
+from plugins.Tab.DisplayListCache import DisplayListCache
+from plugins.Tab.FileState import DisplayMode, FileState
+from plugins.Tab.MemoryGovernor import memory_governor
+from plugins.Tab.PageLayout import PageLayout, render_transform, rotate_size, rotated_rect, rotation_matrix
+from plugins.Tab.RenderCache import RenderCache, RenderView, samples_to_ppm, Tile, TileKey
+from plugins.Tab.RenderFarm import get_background_farm, get_render_farm, RenderFarm
+from plugins.Tab.RenderScheduler import RenderScheduler
+from plugins.Tab.RenderStats import render_stats
+from plugins.Tab.RenderWorker import RenderWorker
+from plugins.Tab.TextIndex import PageText, TextIndex
+from plugins.Tab.TextSelection import TextSelection
+from plugins.Tab.TileStore import get_tile_store, tile_checksum, tile_ppm, TileStore
 
 from glueous import ReaderAccess
 from glueous_plugin import Plugin
 
 
+# 为每次打开的文档分配唯一标识，用作渲染缓存键的一部分
+_doc_ids = count(1)
+
+# 为提交给多进程渲染服务的任务分配唯一标识
+_farm_job_ids = count(1)
+
+
 
 class Tab:
     """
@@ -26,9 +51,26 @@ class Tab:
 
     CANVAS_CONTEXT_NAME: str = "tab canvas"
 
+    # 轮询多进程渲染结果的间隔（单位：毫秒）
+    FARM_POLL_INTERVAL: int = 15
+
+    # 轮询重新验证磁盘图块结果的间隔（单位：毫秒）
+    REVALIDATE_POLL_INTERVAL: int = 100
+
+    # 最多缓存几个页面布局
+    MAX_CACHED_LAYOUTS: int = 8
+
+    # 最多缓存几个页面对象
+    MAX_CACHED_PAGES: int = 16
+
     #### Magic Methods ####
 
-    def __init__(self, context: ReaderAccess, file_path: str = None):
+    def __init__(self, context: ReaderAccess, file_path: str = None, lazy: bool = False):
+        """
+        创建标签页并打开文件 `file_path` 。
+
+        `lazy` 为 True 时只创建标签页，不打开文档（占位标签页），第一次切换到该标签页时才打开并渲染，见 `activate` 。
+        """
         self.context = context
 
         # 与父容器建立关联
@@ -47,14 +89,91 @@ class Tab:
             # 找遍了也没找到
             self.state = FileState(file_path).to_json()
             file_states.insert(0, self.state)
-        self.doc = None  # PyMuPDF文档对象
+        self.init_render_state()
+
+        # 每帧渲染后更新覆盖层的函数，见 add_overlay_painter
+        self._overlay_painters: List[Callable[[], None]] = []
+
+        # 选中的文字，见 TextSelection
+        self.selection = TextSelection(self)
+        self.add_overlay_painter(self.selection.draw)
+
+        # 检查重新验证结果的定时任务，见 revalidate_restored_tiles
+        self._revalidate_poll_id = None
+
+        # 后台渲染线程，预先渲染附近的页面
+        self.render_worker = RenderWorker(self)
+
+        # 上一次渲染时画布的视图范围 (xview, yview)
+        self._rendered_view = None
+
+        # 渐进式渲染中，尚未执行的第二遍渲染
+        self._refine_id = None
+
+        # 缩放手势结束（一段时间内没有继续缩放）后的清晰渲染，见 zoom_gesture
+        self._zoom_gesture_id = None
+
+        # 已提交给多进程渲染服务、尚未取回的图块：{缓存键: (任务标识, Future, 图块位置矩形, 视图状态快照)}
+        self._farm_jobs: Dict[TileKey, Tuple[int, Future, fitz.Rect, RenderView]] = {}
+        self._farm_poll_id = None
+
+        # 关闭标签页时要调用的函数，见 add_close_callback
+        self._close_callbacks: List[Callable[[], None]] = []
 
-        self.tk_images = []
         # 创建标签页内的UI组件
         self.create_widgets()
 
-        # 打开文件
-        self.open()
+        # 占位标签页在第一次被激活前不打开文档
+        self.pending_open: bool = lazy
+        if lazy:
+            self.notebook.tab(self.frame, text = os.path.basename(self.file_path))
+            # 由全局内存管理器统一限制所有标签页的内存占用；打开文档的标签页在打开成功后登记（见 open）
+            memory_governor.register(self)
+        else:
+            self.open()
+
+
+    def init_render_state(self) -> None:
+        """
+        初始化文档和渲染相关的状态（文档、页面尺寸、布局和各项缓存），不涉及界面组件。
+
+        创建标签页时调用；没有界面组件的子类（如基准测试中的 `HeadlessTab`）也使用它。
+        """
+        self.doc = None  # PyMuPDF文档对象
+        self.doc_id = 0  # 文档标识，每次打开文档时重新分配
+
+        # 所有页面的宽度、高度（未经 `rotation` 旋转），打开文档时读取
+        self._page_widths : array = array("d")
+        self._page_heights: array = array("d")
+
+        # 最近使用的页面对象，最近使用的排在最后
+        self._pages: OrderedDict[int, fitz.Page] = OrderedDict()
+
+        # 各页面中图片的位置（未旋转的页面坐标），按颜色主题转换颜色时使用：{页码: [位置矩形, ...]}
+        self._image_rects: Dict[int, List[fitz.Rect]] = {}
+
+        # 页面布局的缓存：{(视图模式, 是否从右到左, 旋转角度, 页面间隔, 布局的第一页): 布局}，最近使用的排在最后
+        self._layouts: Dict[Tuple[str, bool, int, float, int], PageLayout] = {}
+
+        # 已渲染图块的缓存
+        self.render_cache = RenderCache(self.context.get_setting("render_cache_size", 256 * 1024 * 1024))
+
+        # 最近浏览的页面的显示列表，重新渲染时无需再次解析页面内容
+        self.display_lists = DisplayListCache(self.context.get_setting("display_list_cache_pages", 16))
+
+        # 最近查询过的页面的文字布局及其空间索引，划词等操作直接查询，无需再次提取文字
+        self.text_index = TextIndex(self.context.get_setting("text_index_pages", 32))
+
+        # 磁盘图块缓存（可选，见设置 `disk_tile_cache`），及本文档的图块在其中的键前缀，打开文档时设置
+        self.tile_store: TileStore | None = None
+        self._tile_prefix: str | None = None
+
+        # 打开文档后的第一帧中从磁盘读取的图块：{缓存键: (图块位置矩形, 校验和, 视图状态快照)}，第一帧渲染完成后交给后台线程重新验证
+        self._restored: Dict[TileKey, Tuple[fitz.Rect, int, RenderView]] = {}
+        self._collect_restored = False
+
+        # 视图区域是否有待同步的修改（见 update_view_region）
+        self._view_region_dirty = False
 
 
     def __del__(self):
@@ -99,12 +218,53 @@ class Tab:
         return self.state["display_mode"]
 
     @display_mode.setter
-    def display_mode(self, mode: str) -> None:
-        if mode not in FileState.DISPLAY_MODES:
-            raise ValueError(f"Invalid display mode: {mode}. Must in {FileState.DISPLAY_MODES}")
-        self.state["display_mode"] = mode
+    def display_mode(self, mode: str | DisplayMode) -> None:
+        try:
+            mode = DisplayMode(mode)
+        except ValueError:
+            raise ValueError(f"Invalid display mode: {mode}. Must in {FileState.DISPLAY_MODES}") from None
+        # 与 FileState.to_json 一致，保存为字符串
+        self.state["display_mode"] = mode.value
         self.update_view_region()
-        self.render()
+
+
+    @property
+    def display_r2l(self) -> bool:
+        """
+        双页、书本视图中是否从右到左排列页面。
+        """
+        return self.state["display_r2l"]
+
+    @display_r2l.setter
+    def display_r2l(self, r2l: bool) -> None:
+        self.state["display_r2l"] = bool(r2l)
+        self.update_view_region()
+
+
+    @property
+    def show_toc(self) -> bool:
+        """
+        是否显示左侧面板（缩略图，见 ThumbnailPlugin）。
+        """
+        return self.state["show_toc"]
+
+    @show_toc.setter
+    def show_toc(self, show: bool) -> None:
+        self.state["show_toc"] = bool(show)
+
+
+    @property
+    def sidebar_dx(self) -> int:
+        """
+        左侧面板的宽度（单位：屏幕像素）。
+        """
+        return self.state["sidebar_dx"]
+
+    @sidebar_dx.setter
+    def sidebar_dx(self, width: int) -> None:
+        if width < 0:
+            raise ValueError(f"Sidebar width cannot be negative, got {width}")
+        self.state["sidebar_dx"] = int(width)
 
 
     @property
@@ -119,7 +279,6 @@ class Tab:
         self.state["scroll_pos"] = pos
         # 更新画布滚动位置
         self.update_view_region()
-        self.render()
 
 
     @property
@@ -133,9 +292,11 @@ class Tab:
     def page_no(self, page_no: int) -> None:
         if not 0 <= page_no < self.total_pages:
             raise ValueError(f"Page number out of range: {page_no} (total pages: {self.total_pages})")
+        changed = page_no != self.state["page_no"]
         self.state["page_no"] = page_no
         self.update_view_region()
-        self.render()
+        if changed:
+            self._notify_page_changed()
 
 
     @property
@@ -153,7 +314,6 @@ class Tab:
 
         # 更新滚动区域
         self.update_view_region()
-        self.render()
 
 
     @property
@@ -169,11 +329,28 @@ class Tab:
             raise ValueError(f"Invalid rotation angle: {angle}. Must in {FileState.ROTATIONS}.")
         self.state["rotation"] = angle
         self.update_view_region()
-        self.render()
 
 
     #### Other Data Descriptors ####
 
+    @property
+    def fingerprint(self) -> str:
+        """
+        文件内容的指纹（见 `file_fingerprint`），用作磁盘缓存的键。
+        """
+        return file_fingerprint(self.file_path)
+
+
+    @property
+    def tile_store_prefix(self) -> str | None:
+        """
+        本文档的图块在磁盘图块缓存中的键前缀。未启用磁盘图块缓存或文档有未保存的修改（磁盘上的文件与显示的内容不同）时为 None 。
+        """
+        if self.tile_store is None or not self.doc or self.doc.is_dirty:
+            return None
+        return self._tile_prefix
+
+
     @property
     def dpi(self) -> int:
         """
@@ -182,6 +359,42 @@ class Tab:
         return self.context.get_setting("dpi", 72)
 
 
+    @property
+    def tile_size(self) -> int:
+        """
+        渲染图块的边长（单位：画布像素）。
+        """
+        return self.context.get_setting("render_tile_size", 512)
+
+
+    @property
+    def preview_zoom(self) -> float:
+        """
+        渐进式渲染中整页预览图的缩放比例。
+        """
+        return self.context.get_setting("preview_zoom", 0.5)
+
+
+    @property
+    def render_view(self) -> RenderView:
+        """
+        当前视图状态的快照，用于生成渲染缓存键。
+        """
+        return RenderView(self.doc_id, self.zoom, self.rotation, self.dpi, self.color_theme, self.tile_size)
+
+
+    @property
+    def color_theme(self) -> ColorTheme:
+        """
+        颜色主题，由设置 `color_theme` 、`theme_text_color` 、`theme_background_color` 决定（见 ThemePlugin）。
+        """
+        return ColorTheme.get(
+            self.context.get_setting("color_theme", ColorTheme.DAY),
+            tuple(self.context.get_setting("theme_text_color", (0, 0, 0))),
+            tuple(self.context.get_setting("theme_background_color", (255, 255, 255))),
+        )
+
+
     @property
     def total_pages(self) -> int:
         """
@@ -201,7 +414,136 @@ class Tab:
             return None
         if not 0 <= self.page_no < self.total_pages:
             raise ValueError(f"Invalid page number: {self.page_no}")
-        return self.doc[self.page_no]
+        return self.load_page(self.page_no)
+
+
+    def load_page(self, page_no: int) -> fitz.Page:
+        """
+        获取第 `page_no` 页的 Page 对象。最近使用的 `MAX_CACHED_PAGES` 个页面对象会被缓存，不必反复加载。
+
+        只能在 Tk 线程中调用。
+        """
+        page = self._pages.pop(page_no, None)
+        if page is None:
+            with render_stats.timer("page_load"):
+                page = self.doc[page_no]
+            if len(self._pages) >= self.MAX_CACHED_PAGES:
+                # 淘汰最久未使用的页面
+                self._pages.popitem(last = False)
+        self._pages[page_no] = page
+        return page
+
+
+    def load_page_sizes(self) -> None:
+        """
+        读取所有页面的宽度和高度，打开文档时调用一次。
+        """
+        self._page_widths  = array("d")
+        self._page_heights = array("d")
+        for page in self.doc:
+            self._page_widths.append(page.rect.width)
+            self._page_heights.append(page.rect.height)
+
+
+    def page_size(self, page_no: int) -> Tuple[float, float]:
+        """
+        第 `page_no` 页经 `rotation` 旋转后的 (宽度, 高度) （单位：逻辑像素，未缩放）。
+        """
+        return rotate_size(self._page_widths[page_no], self._page_heights[page_no], self.rotation)
+
+
+    @property
+    def page_gap(self) -> float:
+        """
+        连续视图中相邻页面的间隔（单位：逻辑像素，未缩放）。
+        """
+        return self.context.get_setting("page_gap", 8)
+
+
+    @property
+    def is_continuous(self) -> bool:
+        """
+        当前视图模式是否为连续视图（滚到一页底部时继续显示下一页）。
+        """
+        return self.display_mode.startswith(DisplayMode.CONTINUOUS.value)
+
+
+    @property
+    def layout_columns(self) -> Tuple[int, bool]:
+        """
+        当前视图模式下 (每行最多几页, 封面是否单独一行) 。
+        """
+        mode = self.display_mode
+        if mode in (DisplayMode.SINGLE_BOOK.value, DisplayMode.CONTINUOUS_BOOK.value):
+            return (2, True)
+        if mode in (DisplayMode.SINGLE_FACING.value, DisplayMode.CONTINUOUS_FACING.value):
+            return (2, False)
+        return (1, False)
+
+
+    def spread_pages(self, page_no: int | None = None) -> range:
+        """
+        第 `page_no` 页（默认为当前页）所在的行包含的页码：单页视图中只有该页，双页、书本视图中为该页所在的跨页。
+        """
+        if page_no is None:
+            page_no = self.page_no
+        (columns, cover) = self.layout_columns
+        return PageLayout.spread(page_no, self.total_pages, columns, cover)
+
+
+    @property
+    def layout_key(self) -> Tuple[str, bool, int, float, int]:
+        """
+        决定页面布局的状态：(视图模式, 是否从右到左, 旋转角度, 页面间隔, 布局的第一页) 。
+        """
+        first = 0 if self.is_continuous else self.spread_pages().start
+        return (self.display_mode, self.display_r2l, self.rotation, self.page_gap, first)
+
+
+    @property
+    def layout(self) -> PageLayout:
+        """
+        当前视图模式下的页面布局。
+
+        连续视图的布局包含所有页面，不连续视图的布局只包含当前页所在的行。
+        布局以未缩放的坐标表示，与缩放比例和窗口大小无关，因此按 `layout_key` 缓存。
+        """
+        (columns, cover) = self.layout_columns
+        pages = range(self.total_pages) if self.is_continuous else self.spread_pages()
+        key = self.layout_key
+
+        layout = self._layouts.pop(key, None)
+        if layout is None:
+            with render_stats.timer("layout"):
+                layout = PageLayout(
+                    (self.page_size(page_no) for page_no in pages),
+                    gap     = self.page_gap,
+                    start   = pages.start,
+                    columns = columns,
+                    cover   = cover,
+                    r2l     = self.display_r2l,
+                )
+            if len(self._layouts) >= self.MAX_CACHED_LAYOUTS:
+                # 淘汰最久未使用的布局
+                del self._layouts[next(iter(self._layouts))]
+
+        # 最近使用的布局排在最后
+        self._layouts[key] = layout
+        return layout
+
+
+    @property
+    def view_rect(self) -> fitz.Rect:
+        """
+        “用户视界”（画布的可见区域）在布局平面上的位置矩形。
+        """
+        layout = self.layout
+        x_view_start, x_view_end = self.canvas.xview()
+        y_view_start, y_view_end = self.canvas.yview()
+        return fitz.Rect(
+            x_view_start * layout.width, y_view_start * layout.height,
+            x_view_end   * layout.width, y_view_end   * layout.height,
+        )
 
 
     @property
@@ -209,21 +551,21 @@ class Tab:
         """
         画下要显示的页面所需的画布宽度。
         """
-        return self.page.rect.width * self.zoom
+        return self.layout.width * self.zoom
 
     @property
     def canvas_height(self) -> float:
         """
         画下要显示的页面所需的画布高度。
         """
-        return self.page.rect.height * self.zoom
+        return self.layout.height * self.zoom
 
     @property
     def canvas_rect(self) -> fitz.Rect:
         """
         返回；经过缩放后，页面的形状矩形。
         """
-        return self.page.rect * self.zoom
+        return self.layout.rect * self.zoom
 
 
     @property
@@ -236,20 +578,19 @@ class Tab:
 
         注意：可能会有多个页面。
         """
-        x_view_start, x_view_end = self.canvas.xview()
-        y_view_start, y_view_end = self.canvas.yview()
-
-        # 可见页面区域坐标
-        page_x1 = x_view_start * self.page.rect.width
-        page_y1 = y_view_start * self.page.rect.height
-        page_x2 = x_view_end   * self.page.rect.width
-        page_y2 = y_view_end   * self.page.rect.height
-        visible_page_region = fitz.Rect(page_x1, page_y1, page_x2, page_y2)
+        positions = []
+        for (page_no, page_rect, visible) in self.layout.visible_pages(self.view_rect):
+            # 可见区域在页面上的坐标
+            visible_page_region = fitz.Rect(
+                visible.x0 - page_rect.x0, visible.y0 - page_rect.y0,
+                visible.x1 - page_rect.x0, visible.y1 - page_rect.y0,
+            )
 
-        # 该区域显示在整块 canvas 上的位置
-        visible_canvas_region = visible_page_region * self.zoom
+            # 该区域显示在整块 canvas 上的位置
+            visible_canvas_region = visible * self.zoom
 
-        return [(self.page, visible_page_region, visible_canvas_region)]
+            positions.append((self.load_page(page_no), visible_page_region, visible_canvas_region))
+        return positions
 
 
     @property
@@ -258,9 +599,63 @@ class Tab:
         返回：
         - List[(可被选择的页面, 该页面的在整块 canvas 上的位置矩形)]
 
-        注意：可能会有多个页面。
+        注意：可能会有多个页面。只返回与“用户视界”相交的页面。
+        """
+        return [
+            (self.load_page(page_no), page_rect * self.zoom)
+            for (page_no, page_rect, _) in self.layout.visible_pages(self.view_rect)
+        ]
+
+
+    def page_matrix(self, page_no: int) -> fitz.Matrix:
+        """
+        将第 `page_no` 页的页面坐标（未旋转）转换为画布坐标的变换矩阵。该页须在当前页面布局中。
+        """
+        page_rect = self.layout.page_rect(page_no)
+        return (
+            rotation_matrix(self.load_page(page_no).rect, self.rotation)
+            * fitz.Matrix(1, 0, 0, 1, page_rect.x0, page_rect.y0)
+            * fitz.Matrix(self.zoom, self.zoom)
+        )
+
+
+    def page_point(self, pos: Tuple[float, float]) -> Tuple[int, fitz.Point] | None:
+        """
+        窗口上的画布坐标 `pos` （如鼠标事件的 (event.x, event.y)）处的页面，返回 (页码, 未旋转的页面坐标) ；不在任何页面上时返回 None 。
+        """
+        point = fitz.Point(self.canvas.canvasx(pos[0]), self.canvas.canvasy(pos[1]))
+        page_no = self.layout.page_containing(point / self.zoom)
+        if page_no is None:
+            return None
+        return (page_no, point * ~self.page_matrix(page_no))
+
+
+    def page_to_canvas(self, page_no: int, rect: fitz.Rect) -> fitz.Rect | None:
         """
-        return [(self.page, fitz.Rect(0, 0, self.page.rect.width, self.page.rect.height) * self.zoom)]
+        第 `page_no` 页上的矩形 `rect` （未旋转的页面坐标）在画布上的位置；该页不在当前页面布局中（不连续视图的其他页）时返回 None 。
+        """
+        if page_no not in self.layout:
+            return None
+        return fitz.Rect(rect) * self.page_matrix(page_no)
+
+
+    def show_page_rect(self, page_no: int, rect: fitz.Rect, margin: float = 40) -> None:
+        """
+        跳转到第 `page_no` 页，并滚动到该页上的矩形 `rect` （未旋转的页面坐标），使其顶端位于视图顶端之下 `margin` 屏幕像素处。
+        """
+        rotated = fitz.Rect(rect) * rotation_matrix(self.load_page(page_no).rect, self.rotation)
+        self.scroll_pos = (self.scroll_pos[0], max(rotated.y0 - margin / self.zoom, 0.0))
+        self.page_no = page_no
+
+
+    def text_layout(self, page_no: int) -> PageText:
+        """
+        第 `page_no` 页的文字布局（含空间索引），见 `TextIndex` 。
+
+        只能在 Tk 线程中调用。
+        """
+        with render_stats.timer("text_layout"):
+            return self.text_index.get(self.load_page(page_no))
 
 
     def coord2real(self, pos: Tuple[float, float]) -> Tuple[float, float]:
@@ -282,11 +677,30 @@ class Tab:
         """
         当用户通过拖动滑动条、鼠标滚轮滚动、拖动、按方向键等方式移动视图位置时，应调用此函数，实时更新属性。
 
-        此方法不会主动刷新画布。
+        此方法不会主动刷新画布。若程序对视图属性的修改尚未同步到画布上，则以程序的修改为准。
         """
-        x_view_start, _ = self.canvas.xview()
-        y_view_start, _ = self.canvas.yview()
-        self.state["scroll_pos"] = (self.page.rect.width * x_view_start, self.page.rect.height * y_view_start)
+        if self._view_region_dirty:
+            return
+        layout = self.layout
+        view_rect = self.view_rect
+
+        # 连续视图中，“用户视界”顶端所在的页面成为当前页
+        page_no = layout.page_at(view_rect.y0)
+        page_rect = layout.page_rect(page_no)
+        self.state["scroll_pos"] = (view_rect.x0 - page_rect.x0, view_rect.y0 - page_rect.y0)
+
+        if page_no != self.page_no:
+            self.state["page_no"] = page_no
+            self._notify_page_changed()
+
+    def _notify_page_changed(self) -> None:
+        """
+        当前页改变后，更新页码显示、翻页按钮和缩略图面板（若相应的插件已加载）。
+        """
+        for name in ("update_page_number", "update_page_turning_button", "update_thumbnails"):
+            update = getattr(self.context, name, None)
+            if update is not None:
+                update()
 
     def auto_update_view_attributes(self, func):
         """
@@ -302,10 +716,21 @@ class Tab:
     def update_view_region(self):
         """
         当程序直接为 zoom、rotation、scroll_pos 属性进行赋值操作时，应调用此方法，实时同步显示。
+
+        同步不会立即进行，而是与渲染一起在下一帧统一执行，因此连续修改多个属性只会同步、渲染一次。
+        """
+        self._view_region_dirty = True
+        self.request_render()
+
+    def _apply_view_region(self):
+        """
+        将 zoom、rotation、scroll_pos 等属性同步到画布的滚动区域和视图范围上。
         """
-        # 计算视图起始比例（基于滚动位置和页面尺寸）
-        x_view_start = max(self.scroll_pos[0] / self.page.rect.width, 0.0)
-        y_view_start = max(self.scroll_pos[1] / self.page.rect.height, 0.0)
+        # 计算视图起始比例（滚动位置相对于当前页在布局平面上的左上角；双页、书本视图中相对于当前跨页的第一页）
+        layout = self.layout
+        page_rect = layout.page_rect(self.spread_pages().start)
+        x_view_start = max((page_rect.x0 + self.scroll_pos[0]) / layout.width, 0.0)
+        y_view_start = max((page_rect.y0 + self.scroll_pos[1]) / layout.height, 0.0)
 
         # 计算缩放后的页面尺寸，更新滚动区域
         self.canvas.configure(scrollregion=(0, 0, self.canvas_width, self.canvas_height))
@@ -327,6 +752,65 @@ class Tab:
         self.canvas.xview_moveto(x_view_start)
         self.canvas.yview_moveto(y_view_start)
 
+    def zoom_gesture(self, zoom: float, anchor: Tuple[float, float] | None = None) -> None:
+        """
+        连续缩放（如按住 Ctrl 滚动鼠标滚轮）时调用：把缩放比例设为 `zoom` ，并保持画布上 `anchor` 处（窗口坐标，默认为画布中心）的内容不动。
+
+        手势进行期间只把缓存中的整页预览图缩放后显示，不以完整分辨率渲染；
+        手势停止 `zoom_settle_delay` 毫秒后，才以新的缩放比例清晰地渲染一次。
+        """
+        if not self.doc:
+            return
+        if zoom <= 0:
+            raise ValueError(f"Zoom level must be positive, got {zoom}")
+        if anchor is None:
+            anchor = (self.canvas.winfo_width() / 2, self.canvas.winfo_height() / 2)
+
+        # 锚点在布局平面上的位置；尚未同步到画布的修改以属性为准
+        if self._view_region_dirty:
+            self._apply_view_region()
+            self._view_region_dirty = False
+        old_zoom = self.zoom
+        x = self.canvas.canvasx(anchor[0]) / old_zoom
+        y = self.canvas.canvasy(anchor[1]) / old_zoom
+
+        # 缩放后，让同一位置仍位于锚点处
+        layout = self.layout
+        view_x = x - anchor[0] / zoom
+        view_y = y - anchor[1] / zoom
+        page_no = layout.page_at(view_y) if self.is_continuous else self.spread_pages().start
+        page_rect = layout.page_rect(page_no)
+        self.state["scroll_pos"] = (view_x - page_rect.x0, view_y - page_rect.y0)
+        self.state["zoom"] = zoom
+        if page_no != self.page_no:
+            self.state["page_no"] = page_no
+            self._notify_page_changed()
+
+        # 推迟清晰渲染
+        if self._zoom_gesture_id is not None:
+            self.canvas.after_cancel(self._zoom_gesture_id)
+        self._zoom_gesture_id = self.canvas.after(self.context.get_setting("zoom_settle_delay", 150), self._end_zoom_gesture)
+
+        self.update_view_region()
+
+
+    def _end_zoom_gesture(self) -> None:
+        """
+        缩放手势结束：以当前缩放比例清晰地渲染。
+        """
+        self._zoom_gesture_id = None
+        self.request_render()
+
+
+    def cancel_zoom_gesture(self) -> None:
+        """
+        取消尚未执行的手势结束回调。
+        """
+        if self._zoom_gesture_id is not None:
+            self.canvas.after_cancel(self._zoom_gesture_id)
+            self._zoom_gesture_id = None
+
+
     def auto_update_view_region(self, func):
         """
         装饰器：在函数执行后自动调用 update_view_attributes() 方法。
@@ -338,11 +822,57 @@ class Tab:
         return wrapper
 
 
-    def convert_color(self, img: Image.Image) -> Image.Image:
+    def convert_color(
+        self,
+        img: Image.Image,
+        page: fitz.Page | None = None,
+        clip: fitz.Rect | None = None,
+        view: RenderView | None = None,
+    ) -> Image.Image:
+        """
+        转换图像颜色，会在 render 方法中调用。默认按视图状态 `view` 中的颜色主题转换（见 `ColorTheme`）。
+
+        `img` 为页面 `page` 上 `clip` 区域（经 `rotation` 旋转后的页面上的区域）的渲染结果，分辨率为 `zoom * dpi / 72` 。
+        提供 `page` 和 `clip` 时，页面中的图片区域按主题单独转换。
         """
-        转换图像颜色，会在 render 方法中调用。
+        if view is None:
+            view = self.render_view
+        theme = view.theme
+        if theme.is_identity:
+            return img
+        image_boxes = ()
+        if page is not None and clip is not None and theme.maps_images_separately:
+            image_boxes = self.image_boxes(page, clip, view)
+        return theme.apply(img, image_boxes)
+
+
+    def image_boxes(self, page: fitz.Page, clip: fitz.Rect, view: RenderView) -> List[Tuple[int, int, int, int]]:
         """
-        return img
+        页面 `page` 中的图片在 `clip` 区域的渲染结果中的位置 (x0, y0, x1, y1) （单位：像素）。
+
+        图片在页面上的位置按页码缓存；后台渲染线程也会调用此方法，此时 `page` 来自线程自己的文档对象。
+        """
+        rects = self._image_rects.get(page.number)
+        if rects is None:
+            rects = [rect for image in page.get_images() for rect in page.get_image_rects(image[0])]
+            self._image_rects[page.number] = rects
+        if not rects:
+            return []
+
+        matrix = rotation_matrix(page.rect, view.rotation)
+        scale = view.zoom * view.dpi / 72
+        boxes = []
+        for rect in rects:
+            rect = (rect * matrix) & clip
+            if rect.is_empty:
+                continue
+            boxes.append((
+                int((rect.x0 - clip.x0) * scale),
+                int((rect.y0 - clip.y0) * scale),
+                ceil((rect.x1 - clip.x0) * scale),
+                ceil((rect.y1 - clip.y0) * scale),
+            ))
+        return boxes
 
 
     # def rotate_image(self, img: Image.Image, angle: int) -> Image.Image:
@@ -372,61 +902,730 @@ class Tab:
     #     return img.rotate(angle, expand=True)
 
 
-    def render(self):
+    def rasterize_pixmap(self, page: fitz.Page, clip: fitz.Rect, view: RenderView) -> fitz.Pixmap:
+        """
+        按视图状态 `view` 将页面 `page` 上的 `clip` 区域渲染为 RGB 像素图，分辨率为 `zoom * dpi / 72` 。
+
+        `clip` 为经 `rotation` 旋转后的页面上的区域（与 `visible_page_positions` 一致）。
+
+        分辨率为 72 （默认值）时，像素图的大小恰好是 `clip` 缩放后的大小。
+
+        渲染时重放缓存的显示列表，而不是重新解析页面内容流。
+        """
+        (matrix, clip) = render_transform(page.rect, clip, view.zoom * view.dpi / 72, view.rotation)
+        with render_stats.timer("display_list"):
+            display_list = self.display_lists.get(page)
+        with render_stats.timer("get_pixmap"):
+            return display_list.get_pixmap(
+                matrix = matrix,
+                clip = clip,
+                colorspace = fitz.csRGB,
+                alpha = False
+            )
+
+
+    def rasterize(
+        self,
+        page: fitz.Page,
+        clip: fitz.Rect,
+        size: Tuple[int, int],
+        view: RenderView,
+        farm: RenderFarm | None = None,
+    ) -> Image.Image:
+        """
+        按视图状态 `view` 将页面 `page` 上的 `clip` 区域渲染为大小为 `size` 的图像，并转换颜色。
+
+        分辨率为 72 （默认值）时，渲染结果无需再缩放；分辨率更高时，先按该分辨率渲染，再缩小到 `size` （超采样）。
+
+        `farm` 不为 None 时由渲染子进程渲染并等待结果（见 `RenderFarm.render`），供后台渲染线程使用。
+        """
+        # 直接读取像素缓冲区，避免先复制为 bytes
+        if farm is None:
+            pix = self.rasterize_pixmap(page, clip, view)
+            with render_stats.timer("frombuffer"):
+                img = Image.frombuffer("RGB", (pix.width, pix.height), pix.samples_mv, "raw", "RGB", pix.stride, 1)
+        else:
+            result = farm.render(self.file_path, view.doc_id, page.number, clip, view.zoom * view.dpi / 72, view.rotation)
+            try:
+                with render_stats.timer("frombuffer"):
+                    img = Image.frombuffer("RGB", result.size, result.samples, "raw", "RGB", result.stride, 1)
+            finally:
+                result.release()
+        with render_stats.timer("convert_color"):
+            img = self.convert_color(img, page, clip, view)
+        if img.size != size:
+            with render_stats.timer("resize"):
+                img = img.resize(size)
+        return img
+
+
+    def use_direct_photo(self, view: RenderView) -> bool:
+        """
+        是否可以不经过 Pillow ，把像素图直接转换为 PhotoImage ：需要开启 `direct_photo` 设置、无需缩放、无需转换颜色。
+        """
+        return (
+            self.context.get_setting("direct_photo", True)
+            and view.dpi == 72
+            and view.theme.is_identity
+            and getattr(self.convert_color, "__func__", None) is Tab.convert_color
+        )
+
+
+    @property
+    def render_farm(self) -> RenderFarm | None:
+        """
+        用于渲染可见图块的多进程渲染服务。未开启（`render_processes` 为 0）或不可用时为 None ，此时在本进程内渲染。
+        """
+        # 渲染子进程从磁盘打开文档，看不到尚未保存的修改（如新添加的注释）
+        if not self.doc or self.doc.is_dirty:
+            return None
+        return get_render_farm(self.context.get_setting("render_processes", 0))
+
+
+    @property
+    def background_farm(self) -> RenderFarm | None:
+        """
+        后台渲染线程（预先渲染、重新验证）使用的多进程渲染服务，见设置 `background_processes` 。不可用时为 None ，此时后台线程自己渲染。
+        """
+        return get_background_farm(self.context.get_setting("background_processes", 1))
+
+
+    def lookup_page_tiles(
+        self,
+        page: fitz.Page,
+        page_rect: fitz.Rect,
+        view: RenderView,
+        restore: bool = True,
+    ) -> Tuple[List[Tuple[fitz.Rect, Tile]], List[Tuple[TileKey, fitz.Rect]]]:
+        """
+        在缓存中查找覆盖页面 `page` 上 `page_rect` 区域的所有图块。`restore` 为 True 时，渲染缓存中缺失的图块再从磁盘图块缓存中读取。
+
+        返回：
+        - (List[(图块在缩放后的页面上的位置矩形, 缓存中的图块)], List[(缺失图块的缓存键, 缺失图块的位置矩形)])
+        """
+        tile_size = view.tile_size
+        zoomed_page_rect = rotated_rect(page.rect, view.rotation) * view.zoom
+        zoomed_rect = page_rect * view.zoom
+
+        tiles: List[Tuple[fitz.Rect, Tile]] = []
+        missing: List[Tuple[TileKey, fitz.Rect]] = []
+
+        for row in range(int(zoomed_rect.y0 // tile_size), ceil(zoomed_rect.y1 / tile_size)):
+            for column in range(int(zoomed_rect.x0 // tile_size), ceil(zoomed_rect.x1 / tile_size)):
+                tile_rect = fitz.Rect(
+                    column * tile_size, row * tile_size,
+                    (column + 1) * tile_size, (row + 1) * tile_size,
+                ) & zoomed_page_rect
+                if tile_rect.is_empty:
+                    continue
+
+                key = view.tile_key(page.number, column, row)
+                tile = self.render_cache.get(key)
+                if tile is None:
+                    missing.append((key, tile_rect))
+                else:
+                    tiles.append((tile_rect, tile))
+
+        prefix = self.tile_store_prefix
+        if missing and restore and prefix is not None:
+            missing = self.restore_tiles(prefix, missing, tiles, view)
+
+        return (tiles, missing)
+
+
+    def restore_tiles(
+        self,
+        prefix: str,
+        missing: List[Tuple[TileKey, fitz.Rect]],
+        tiles: List[Tuple[fitz.Rect, Tile]],
+        view: RenderView,
+    ) -> List[Tuple[TileKey, fitz.Rect]]:
+        """
+        从磁盘图块缓存中读取缺失的图块 `missing` ，存入渲染缓存并追加到 `tiles` 中，返回磁盘中也没有的图块。
+        """
+        restored = self.tile_store.load_many(prefix, (key for (key, _) in missing))
+        if not restored:
+            return missing
+
+        still_missing = []
+        for (key, tile_rect) in missing:
+            tile = restored.get(key)
+            if tile is None:
+                still_missing.append((key, tile_rect))
+                continue
+            self.render_cache.put(key, tile)
+            tiles.append((tile_rect, tile))
+            if self._collect_restored:
+                self._restored[key] = (tile_rect, tile_checksum(tile.ppm), view)
+        return still_missing
+
+
+    def render_missing_tiles(
+        self,
+        page: fitz.Page,
+        missing: List[Tuple[TileKey, fitz.Rect]],
+        view: RenderView,
+        save: bool = True,
+        farm: RenderFarm | None = None,
+    ) -> List[Tuple[fitz.Rect, Tile]]:
+        """
+        渲染 `lookup_page_tiles` 返回的缺失图块，并存入缓存；`save` 为 True 时还在后台写入磁盘图块缓存。
+
+        缺失的图块一次性渲染，再切分，以免反复解析页面内容。`farm` 不为 None 时由渲染子进程渲染并等待结果，供后台渲染线程使用。
+        """
+        if not missing:
+            return []
+
+        region = fitz.Rect(missing[0][1])
+        for (_, tile_rect) in missing[1:]:
+            region |= tile_rect
+
+        if farm is None:
+            pix = self.rasterize_pixmap(page, region / view.zoom, view)
+            return self.make_tiles(page, pix.samples_mv, (pix.width, pix.height), pix.stride, region, missing, view, save)
+
+        result = farm.render(self.file_path, view.doc_id, page.number, region / view.zoom, view.zoom * view.dpi / 72, view.rotation)
+        try:
+            return self.make_tiles(page, result.samples, result.size, result.stride, region, missing, view, save)
+        finally:
+            result.release()
+
+
+    def make_tiles(
+        self,
+        page: fitz.Page,
+        samples: memoryview,
+        pixel_size: Tuple[int, int],
+        stride: int,
+        region: fitz.Rect,
+        missing: List[Tuple[TileKey, fitz.Rect]],
+        view: RenderView,
+        save: bool = True,
+    ) -> List[Tuple[fitz.Rect, Tile]]:
+        """
+        将页面 `page` 缩放后 `region` 区域的渲染结果切分为图块 `missing` ，并存入缓存；`save` 为 True 时还在后台写入磁盘图块缓存。
+
+        渲染结果为 RGB 像素缓冲区 `samples` （大小为 `pixel_size` ，每行 `stride` 字节），可以来自本进程或渲染子进程。
+        图块不引用 `samples` ，调用方随后可以释放它。
+        """
+        size = (ceil(region.width), ceil(region.height))
+
+        if self.use_direct_photo(view):
+            # 像素按行切分为 PPM 数据，由 Tk 直接解码
+            make_tile = lambda box: Tile(ppm = samples_to_ppm(samples, pixel_size, stride, box), size = (box[2] - box[0], box[3] - box[1]))
+            size = pixel_size
+        else:
+            # 以 RGB 模式读取缓冲区时 Pillow 会复制像素
+            with render_stats.timer("frombuffer"):
+                img = Image.frombuffer("RGB", pixel_size, samples, "raw", "RGB", stride, 1)
+            with render_stats.timer("convert_color"):
+                img = self.convert_color(img, page, region / view.zoom, view)
+            if img.size != size:
+                with render_stats.timer("resize"):
+                    img = img.resize(size)
+            make_tile = lambda box: Tile(img if box == (0, 0, *size) else img.crop(box))
+
+        tiles: List[Tuple[fitz.Rect, Tile]] = []
+        for (key, tile_rect) in missing:
+            # 图块在渲染结果中的位置，不超出渲染结果
+            box = (
+                int(tile_rect.x0 - region.x0),
+                int(tile_rect.y0 - region.y0),
+                min(ceil(tile_rect.x1 - region.x0), size[0]),
+                min(ceil(tile_rect.y1 - region.y0), size[1]),
+            )
+            tile = make_tile(box)
+            self.render_cache.put(key, tile)
+            tiles.append((tile_rect, tile))
+
+        prefix = self.tile_store_prefix
+        if save and prefix is not None:
+            self.tile_store.save_many(prefix, [(key, tile_ppm(tile)) for ((key, _), (_, tile)) in zip(missing, tiles)])
+
+        return tiles
+
+
+    def render_page_tiles(
+        self,
+        page: fitz.Page,
+        page_rect: fitz.Rect,
+        view: RenderView | None = None,
+        farm: RenderFarm | None = None,
+    ) -> List[Tuple[fitz.Rect, Tile]]:
+        """
+        获取覆盖页面 `page` 上 `page_rect` 区域的所有图块，缓存中没有的图块会被渲染并存入缓存。
+
+        `view` 为渲染时的视图状态，默认为当前状态。后台渲染线程也会调用此方法，此时 `page` 来自线程自己的文档对象，
+        `farm` 为渲染图块的多进程渲染服务（见 `render_missing_tiles`）。
+
+        返回：
+        - List[(图块在缩放后的页面上的位置矩形, 图块)]
+        """
+        if view is None:
+            view = self.render_view
+        (tiles, missing) = self.lookup_page_tiles(page, page_rect, view)
+        return tiles + self.render_missing_tiles(page, missing, view, farm = farm)
+
+
+    def page_preview(self, page: fitz.Page, view: RenderView | None = None, farm: RenderFarm | None = None) -> Tile:
+        """
+        获取页面 `page` 的整页低分辨率预览图（按 `preview_zoom` 缩放），用于渐进式渲染的第一遍。`farm` 见 `rasterize` 。
+
+        预览图与普通图块存放在同一个缓存中，图块位置记为 (-1, -1) 。预览图只会被裁剪、放大后使用，不会转换为 PhotoImage 。
+        """
+        if view is None:
+            view = self.render_view
+        preview_view = view._replace(zoom = self.preview_zoom)
+        key = preview_view.tile_key(page.number, -1, -1)
+
+        tile = self.render_cache.get(key)
+        if tile is None:
+            page_rect = rotated_rect(page.rect, preview_view.rotation)
+            zoomed_page_rect = page_rect * preview_view.zoom
+            size = (ceil(zoomed_page_rect.width), ceil(zoomed_page_rect.height))
+            tile = Tile(self.rasterize(page, page_rect, size, preview_view, farm))
+            self.render_cache.put(key, tile)
+        return tile
+
+
+    def draw_preview(self, page: fitz.Page, page_rect: fitz.Rect, origin: Tuple[float, float]) -> None:
+        """
+        将页面 `page` 上 `page_rect` 区域的预览图放大后绘制到画布上，页面左上角位于画布的 `origin` 处。
+        """
+        preview_zoom = self.preview_zoom
+        image = self.page_preview(page).image
+
+        # 预览图上对应的区域，取整到整像素
+        x0 = int(page_rect.x0 * preview_zoom)
+        y0 = int(page_rect.y0 * preview_zoom)
+        x1 = min(ceil(page_rect.x1 * preview_zoom), image.width)
+        y1 = min(ceil(page_rect.y1 * preview_zoom), image.height)
+        if x1 <= x0 or y1 <= y0:
+            return
+
+        # 放大到当前缩放比例
+        scale = self.zoom / preview_zoom
+        with render_stats.timer("resize"):
+            img = image.crop((x0, y0, x1, y1)).resize((ceil((x1 - x0) * scale), ceil((y1 - y0) * scale)))
+        with render_stats.timer("photo"):
+            photo = ImageTk.PhotoImage(image = img)
+
+        with render_stats.timer("canvas"):
+            self.layers.place_image("preview", page.number, origin[0] + x0 * scale, origin[1] + y0 * scale, photo)
+
+
+    def render(self, progressive: bool = False):
         """
         渲染页面。
 
-        为加速渲染，仅渲染会显示到画布上的部分。
+        为加速渲染，仅渲染会显示到画布上的部分；渲染结果按图块缓存，再次显示同一区域时直接从缓存中绘制。
+        画布上的图像项由 `layers` 保留和复用，只修改有变化的图像项；覆盖层（选框、调试框等）不会被清除。
+
+        若 `progressive` 为 True 且缓存中缺少图块，则先用放大的整页预览图填补缺失的部分，
+        再在 Tk 空闲时以完整分辨率重新渲染（渐进式渲染）。
+        缩放手势进行期间（见 `zoom_gesture`），缺失的部分只用预览图填补，手势结束后才以完整分辨率渲染。
         """
         if not self.doc or not (0 <= self.page_no < self.total_pages):
             return
 
-        # 清空画布和缓存
-        self.canvas.delete("all")
-        self.tk_images.clear()
+        with render_stats.timer("frame"):
+            self._render(progressive)
 
-        for (page, page_rect, canvas_rect) in self.visible_page_positions:
-            # 渲染页面图像
-            pix = page.get_pixmap(
-                clip = page_rect,
-                dpi = int(self.dpi * self.zoom),
-                colorspace = "rgb"
-            )
+        if render_stats.hud:
+            self.draw_render_hud()
 
-            # 图像转换
-            img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
-            img = self.convert_color(img).resize((ceil(canvas_rect.width), ceil(canvas_rect.height)))
-            self.tk_images.append(ImageTk.PhotoImage(image = img))
-
-            # 在画布上绘制
-            self.canvas.create_image(
-                canvas_rect.x0,
-                canvas_rect.y0,
-                anchor = tk.NW,
-                image  = self.tk_images[-1]
-            )
 
-            # print(self.page.rect)
-            # print((self.canvas.winfo_width(), self.canvas.winfo_width()))
+    def _render(self, progressive: bool) -> None:
+        """
+        渲染页面的具体过程，见 `render` 。
+        """
+        # 新的一帧取代尚未执行的第二遍渲染
+        self.cancel_refine()
+
+        view = self.render_view
+        progressive = progressive and view.zoom > self.preview_zoom
+        zooming = self._zoom_gesture_id is not None
+        farm = self.render_farm
+        farm_keys = set()
+
+        # 覆盖层跟随缩放比例和页面布局
+        self.layers.transform_overlays(view.zoom, self.layout_key)
+
+        # 渲染可见页面期间，后台线程不开始新的任务
+        self.render_worker.pause()
+        self.layers.begin_frame()
+        try:
+            for (page, page_rect, canvas_rect) in self.visible_page_positions:
+                # 页面左上角在整块 canvas 上的位置
+                origin_x = canvas_rect.x0 - page_rect.x0 * view.zoom
+                origin_y = canvas_rect.y0 - page_rect.y0 * view.zoom
+
+                # 缩放手势进行中不读取磁盘：缺失的图块只用预览图代替
+                (tiles, missing) = self.lookup_page_tiles(page, page_rect, view, restore = not zooming)
+                if missing and zooming:
+                    # 缩放手势进行中：只缩放预览图
+                    self.draw_preview(page, page_rect, (origin_x, origin_y))
+                elif missing and farm is not None:
+                    # 缺失的图块交给渲染子进程并行渲染，完成后再重新绘制；在此之前用预览图垫底
+                    self.submit_farm_jobs(farm, page, missing, view)
+                    farm_keys.update(key for (key, _) in missing)
+                    if progressive:
+                        self.draw_preview(page, page_rect, (origin_x, origin_y))
+                elif missing and progressive:
+                    # 第一遍：预览图垫底，缓存中已有的图块画在上面
+                    self.draw_preview(page, page_rect, (origin_x, origin_y))
+                    self.schedule_refine()
+                else:
+                    tiles += self.render_missing_tiles(page, missing, view)
+
+                for (tile_rect, tile) in tiles:
+                    photo = tile.get_photo()
+
+                    # 在画布上绘制；同一页面同一位置的图块复用原来的图像项
+                    with render_stats.timer("canvas"):
+                        self.layers.place_image(
+                            "tile",
+                            (page.number, tile_rect.x0, tile_rect.y0),
+                            origin_x + tile_rect.x0,
+                            origin_y + tile_rect.y0,
+                            photo,
+                        )
+        finally:
+            # 隐藏已移出视图的图像项
+            with render_stats.timer("canvas"):
+                self.layers.end_frame()
+            self.render_worker.resume()
+
+        # 已移出视图的图块不必再渲染
+        self.cancel_farm_jobs(lambda key: key not in farm_keys)
+
+        self._rendered_view = (self.canvas.xview(), self.canvas.yview())
+
+        # 插件绘制的覆盖层（选中的文字、查找结果等）跟随新的视图
+        for painter in list(self._overlay_painters):
+            try:
+                painter()
+            except Exception as error:
+                print(f"in Tab._render: {painter.__name__}: {error.__class__.__name__}: {error}")
+
+        # 打开文档后的第一帧若来自磁盘图块缓存，交给后台线程重新验证
+        if not zooming:
+            self._collect_restored = False
+            if self._restored:
+                self.revalidate_restored_tiles()
+
+        # 第二遍渲染完成、缩放手势结束后再预先渲染附近的页面
+        if self._refine_id is None and not zooming:
+            self.prefetch()
+
+
+    def draw_render_hud(self) -> None:
+        """
+        在画布可见区域的左上角显示渲染性能统计（见 `RenderStats`），未开启 HUD 时删除它。
+        """
+        self.canvas.delete("render_hud")
+        if not render_stats.hud:
+            return
+
+        x = self.canvas.canvasx(8)
+        y = self.canvas.canvasy(8)
+        tags = self.layers.overlay_tags("render_hud")
+        text = self.canvas.create_text(
+            x + 6, y + 4,
+            text   = render_stats.format(),
+            anchor = tk.NW,
+            fill   = "white",
+            font   = ("Courier", 9),
+            tags   = tags,
+        )
+        (x0, y0, x1, y1) = self.canvas.bbox(text)
+        background = self.canvas.create_rectangle(x0 - 6, y0 - 4, x1 + 6, y1 + 4, fill = "black", outline = "", tags = tags)
+        self.canvas.tag_lower(background, text)
+
+
+    def invalidate_render_cache(self, page_numbers: Iterable[int] | None = None) -> None:
+        """
+        页面内容被修改（如添加了注释）后，应调用此方法，丢弃这些页面已缓存的渲染结果和显示列表。
+
+        `page_numbers` 默认为所有页面。磁盘图块缓存不必清除：文档有未保存的修改时不读写磁盘图块缓存（见 `tile_store_prefix`），
+        保存后文件的修改时间改变，键前缀随之改变。
+        """
+        if page_numbers is None:
+            self.render_cache.clear()
+            self._image_rects.clear()
+            self.text_index.clear()
+            self.selection.discard_pages()
+            self.cancel_farm_jobs()
+            if self.doc:
+                self.display_lists.discard_document(self.doc)
+            return
+
+        page_numbers = set(page_numbers)
+        for page_no in page_numbers:
+            self._image_rects.pop(page_no, None)
+        self.text_index.discard(page_numbers)
+        self.selection.discard_pages(page_numbers)
+        self.render_cache.discard(lambda key: key.page_no in page_numbers)
+        self.cancel_farm_jobs(lambda key: key.page_no in page_numbers)
+        if self.doc:
+            self.display_lists.discard(self.doc, page_numbers)
+
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        各项缓存占用内存的估计值（单位：字节），供全局内存管理器（见 `MemoryGovernor`）统计：
+
+        - `render_cache`：渲染缓存中的图块，包括已转换的 PhotoImage ；
+        - `canvas`：画布上显示的、不在渲染缓存中的整页预览图；
+        - `text_index`：已缓存的页面文字布局。
+        """
+        return {
+            "render_cache": self.render_cache.current_bytes,
+            "canvas": self.layers.image_bytes("preview"),
+            "text_index": self.text_index.current_bytes,
+        }
+
+
+    def release_memory(self, target_bytes: int, background: bool) -> int:
+        """
+        由全局内存管理器调用：淘汰渲染缓存中最久未使用的图块，使占用的内存不超过 `target_bytes` 字节，返回释放的字节数。
+
+        `background` 为 True （标签页不可见）且仍超过 `target_bytes` 时，还会清除画布上的图像、页面对象、显示列表和文字布局，
+        切换回该标签页时重新渲染。
+        """
+        usage = self.memory_usage()
+        freed = self.render_cache.evict(max(target_bytes - usage["canvas"] - usage["text_index"], 0))
+        if background and sum(usage.values()) - freed > target_bytes:
+            freed += usage["canvas"] + usage["text_index"]
+            self.text_index.clear()
+            self.layers.clear_images()
+            self._rendered_view = None
+            self._pages.clear()
+            self._image_rects.clear()
+            self.display_lists.clear()
+        return freed
+
+
+    def revalidate_restored_tiles(self) -> None:
+        """
+        让后台渲染线程重新渲染从磁盘读取的图块（`_restored`），与磁盘中的比较；若有不同，则在重新渲染的结果替换缓存后重新绘制。
+        """
+        pages: Dict[Tuple[int, RenderView], List[Tuple[TileKey, fitz.Rect, int]]] = {}
+        for (key, (tile_rect, checksum, view)) in self._restored.items():
+            pages.setdefault((key.page_no, view), []).append((key, tile_rect, checksum))
+        self._restored = {}
+        for ((page_no, view), tiles) in pages.items():
+            self.render_worker.revalidate(page_no, tiles, view)
+        if self._revalidate_poll_id is None:
+            self._revalidate_poll_id = self.canvas.after(self.REVALIDATE_POLL_INTERVAL, self._poll_revalidation)
+
+
+    def _poll_revalidation(self) -> None:
+        """
+        检查重新验证的结果：有图块与磁盘中的不同时重新绘制。
+        """
+        self._revalidate_poll_id = None
+        if self.render_worker.stale_tiles:
+            self.render_worker.stale_tiles = 0
+            self.request_render()
+        if self.render_worker.revalidating:
+            self._revalidate_poll_id = self.canvas.after(self.REVALIDATE_POLL_INTERVAL, self._poll_revalidation)
+
+
+    def schedule_refine(self) -> None:
+        """
+        在 Tk 空闲时以完整分辨率重新渲染（渐进式渲染的第二遍）。
+        """
+        if self._refine_id is None:
+            self._refine_id = self.canvas.after_idle(self._refine)
+
+
+    def cancel_refine(self) -> None:
+        """
+        取消尚未执行的第二遍渲染。
+        """
+        if self._refine_id is not None:
+            self.canvas.after_cancel(self._refine_id)
+            self._refine_id = None
+
+
+    def _refine(self) -> None:
+        """
+        渐进式渲染的第二遍。
+        """
+        self._refine_id = None
+        self.render()
+
+
+    def submit_farm_jobs(self, farm: RenderFarm, page: fitz.Page, missing: List[Tuple[TileKey, fitz.Rect]], view: RenderView) -> None:
+        """
+        把缺失的图块逐个提交给多进程渲染服务（已提交的不再重复提交），并开始轮询渲染结果。
+        """
+        scale = view.zoom * view.dpi / 72
+        for (key, tile_rect) in missing:
+            if key in self._farm_jobs:
+                continue
+            job_id = next(_farm_job_ids)
+            try:
+                future = farm.submit(self, (key, job_id), self.file_path, view.doc_id, page.number, tile_rect / view.zoom, scale, view.rotation)
+            except Exception as error:
+                print(f"in Tab.submit_farm_jobs: {error.__class__.__name__}: {error}")
+                break
+            self._farm_jobs[key] = (job_id, future, tile_rect, view)
+
+        if self._farm_jobs and self._farm_poll_id is None:
+            self._farm_poll_id = self.canvas.after(self.FARM_POLL_INTERVAL, self._poll_farm)
+
+
+    def cancel_farm_jobs(self, predicate: Callable[[TileKey], bool] | None = None) -> None:
+        """
+        放弃已提交给多进程渲染服务的、满足 `predicate(key)` 的图块（默认为全部）：尚未开始的任务被取消，已开始的任务的结果被丢弃。
+        """
+        for key in [key for key in self._farm_jobs if predicate is None or predicate(key)]:
+            (_, future, _, _) = self._farm_jobs.pop(key)
+            future.cancel()
+
+
+    def _poll_farm(self) -> None:
+        """
+        取回多进程渲染服务已完成的图块，存入缓存并请求重新绘制。出错的图块改为在本进程内渲染。
+        """
+        self._farm_poll_id = None
+        farm = get_render_farm(self.context.get_setting("render_processes", 0))
+        if farm is None:
+            # 渲染服务已关闭或崩溃，剩余的图块在下一帧由本进程渲染
+            self._farm_jobs.clear()
+            self.request_render()
+            return
+
+        received = False
+        for ((key, job_id), result) in farm.collect(self):
+            entry = self._farm_jobs.get(key)
+            if entry is None or entry[0] != job_id or key.doc_id != self.doc_id:
+                # 已被放弃的任务
+                if not isinstance(result, BaseException):
+                    result.release()
+                continue
+            del self._farm_jobs[key]
+            (_, _, tile_rect, view) = entry
+
+            if isinstance(result, BaseException):
+                print(f"in Tab._poll_farm: page {key.page_no}: {result.__class__.__name__}: {result}")
+                self.render_missing_tiles(self.load_page(key.page_no), [(key, tile_rect)], view)
+            else:
+                try:
+                    self.make_tiles(self.load_page(key.page_no), result.samples, result.size, result.stride, tile_rect, [(key, tile_rect)], view)
+                finally:
+                    result.release()
+            received = True
+
+        if received:
+            self.request_render()
+        if self._farm_jobs:
+            self._farm_poll_id = self.canvas.after(self.FARM_POLL_INTERVAL, self._poll_farm)
+
+
+    def prefetch(self) -> None:
+        """
+        让后台渲染线程按当前的缩放比例和旋转角度，预先渲染可见页面前后各 `prefetch_pages` 页。
+
+        单页视图中，向后翻页时视图会回到页面顶部，向前翻页时保持滚动位置，因此分别预先渲染这两处的视图区域；
+        连续视图中，向下滚动先看到后一页的顶部，向上滚动先看到前一页的底部。
+        """
+        pages = self.context.get_setting("prefetch_pages", 2)
+        if pages <= 0 or not self.doc:
+            return
+
+        # 后台线程从磁盘打开文档，看不到尚未保存的修改（如新添加的注释）
+        if self.doc.is_dirty:
+            return
+
+        view_width  = self.canvas.winfo_width()  / self.zoom
+        view_height = self.canvas.winfo_height() / self.zoom
+        layout = self.layout
+        view_rect = self.view_rect
+        visible = layout.pages_in(view_rect) or range(self.page_no, self.page_no + 1)
+
+        def page_view(page_no: int, y: float) -> fitz.Rect:
+            # 页面上与“用户视界”横向位置相同、顶端位于 y 处的区域
+            x = view_rect.x0 - layout.page_rect(page_no).x0 if page_no in layout else self.scroll_pos[0]
+            return fitz.Rect(x, y, x + view_width, y + view_height)
+
+        # 距离可见页面越近越优先，同样距离时后一页优先
+        jobs = []
+        for distance in range(1, pages + 1):
+            next_no = visible[-1] + distance
+            if next_no < self.total_pages:
+                jobs.append((2 * distance - 1, next_no, page_view(next_no, 0)))
+            previous_no = visible[0] - distance
+            if previous_no >= 0:
+                if self.is_continuous:
+                    y = layout.page_rect(previous_no).height - view_height
+                else:
+                    y = self.scroll_pos[1]
+                jobs.append((2 * distance, previous_no, page_view(previous_no, y)))
+
+        self.render_worker.schedule(jobs, self.render_view)
+
+
+    def request_render(self) -> None:
+        """
+        请求在下一帧渲染页面。
+
+        一帧之内的多次请求会被合并为一次渲染，渲染频率不超过 `render_fps` 。需要立即渲染时请调用 `render()` 。
+        """
+        self.render_scheduler.request()
+
+
+    def _render_frame(self) -> None:
+        """
+        由渲染调度器在每帧调用：先同步视图区域，再渲染页面。
+        """
+        if not self.doc:
+            return
+        if self._view_region_dirty:
+            # 同步期间触发的滚动回调不应覆盖程序设置的视图属性，因此同步完成后才清除标记
+            try:
+                self._apply_view_region()
+            finally:
+                self._view_region_dirty = False
+        self.render(progressive = self.context.get_setting("progressive_render", True))
 
 
     def auto_render(self, func):
         """
-        装饰器：在函数执行后自动调用 render() 方法。
+        装饰器：在函数执行后自动请求渲染（见 request_render() 方法）。
         """
         def wrapper(*args, **kwargs):
             result = func(*args, **kwargs)
-            self.render()
+            self.request_render()
             return result
         return wrapper
 
 
+    def _on_scroll(self, scrollbar: ttk.Scrollbar, first: str, last: str) -> None:
+        """
+        画布视图范围改变时的回调：更新滚动条和视图属性，若视图与上一次渲染时不同，则请求渲染。
+        """
+        scrollbar.set(first, last)
+        if not self.doc or self._view_region_dirty:
+            # 下一帧会统一同步并渲染
+            return
+        self.update_view_attributes()
+        if (self.canvas.xview(), self.canvas.yview()) != self._rendered_view:
+            self.request_render()
+
+
     def create_widgets(self):
         """
         创建标签页内的显示组件（画布、滚动条等）。
         """
+        # 左右分栏：左侧为可选的面板（如缩略图，由插件插入），右侧为显示区域
+        self.paned = ttk.PanedWindow(self.frame, orient = tk.HORIZONTAL)
+        self.paned.bind("<ButtonRelease-1>", self._on_sash_moved)
+
         # 显示区域（带滚动条）
-        self.display_frame = ttk.Frame(self.frame)
+        self.display_frame = ttk.Frame(self.paned)
 
         # 滚动条
         self.v_scroll = ttk.Scrollbar(self.display_frame, orient = tk.VERTICAL)
@@ -438,17 +1637,68 @@ class Tab:
         # 画布
         self.canvas = tk.Canvas(
             self.display_frame,
-            xscrollcommand = self.auto_render(self.auto_update_view_attributes(self.h_scroll.set)),
-            yscrollcommand = self.auto_render(self.auto_update_view_attributes(self.v_scroll.set)),
-            bg = "white",
+            xscrollcommand = lambda first, last: self._on_scroll(self.h_scroll, first, last),
+            yscrollcommand = lambda first, last: self._on_scroll(self.v_scroll, first, last),
+            bg = self.color_theme.background_hex,
             highlightthickness = 0,
         )
         self.canvas.pack(side = tk.LEFT, fill = tk.BOTH, expand = True)
-        self.display_frame.pack(fill = tk.BOTH, expand = True, padx = 5, pady = 5)
+
+        # 画布图层：保留页面图像项，覆盖层不受重新渲染影响
+        self.layers = CanvasLayers(self.canvas)
+        self.paned.add(self.display_frame, weight = 1)
+        self.paned.pack(fill = tk.BOTH, expand = True, padx = 5, pady = 5)
 
         self.v_scroll.config(command = self.canvas.yview)
         self.h_scroll.config(command = self.canvas.xview)
 
+        # 渲染调度器，合并短时间内的多次渲染请求
+        self.render_scheduler = RenderScheduler(self.canvas, self._render_frame, self.context.get_setting("render_fps", 60))
+
+
+    def _on_sash_moved(self, event) -> None:
+        """
+        拖动分隔条后，记录左侧面板的宽度。
+        """
+        if len(self.paned.panes()) > 1:
+            self.sidebar_dx = self.paned.sashpos(0)
+
+
+    def add_overlay_painter(self, painter: Callable[[], None]) -> None:
+        """
+        注册覆盖层的绘制函数 `painter` ：每帧渲染后调用（缩放比例、页面布局或可见区域可能已改变，页面布局改变时覆盖层已被清除）。
+
+        绘制函数应只更新有变化的部分，没有变化时尽快返回。
+        """
+        self._overlay_painters.append(painter)
+
+
+    def remove_overlay_painter(self, painter: Callable[[], None]) -> None:
+        """
+        取消注册覆盖层的绘制函数 `painter` 。
+        """
+        if painter in self._overlay_painters:
+            self._overlay_painters.remove(painter)
+
+
+    def add_close_callback(self, callback: Callable[[], None]) -> None:
+        """
+        添加一个在标签页关闭（见 reset_tab）时调用的函数，用于释放附加在标签页上的资源，如缩略图面板的后台线程。
+        """
+        self._close_callbacks.append(callback)
+
+
+    def activate(self) -> bool:
+        """
+        切换到该标签页时调用：占位标签页此时才打开文档并渲染。
+
+        返回文档是否已打开。
+        """
+        if self.pending_open:
+            self.pending_open = False
+            return self.open()
+        return bool(self.doc)
+
 
     def open(self) -> bool:
         """
@@ -458,10 +1708,20 @@ class Tab:
         """
         try:
             # 关闭已打开的文档
+            self._pages.clear()
+            self._image_rects.clear()
+            self.text_index.clear()
+            self.selection.clear()
             if self.doc:
+                self.display_lists.discard_document(self.doc)
                 self.doc.close()
 
             self.doc = fitz.open(self.file_path)
+            self.doc_id = next(_doc_ids)
+            self.load_page_sizes()
+            self._layouts.clear()
+            self.render_cache.clear()
+            self.open_tile_store()
 
             # 更新标签页标题（显示文件名）
             tab_title = os.path.basename(self.file_path)
@@ -469,10 +1729,12 @@ class Tab:
 
             # 刷新显示
             self.update_view_region()
-            self.render()
 
             # 计数打开次数
             self.state["open_count"] += 1
+
+            # 打开成功才登记到全局内存管理器；打开失败时 reset_tab 已注销，state 为 None
+            memory_governor.register(self)
             return True
         except Exception as e:
             messagebox.showerror("错误", f"打开失败: {str(e)}")
@@ -480,13 +1742,63 @@ class Tab:
             return False
 
 
+    def open_tile_store(self) -> None:
+        """
+        打开文档后调用：若启用了磁盘图块缓存，则计算本文档的键前缀。第一帧中从磁盘读取的图块会在后台重新验证。
+        """
+        self.tile_store = None
+        self._tile_prefix = None
+        self._restored = {}
+        self._collect_restored = False
+        if not self.context.get_setting("disk_tile_cache", False):
+            return
+        self.tile_store = get_tile_store(
+            self.context.get_setting("cache_directory", "./config/cache"),
+            self.context.get_setting("disk_tile_cache_size", 1024 * 1024 * 1024),
+        )
+        if self.tile_store is not None:
+            self._tile_prefix = TileStore.document_prefix(self.file_path)
+            self._collect_restored = True
+
+
     def reset_tab(self):
         """重置标签页状态"""
+        self.pending_open = False
+        memory_governor.unregister(self)
+        for callback in self._close_callbacks:
+            try:
+                callback()
+            except Exception as error:
+                print(f"in Tab.reset_tab: {callback.__name__}: {error.__class__.__name__}: {error}")
+        self._close_callbacks.clear()
+        self.render_scheduler.cancel()
+        self.cancel_refine()
+        self.cancel_zoom_gesture()
+        self.cancel_farm_jobs()
+        if self._farm_poll_id is not None:
+            self.canvas.after_cancel(self._farm_poll_id)
+            self._farm_poll_id = None
+        farm = get_render_farm(self.context.get_setting("render_processes", 0))
+        if farm is not None:
+            farm.discard(self)
+        if self._revalidate_poll_id is not None:
+            self.canvas.after_cancel(self._revalidate_poll_id)
+            self._revalidate_poll_id = None
+        self.render_worker.stop()
+        self._pages.clear()
+        self._image_rects.clear()
+        self.text_index.clear()
+        self.selection.reset()
         if self.doc:
+            self.display_lists.discard_document(self.doc)
             self.doc.close()
         self.state = None
         self.doc = None
-        self.canvas.delete("all")
+        self.tile_store = None
+        self._restored = {}
+        self._layouts.clear()
+        self.render_cache.clear()
+        self.layers.clear()
         # 仅在frame被管理时修改标签标题
         try:
             self.notebook.tab(self.frame, text="空标签页")
@@ -519,11 +1831,16 @@ Provide core tab functionality for the PDF reader.
 
 ## Api
 
-- `context.create_tab(file_path)`: Create a new tab with the specified file path.
+- `context.create_tab(file_path, select = True)`: Create a new tab with the specified file path and return it. With `select = False` the tab is created in the background as a placeholder: the document is only opened and rendered when the tab is first selected.
 - `context.get_current_tab()`: Get the currently active tab.
 - `context.close_tab(tab)`: Close the specified tab.
 - `context.tabs`: List of all open tabs.
 - `context.Tab`: The Tab class itself.
+- `context.render_stats`: Render pipeline statistics shared by all tabs (`RenderStats` in `plugins/Tab/RenderStats.py`): per-stage p50/p95/p99 timings via `summary()`.
+- `context.memory_governor`: Memory governor shared by all tabs (`MemoryGovernor` in `plugins/Tab/MemoryGovernor.py`).
+- `context.get_memory_usage()`: Current memory usage of all tabs: `{"limit", "total", "released", "consumers": [per-tab usage, least recently active first]}` (in bytes).
+- `context.get_text_layout(page_no = None)`: Text layout of a page of the current tab (default: the current page) as a `PageText` (`plugins/Tab/TextIndex.py`): blocks, lines, words and chars with their bboxes in unrotated page coordinates, with spatial hit-testing (`hit`, `nearest`, `intersecting`). Returns None if no document is open.
+- `context.hit_test_text(pos, level = "block")`: Find the text (`level`: "block", "line", "word" or "char") under the window canvas coordinates `pos` (e.g. `(event.x, event.y)`) in the current tab. Returns `(page text layout, index)` or None.
 
 ## Depend
 
@@ -537,21 +1854,31 @@ Other plugins:
 ## Others
 
 This plugin must be loaded before any other plugins that manipulate tabs.
+
+When the `restore_session` setting is on, the tabs open at the last exit (saved in `data["session"]`) are restored at startup. Only the previously current tab opens its document; the others are placeholders until selected, so restoring many tabs costs about the same as opening one.
+
+The text layout of each page is extracted once (`page.get_text("rawdict")`) and indexed by a uniform grid, so hit tests only look at a few nearby cells. Each tab caches the layouts of the last `text_index_pages` pages queried.
+
+When the total memory held by all tabs exceeds the `memory_limit` setting, the caches of the least recently active background tabs are released first; the current tab is trimmed last.
 """
 
     @staticmethod
-    def create_tab(access: ReaderAccess, file_path: str | None = None) -> Tab:
+    def create_tab(access: ReaderAccess, file_path: str | None = None, select: bool = True) -> Tab:
         """
-        创建新标签页
-        """
-        new_tab = Tab(access, file_path)
+        创建新标签页。
 
-        # 激活新标签页
-        access._reader.notebook.select(new_tab.frame)
+        `select` 为 False 时创建占位标签页，不切换到该标签页，也不打开文档，见 `Tab.activate` 。
+        """
+        new_tab = Tab(access, file_path, lazy = not select)
 
         # 添加到标签页列表
         access.tabs.append(new_tab)
 
+        # 激活新标签页
+        if select:
+            access._reader.notebook.select(new_tab.frame)
+        return new_tab
+
 
     @staticmethod
     def get_current_tab(access: ReaderAccess) -> Tab | None:
@@ -593,6 +1920,91 @@ This plugin must be loaded before any other plugins that manipulate tabs.
         access._reader.notebook.forget(tab.frame)
 
 
+    @staticmethod
+    def get_memory_usage(access: ReaderAccess) -> Dict[str, Any]:
+        """
+        获取所有标签页当前的内存占用，见 `MemoryGovernor.usage` 。
+        """
+        return memory_governor.usage()
+
+
+    @staticmethod
+    def get_text_layout(access: ReaderAccess, page_no: int | None = None) -> PageText | None:
+        """
+        获取当前标签页第 `page_no` 页（默认为当前页）的文字布局，没有打开文档时返回 None 。
+        """
+        current_tab = access.get_current_tab()
+        if current_tab is None or not current_tab.doc:
+            return None
+        return current_tab.text_layout(current_tab.page_no if page_no is None else page_no)
+
+
+    @staticmethod
+    def hit_test_text(access: ReaderAccess, pos: Tuple[float, float], level: str = "block") -> Tuple[PageText, int] | None:
+        """
+        查找当前标签页中窗口上的画布坐标 `pos` 处层级为 `level` 的文字，返回 (页面的文字布局, 序号) ；不在文字上时返回 None 。
+        """
+        current_tab = access.get_current_tab()
+        if current_tab is None or not current_tab.doc:
+            return None
+        found = current_tab.page_point(pos)
+        if found is None:
+            return None
+        (page_no, point) = found
+        page_text = current_tab.text_layout(page_no)
+        index = page_text.hit(point, level)
+        return None if index is None else (page_text, index)
+
+
+    def activate_current_tab(self, event = None) -> None:
+        """
+        切换标签页时，打开占位标签页的文档，并将当前标签页标记为最近激活；其缓存可能已被释放，因此请求重新渲染。
+        """
+        current_tab = self.context.get_current_tab()
+        if current_tab is not None and not self._restoring:
+            current_tab.activate()
+            memory_governor.activate(current_tab)
+            current_tab.request_render()
+
+
+    def save_session(self) -> None:
+        """
+        记录当前打开的标签页，下次启动时恢复，见 `restore_session` 。
+        """
+        current_tab = self.context.get_current_tab()
+        tabs = [tab for tab in self.context.tabs if tab.state is not None]
+        self.context.data["session"] = {
+            "files": [tab.file_path for tab in tabs],
+            "current": tabs.index(current_tab) if current_tab in tabs else 0,
+        }
+
+
+    def restore_session(self, session: Dict[str, Any]) -> None:
+        """
+        恢复上次退出时打开的标签页 `session` （见 `save_session`）：全部创建为占位标签页，然后切换到上次的当前标签页，只有它会打开文档。
+        """
+        paths = session.get("files", [])
+        index = session.get("current", 0)
+        current = paths[index] if 0 <= index < len(paths) else None
+
+        # 向空的 Notebook 添加标签页时，第一个标签页会被自动选中；恢复完成前不打开它
+        self._restoring = True
+        selected = None
+        try:
+            for path in paths:
+                if not os.path.exists(path):
+                    continue
+                tab = self.context.create_tab(path, select = False)
+                if path == current and selected is None:
+                    selected = tab
+        finally:
+            self._restoring = False
+
+        if self.context.tabs:
+            self.context.get_notebook().select((selected or self.context.tabs[0]).frame)
+            self.activate_current_tab()
+
+
     def rebind_context_menu(self, event = None) -> None:
         """
         重新绑定标签页的右键菜单。
@@ -614,6 +2026,30 @@ This plugin must be loaded before any other plugins that manipulate tabs.
         self.context.tabs: List[Tab] = []
         self.context.Tab : type      = Tab
 
+        # 渲染性能统计
+        render_stats.window  = self.context.get_setting("render_stats_window", 240)
+        render_stats.enabled = self.context.get_setting("render_stats", False)
+        self.context.render_stats = render_stats
+
+        # 全局内存管理
+        memory_governor.limit = self.context.get_setting("memory_limit", 0)
+        self.context.memory_governor  = memory_governor
+        self.context.get_memory_usage = MethodType(self.get_memory_usage, self.context)
+        self.context.add_periodically_execute_function(memory_governor.enforce)
+        self.context.add_at_notebook_tab_changed_function(self.activate_current_tab)
+
+        # 文字布局索引
+        self.context.get_text_layout = MethodType(self.get_text_layout, self.context)
+        self.context.hit_test_text   = MethodType(self.hit_test_text  , self.context)
+
+        # 会话：定期记录打开的标签页；进入主循环（绑定标签页切换事件）后再恢复上次的标签页
+        # 周期性函数在进入主循环时就会执行一次，因此先取出上次的会话
+        self._restoring = False
+        if self.context.get_setting("restore_session", False):
+            session = dict(self.context.data.get("session") or {})
+            self.context.get_notebook().after_idle(lambda: self.restore_session(session))
+        self.context.add_periodically_execute_function(self.save_session)
+
         # 右键菜单
         self.context.add_at_notebook_tab_changed_function(self.rebind_context_menu)
         self.rebind_context_menu()
@@ -0,0 +1,452 @@
+r"""
+文字布局索引：缓存页面中文字块、行、词、字符的位置，并用均匀网格建立空间索引，按坐标查找文字只需查看附近的几个网格。
+
+每个页面只提取一次文字（`page.get_text("rawdict")`），之后划词、判断鼠标是否落在文字上等操作都直接查询索引。
+坐标均为未旋转的页面坐标（与 `page.get_text` 相同）。
+
+文字行按阅读顺序（见 `reading_order`）而不是提取顺序排列，多栏排版中按栏选择文字。
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from math import ceil, floor, hypot
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+import fitz  # PyMuPDF
+
+
+# 边界框 (x0, y0, x1, y1)
+BBox = Tuple[float, float, float, float]
+
+
+class TextChar(NamedTuple):
+    """
+    字符。`word` 为所属词的序号，空白字符为 -1 。
+    """
+    c: str
+    bbox: BBox
+    line: int
+    word: int
+
+
+class TextWord(NamedTuple):
+    """
+    词：一行中连续的非空白字符，包含的字符为 `chars[start:stop]` 。
+    """
+    text: str
+    bbox: BBox
+    line: int
+    start: int
+    stop: int
+
+
+class TextLine(NamedTuple):
+    """
+    行，包含的字符为 `chars[start:stop]` 。
+    """
+    bbox: BBox
+    block: int
+    start: int
+    stop: int
+
+
+class TextBlock(NamedTuple):
+    """
+    文字块，包含的行为 `lines[start:stop]` 。
+    """
+    bbox: BBox
+    start: int
+    stop: int
+
+
+
+class SpatialGrid:
+    """
+    均匀网格空间索引：把区域 `bounds` 划分为边长 `cell_size` 的正方形网格，每个网格记录与之相交的边界框的序号。
+
+    查找某点处的边界框时只需检查该点所在网格中的边界框。
+    """
+
+    def __init__(self, bounds: fitz.Rect, boxes: Sequence[BBox], cell_size: float):
+        if cell_size <= 0:
+            raise ValueError(f"Cell size must be positive, got {cell_size}")
+        self.boxes: Sequence[BBox] = boxes
+        self.cell_size: float = cell_size
+        self.x0: float = bounds.x0
+        self.y0: float = bounds.y0
+        self.columns: int = max(ceil(bounds.width  / cell_size), 1)
+        self.rows   : int = max(ceil(bounds.height / cell_size), 1)
+
+        # 只记录非空的网格：{行号 * 列数 + 列号: [边界框序号, ...]} ，序号从小到大
+        self.cells: Dict[int, List[int]] = {}
+        for (i, (x0, y0, x1, y1)) in enumerate(boxes):
+            (first_column, last_column) = self._span(x0, x1, self.x0, self.columns)
+            (first_row   , last_row   ) = self._span(y0, y1, self.y0, self.rows)
+            for row in range(first_row, last_row + 1):
+                for column in range(first_column, last_column + 1):
+                    self.cells.setdefault(row * self.columns + column, []).append(i)
+
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+
+    def _span(self, low: float, high: float, origin: float, count: int) -> Tuple[int, int]:
+        """
+        区间 [low, high] 覆盖的网格序号范围（闭区间），超出区域的部分归入边缘的网格。
+        """
+        first = min(max(floor((low  - origin) / self.cell_size), 0), count - 1)
+        last  = min(max(floor((high - origin) / self.cell_size), 0), count - 1)
+        return (first, max(first, last))
+
+
+    def at(self, x: float, y: float) -> List[int]:
+        """
+        包含点 (x, y) 的边界框的序号，从小到大。
+        """
+        (column, _) = self._span(x, x, self.x0, self.columns)
+        (row   , _) = self._span(y, y, self.y0, self.rows)
+        return [
+            i for i in self.cells.get(row * self.columns + column, ())
+            if self.boxes[i][0] <= x <= self.boxes[i][2] and self.boxes[i][1] <= y <= self.boxes[i][3]
+        ]
+
+
+    def intersecting(self, rect: fitz.Rect) -> List[int]:
+        """
+        与矩形 `rect` 相交的边界框的序号，从小到大。
+        """
+        (first_column, last_column) = self._span(rect.x0, rect.x1, self.x0, self.columns)
+        (first_row   , last_row   ) = self._span(rect.y0, rect.y1, self.y0, self.rows)
+        found = set()
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                found.update(self.cells.get(row * self.columns + column, ()))
+        return sorted(
+            i for i in found
+            if self.boxes[i][0] <= rect.x1 and rect.x0 <= self.boxes[i][2] and self.boxes[i][1] <= rect.y1 and rect.y0 <= self.boxes[i][3]
+        )
+
+
+    def nearest(self, x: float, y: float, max_distance: float = float("inf")) -> int | None:
+        """
+        距点 (x, y) 最近的边界框的序号（点在边界框内时距离为 0），距离超过 `max_distance` 时返回 None 。
+
+        从该点所在网格开始逐圈向外查找，找到的边界框比下一圈网格更近时停止。
+        """
+        (column, _) = self._span(x, x, self.x0, self.columns)
+        (row   , _) = self._span(y, y, self.y0, self.rows)
+        best: int | None = None
+        best_distance = max_distance
+        for ring in range(max(self.columns, self.rows)):
+            # 第 `ring` 圈网格中的点与 (x, y) 的距离至少为 (ring - 1) * cell_size
+            if (ring - 1) * self.cell_size > best_distance:
+                break
+            for (r, c) in self._ring(row, column, ring):
+                for i in self.cells.get(r * self.columns + c, ()):
+                    (x0, y0, x1, y1) = self.boxes[i]
+                    distance = hypot(max(x0 - x, 0, x - x1), max(y0 - y, 0, y - y1))
+                    if distance < best_distance or (distance == best_distance and (best is None or i < best)):
+                        (best, best_distance) = (i, distance)
+        return best
+
+
+    def _ring(self, row: int, column: int, ring: int) -> List[Tuple[int, int]]:
+        """
+        以 (row, column) 为中心的第 `ring` 圈网格（不超出区域）。
+        """
+        if ring == 0:
+            return [(row, column)]
+        cells = []
+        for r in range(row - ring, row + ring + 1):
+            if not 0 <= r < self.rows:
+                continue
+            if r in (row - ring, row + ring):
+                cells.extend((r, c) for c in range(max(column - ring, 0), min(column + ring, self.columns - 1) + 1))
+            else:
+                cells.extend((r, c) for c in (column - ring, column + ring) if 0 <= c < self.columns)
+        return cells
+
+
+
+# 分栏时栏间空隙的最小宽度（单位：页面坐标），更窄的空隙（如词间距）不视为分栏
+MIN_COLUMN_GAP: float = 6.0
+
+# 分栏时每栏至少占总宽度的比例；更窄的部分（如代码的行号、表格中的窄列）与其余部分按行排列
+MIN_COLUMN_RATIO: float = 0.15
+
+
+def _split(boxes: Sequence[BBox], indices: List[int], axis: int, min_gap: float) -> List[List[int]]:
+    """
+    沿坐标轴 `axis` （0 为 x ，1 为 y）把边界框分成若干组，组与组之间的空隙不小于 `min_gap` （可以为负，即允许少量重叠），按坐标从小到大排列。
+    """
+    groups: List[List[int]] = []
+    high = float("-inf")
+    for i in sorted(indices, key = lambda i: boxes[i][axis]):
+        if boxes[i][axis] >= high + min_gap:
+            groups.append([])
+        groups[-1].append(i)
+        high = max(high, boxes[i][axis + 2])
+    return groups
+
+
+def reading_order(boxes: Sequence[BBox]) -> List[int]:
+    """
+    文字行 `boxes` （已转换到文字方向为从左到右的坐标系）的阅读顺序，返回按顺序排列的序号。
+
+    递归的 XY 切分：先按竖直的空隙分栏（从左到右，每栏不能太窄），不能分栏时再按水平的空隙分段（从上到下），
+    因此通栏的标题、页眉页脚先被分段切出，其下的多栏正文再按栏排列；不能再切分的一组按 (上, 左) 排列。
+    """
+    def width(indices: List[int]) -> float:
+        return max(boxes[i][2] for i in indices) - min(boxes[i][0] for i in indices)
+
+    def order(indices: List[int]) -> List[int]:
+        if len(indices) > 1:
+            columns = _split(boxes, indices, 0, MIN_COLUMN_GAP)
+            if len(columns) > 1 and min(map(width, columns)) >= MIN_COLUMN_RATIO * width(indices):
+                return [i for column in columns for i in order(column)]
+            rows = _split(boxes, indices, 1, -1.0)
+            if len(rows) > 1:
+                return [i for row in rows for i in order(row)]
+        return sorted(indices, key = lambda i: (boxes[i][1], boxes[i][0]))
+
+    return order(list(range(len(boxes))))
+
+
+def _reading_frame(lines: List[dict]) -> fitz.Matrix:
+    """
+    把页面坐标转换到文字方向为从左到右的坐标系的矩阵。文字方向取字符数最多的方向（如整页旋转排版的文字）。
+    """
+    weights: Dict[Tuple[float, float], int] = {}
+    for line in lines:
+        direction = (round(line["dir"][0], 2), round(line["dir"][1], 2))
+        weights[direction] = weights.get(direction, 0) + sum(len(span.get("chars", [])) for span in line.get("spans", []))
+    if not weights:
+        return fitz.Matrix()
+    (cos, sin) = max(weights, key = weights.get)
+    return fitz.Matrix(cos, -sin, sin, cos, 0, 0)
+
+
+
+class PageText:
+    """
+    一个页面的文字布局：文字块、行、词、字符及其位置，各层级分别建立空间索引（第一次查询该层级时建立）。
+
+    层级名称为 `LEVELS` 中的一个。各层级的元素按阅读顺序编号（见 `reading_order`），字符、词按所在行的顺序连续编号。
+    """
+
+    LEVELS: Tuple[str, ...] = ("block", "line", "word", "char")
+
+    # 空间索引的网格边长（单位：页面坐标），约为正文的两三个字高
+    CELL_SIZE: float = 24.0
+
+    # 估算内存占用时每个字符（含所在词、行的分摊）的字节数
+    BYTES_PER_CHAR: int = 200
+
+    def __init__(self, page_no: int, rect: fitz.Rect, raw: dict):
+        """
+        由 `page.get_text("rawdict")` 的结果 `raw` 创建。
+        """
+        self.page_no: int = page_no
+        self.rect: fitz.Rect = fitz.Rect(rect)
+        self.blocks: List[TextBlock] = []
+        self.lines : List[TextLine ] = []
+        self.words : List[TextWord ] = []
+        self.chars : List[TextChar ] = []
+
+        # 文本块中的行：[(所在的块, 行), ...] 。MuPDF 可能把并排的两栏中的行放在同一块中，因此按行排列阅读顺序
+        lines = [
+            (block_no, line)
+            for (block_no, block) in enumerate(raw.get("blocks", []))
+            if block.get("type") == 0  # 只保留文本块
+            for line in block.get("lines", [])
+        ]
+        frame = _reading_frame([line for (_, line) in lines])
+        order = reading_order([tuple(fitz.Rect(line["bbox"]) * frame) for (_, line) in lines])
+
+        # 排序后原来同一块中相邻的行仍为一块，被拆开的块成为多个块
+        previous = None
+        for (block_no, line) in (lines[i] for i in order):
+            if block_no != previous:
+                self._end_block()
+                previous = block_no
+            self._add_line(line, len(self.blocks))
+        self._end_block()
+
+        # 所有字符连成的字符串，第 i 个字符为 `text[i]` ，选中的文字直接从中切片
+        self.text: str = "".join(char.c for char in self.chars)
+
+        # 各层级的空间索引，第一次查询时建立
+        self._grids: Dict[str, SpatialGrid] = {}
+
+
+    def _end_block(self) -> None:
+        """
+        把最后一个块之后添加的行作为一个块，边界框为这些行的边界框的并集。
+        """
+        first_line = self.blocks[-1].stop if self.blocks else 0
+        lines = self.lines[first_line:]
+        if lines:
+            self.blocks.append(TextBlock(
+                (
+                    min(line.bbox[0] for line in lines), min(line.bbox[1] for line in lines),
+                    max(line.bbox[2] for line in lines), max(line.bbox[3] for line in lines),
+                ),
+                first_line, len(self.lines),
+            ))
+
+
+    def _add_line(self, line: dict, block: int) -> None:
+        """
+        添加一行，并把行中的字符按空白拆分为词。
+        """
+        line_no = len(self.lines)
+        first_char = len(self.chars)
+        word_start: int | None = None
+
+        def end_word() -> None:
+            if word_start is None:
+                return
+            chars = self.chars[word_start:]
+            self.words.append(TextWord(
+                "".join(char.c for char in chars),
+                (
+                    min(char.bbox[0] for char in chars), min(char.bbox[1] for char in chars),
+                    max(char.bbox[2] for char in chars), max(char.bbox[3] for char in chars),
+                ),
+                line_no, word_start, len(self.chars),
+            ))
+
+        for span in line.get("spans", []):
+            for char in span.get("chars", []):
+                c = char["c"]
+                if c.isspace():
+                    end_word()
+                    word_start = None
+                    self.chars.append(TextChar(c, tuple(char["bbox"]), line_no, -1))
+                    continue
+                if word_start is None:
+                    word_start = len(self.chars)
+                self.chars.append(TextChar(c, tuple(char["bbox"]), line_no, len(self.words)))
+        end_word()
+        self.lines.append(TextLine(tuple(line["bbox"]), block, first_char, len(self.chars)))
+
+
+    def __repr__(self) -> str:
+        return f"PageText(page {self.page_no}: {len(self.blocks)} blocks, {len(self.lines)} lines, {len(self.words)} words, {len(self.chars)} chars)"
+
+
+    @property
+    def nbytes(self) -> int:
+        """
+        占用内存的估计值（单位：字节）。
+        """
+        return (len(self.chars) + len(self.blocks)) * self.BYTES_PER_CHAR
+
+
+    def items(self, level: str) -> Sequence[NamedTuple]:
+        """
+        层级 `level` 的所有元素。
+        """
+        if level not in self.LEVELS:
+            raise ValueError(f"Unknown text level {level!r}, expected one of {self.LEVELS}")
+        return getattr(self, f"{level}s")
+
+
+    def grid(self, level: str) -> SpatialGrid:
+        """
+        层级 `level` 的空间索引。
+        """
+        grid = self._grids.get(level)
+        if grid is None:
+            boxes = [item.bbox for item in self.items(level)]
+            grid = self._grids[level] = SpatialGrid(self.rect, boxes, self.CELL_SIZE)
+        return grid
+
+
+    def hit(self, point: fitz.Point, level: str = "block") -> int | None:
+        """
+        层级 `level` 中包含点 `point` 的元素的序号，没有时返回 None ；有多个时返回序号最小的。
+        """
+        found = self.grid(level).at(point.x, point.y)
+        return found[0] if found else None
+
+
+    def nearest(self, point: fitz.Point, level: str = "char", max_distance: float = float("inf")) -> int | None:
+        """
+        层级 `level` 中距点 `point` 最近的元素的序号，距离超过 `max_distance` 时返回 None 。
+        """
+        return self.grid(level).nearest(point.x, point.y, max_distance)
+
+
+    def intersecting(self, rect: fitz.Rect, level: str = "word") -> List[int]:
+        """
+        层级 `level` 中与矩形 `rect` 相交的元素的序号，从小到大。
+        """
+        return self.grid(level).intersecting(rect)
+
+
+
+class TextIndex:
+    """
+    一个文档的各页面文字布局的 LRU 缓存，最多缓存 `max_pages` 个页面。只能在 Tk 线程中使用。
+    """
+
+    def __init__(self, max_pages: int):
+        if max_pages < 0:
+            raise ValueError(f"Cache size cannot be negative, got {max_pages}")
+        self.max_pages: int = max_pages
+
+        # {页码: 文字布局}，最近使用的排在最后
+        self._pages: OrderedDict[int, PageText] = OrderedDict()
+
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+
+    def __contains__(self, page_no: int) -> bool:
+        return page_no in self._pages
+
+
+    @property
+    def current_bytes(self) -> int:
+        """
+        所有已缓存的文字布局占用内存的估计值（单位：字节）。
+        """
+        return sum(page_text.nbytes for page_text in self._pages.values())
+
+
+    def get(self, page: fitz.Page) -> PageText:
+        """
+        获取页面 `page` 的文字布局，不存在时提取文字并存入缓存。
+        """
+        page_text = self._pages.pop(page.number, None)
+        if page_text is None:
+            # 不需要图片块，不提取图片数据（扫描页上的图片可能有几 MB）
+            page_text = PageText(page.number, page.rect, page.get_text("rawdict", flags = fitz.TEXTFLAGS_RAWDICT & ~fitz.TEXT_PRESERVE_IMAGES))
+            while self._pages and len(self._pages) >= self.max_pages:
+                # 淘汰最久未使用的页面
+                self._pages.popitem(last = False)
+        if self.max_pages:
+            self._pages[page.number] = page_text
+        return page_text
+
+
+    def discard(self, page_numbers: Iterable[int] | None = None) -> None:
+        """
+        移除页码为 `page_numbers` 的页面的文字布局（例如页面内容被修改后），默认移除所有页面。
+        """
+        if page_numbers is None:
+            self._pages.clear()
+            return
+        for page_no in page_numbers:
+            self._pages.pop(page_no, None)
+
+
+    def clear(self) -> None:
+        """
+        清空缓存。
+        """
+        self._pages.clear()
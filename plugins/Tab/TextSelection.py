@@ -0,0 +1,255 @@
+r"""
+文字选择：基于文字布局索引（见 `TextIndex`）按字符或词选择文字，并在画布上高亮选中的文字。
+
+选择由若干段组成，每段是某一页某一行中的一段连续字符 (页码, 行号, 起始字符, 结束字符) ：
+
+- 拖动选择（`select_range`）：从一个光标位置到另一个光标位置之间的所有字符，按文字布局中字符的顺序（按阅读顺序排列，见 `TextIndex.reading_order`），可跨行、跨栏、跨页；
+- 框选（`select_area`）：页面上与矩形相交的字符，每行一段；
+- 双击选词（`select_word`）。
+
+光标位置为 (页码, 字符序号) ，表示该字符之前的位置；字符序号可以等于该页的字符数，表示最后一个字符之后。
+
+选择改变时只修改有变化的高亮矩形；选中的文字在第一次获取后缓存，之后直接返回。
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+import fitz  # PyMuPDF
+
+from plugins.Tab.TextIndex import PageText
+
+
+# 光标位置：(页码, 字符序号)
+Caret = Tuple[int, int]
+
+# 选择中的一段：(页码, 行号, 起始字符, 结束字符)
+Segment = Tuple[int, int, int, int]
+
+
+class TextSelection:
+    """
+    标签页 `tab` 中选中的文字。只能在 Tk 线程中使用。
+    """
+
+    # 高亮所在的覆盖层
+    OVERLAY_NAME: str = "text-selection"
+
+    # 高亮的颜色
+    HIGHLIGHT_COLOR: str = "#3390ff"
+
+    def __init__(self, tab):
+        self.tab = tab
+
+        # 选中的各段，按页码、字符序号排列
+        self.segments: List[Segment] = []
+
+        # 选中的文字，第一次获取时生成
+        self._text: str | None = None
+
+        # 各段在页面上的边界框，改变选择时复用未变化的段
+        self._boxes: Dict[Segment, fitz.Rect] = {}
+
+        # 画布上的高亮矩形：{(页码, 行号): (项目, 画布坐标)}
+        self._items: Dict[Tuple[int, int], Tuple[int, Tuple[float, float, float, float]]] = {}
+
+        # 绘制高亮时的 (缩放比例, 页面布局, 覆盖层清除次数)，改变后需要全部重新绘制
+        self._drawn_key = None
+
+        # 选择改变后是否尚未重新绘制
+        self._dirty = False
+
+
+    def __bool__(self) -> bool:
+        return bool(self.segments)
+
+
+    @property
+    def text(self) -> str:
+        """
+        选中的文字，各行之间以换行符分隔。
+        """
+        if self._text is None:
+            self._text = "\n".join(
+                self.tab.text_layout(page_no).text[start:stop]
+                for (page_no, _, start, stop) in self.segments
+            )
+        return self._text
+
+
+    #### 查找光标位置 ####
+
+    def caret_at(self, pos: Tuple[float, float]) -> Caret | None:
+        """
+        窗口上的画布坐标 `pos` 处的光标位置：该页中最近的字符之前或之后（点位于字符右半边时）。不在页面上或该页没有文字时返回 None 。
+        """
+        found = self.tab.page_point(pos)
+        if found is None:
+            return None
+        (page_no, point) = found
+        page_text = self.tab.text_layout(page_no)
+        index = page_text.nearest(point, "char")
+        if index is None:
+            return None
+        (x0, _, x1, _) = page_text.chars[index].bbox
+        return (page_no, index + 1 if point.x > (x0 + x1) / 2 else index)
+
+
+    #### 改变选择 ####
+
+    def select_range(self, anchor: Caret, focus: Caret, by_word: bool = False) -> None:
+        """
+        选择光标位置 `anchor` 与 `focus` 之间的所有字符（两者先后顺序不限）。
+
+        `by_word` 为 True 时，选择范围扩展到两端所在的整个词。
+        """
+        (start, stop) = sorted((anchor, focus))
+        segments: List[Segment] = []
+        for page_no in range(start[0], stop[0] + 1):
+            page_text = self.tab.text_layout(page_no)
+            first = start[1] if page_no == start[0] else 0
+            last  = stop[1]  if page_no == stop[0]  else len(page_text.chars)
+            if by_word:
+                (first, last) = self._expand_to_words(page_text, first, last)
+            if first >= last:
+                continue
+            for line_no in range(page_text.chars[first].line, page_text.chars[last - 1].line + 1):
+                line = page_text.lines[line_no]
+                segment = (page_no, line_no, max(first, line.start), min(last, line.stop))
+                if segment[2] < segment[3]:
+                    segments.append(segment)
+        self._set_segments(segments)
+
+
+    @staticmethod
+    def _expand_to_words(page_text: PageText, first: int, last: int) -> Tuple[int, int]:
+        """
+        把字符范围 [first, last) 的两端扩展到所在词的边界。
+        """
+        if first < len(page_text.chars) and page_text.chars[first].word >= 0:
+            first = page_text.words[page_text.chars[first].word].start
+        if 0 < last and page_text.chars[last - 1].word >= 0:
+            last = page_text.words[page_text.chars[last - 1].word].stop
+        return (first, last)
+
+
+    def select_word(self, page_no: int, word: int) -> None:
+        """
+        选择第 `page_no` 页的第 `word` 个词。
+        """
+        word = self.tab.text_layout(page_no).words[word]
+        self._set_segments([(page_no, word.line, word.start, word.stop)])
+
+
+    def select_area(self, page_no: int, rect: fitz.Rect) -> None:
+        """
+        选择第 `page_no` 页上与矩形 `rect` （未旋转的页面坐标）相交的字符，每行中从第一个到最后一个相交的字符。
+        """
+        page_text = self.tab.text_layout(page_no)
+        lines: Dict[int, List[int]] = {}
+        for index in page_text.intersecting(fitz.Rect(rect).normalize(), "char"):
+            line = lines.setdefault(page_text.chars[index].line, [index, index])
+            line[0] = min(line[0], index)
+            line[1] = max(line[1], index)
+        self._set_segments(sorted((page_no, line_no, first, last + 1) for (line_no, (first, last)) in lines.items()))
+
+
+    def clear(self) -> None:
+        """
+        取消选择。
+        """
+        self._set_segments([])
+
+
+    def reset(self) -> None:
+        """
+        关闭文档时调用：忘记选择和高亮矩形（画布上的覆盖层由调用方删除），不重新绘制。
+        """
+        self.segments = []
+        self._text = None
+        self._boxes.clear()
+        self._items.clear()
+        self._drawn_key = None
+        self._dirty = False
+
+
+    def discard_pages(self, page_numbers: set[int] | None = None) -> None:
+        """
+        页面内容改变（文字布局失效）后调用：选择涉及页面 `page_numbers` （默认为所有页面）时取消选择。
+        """
+        if any(page_numbers is None or page_no in page_numbers for (page_no, _, _, _) in self.segments):
+            self.clear()
+
+
+    def _set_segments(self, segments: List[Segment]) -> None:
+        """
+        设置选中的各段，并更新高亮。
+        """
+        if segments == self.segments:
+            return
+        self.segments = segments
+        self._text = None
+        self._dirty = True
+        self.draw()
+
+
+    #### 高亮 ####
+
+    def _segment_box(self, segment: Segment) -> fitz.Rect:
+        """
+        一段字符在页面上的边界框。
+        """
+        box = self._boxes.get(segment)
+        if box is None:
+            (page_no, _, start, stop) = segment
+            box = fitz.Rect()
+            for char in self.tab.text_layout(page_no).chars[start:stop]:
+                box |= char.bbox
+        return box
+
+
+    def draw(self) -> None:
+        """
+        在画布上高亮选中的文字：只创建、移动、删除有变化的高亮矩形。不在当前页面布局中的页面不绘制。
+
+        标签页每帧渲染后也会调用此方法（见 `Tab.add_overlay_painter`），选择和页面布局都未改变时直接返回。
+        """
+        canvas = self.tab.canvas
+        key = (self.tab.zoom, self.tab.layout_key, self.tab.layers.overlay_generation)
+        if not self._dirty and key == self._drawn_key:
+            return
+        self._dirty = False
+        if key != self._drawn_key:
+            # 画布坐标已改变或覆盖层已被清除，全部重新绘制
+            canvas.delete(self.OVERLAY_NAME)
+            self._items.clear()
+            self._drawn_key = key
+
+        boxes = {segment: self._segment_box(segment) for segment in self.segments}
+        self._boxes = boxes
+
+        wanted: Dict[Tuple[int, int], Tuple[float, float, float, float]] = {}
+        for ((page_no, line_no, _, _), box) in boxes.items():
+            rect = self.tab.page_to_canvas(page_no, box)
+            if rect is not None:
+                wanted[(page_no, line_no)] = tuple(rect)
+
+        for line_key in [line_key for line_key in self._items if line_key not in wanted]:
+            canvas.delete(self._items.pop(line_key)[0])
+        for (line_key, coords) in wanted.items():
+            entry = self._items.get(line_key)
+            if entry is None:
+                item = canvas.create_rectangle(
+                    *coords,
+                    outline = "",
+                    fill = self.HIGHLIGHT_COLOR,
+                    stipple = "gray50",
+                    tags = self.tab.layers.overlay_tags(self.OVERLAY_NAME),
+                )
+            elif entry[1] != coords:
+                item = entry[0]
+                canvas.coords(item, *coords)
+            else:
+                continue
+            self._items[line_key] = (item, coords)
@@ -0,0 +1,472 @@
+r"""
+缩略图面板：标签页左侧的页面缩略图列表。
+
+- 缩略图由后台线程以很低的分辨率分批渲染，可见的页面优先，其余页面在空闲时依次渲染；渲染在后台渲染服务的子进程中进行，
+  不占用 GIL （见 `run_in_background`）；
+- 渲染结果（PNG）保存在磁盘缓存中，键包含文档内容的指纹，再次打开同一文档时直接读取，无需重新渲染；
+- 面板是虚拟化的：只有当前显示在面板中的缩略图才会被转换为 PhotoImage 并绘制到画布上。
+"""
+
+from __future__ import annotations
+
+from math import ceil
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict, Iterable, List, Set, Tuple, TYPE_CHECKING
+
+import fitz  # PyMuPDF
+
+from plugins.Tab.CanvasLayers import CanvasLayers
+from plugins.Tab.DiskCache import DiskCache
+from plugins.Tab.PageLayout import render_transform, rotated_rect
+from plugins.Tab.RenderFarm import open_document, run_in_background
+
+if TYPE_CHECKING:
+    from plugins.Tab.Tab import Tab
+
+
+# 缩略图任务：(缓存键前缀, 页码, 旋转角度, 边长, 文档标识)
+ThumbnailJob = Tuple[str, int, int, int, int]
+
+# 渲染结果：(缓存键前缀, 页码, PNG 数据)；数据为 None 表示磁盘缓存中已有
+ThumbnailResult = Tuple[str, int, bytes | None]
+
+
+def render_thumbnail(page: fitz.Page, rotation: int, size: int) -> bytes:
+    """
+    把页面 `page` 旋转 `rotation` 度后缩小到长边为 `size` 像素，返回 PNG 数据。
+    """
+    (width, height) = rotated_rect(page.rect, rotation).br
+    scale = size / max(width, height, 1)
+    (matrix, clip) = render_transform(page.rect, rotated_rect(page.rect, rotation), scale, rotation)
+    return page.get_pixmap(matrix = matrix, clip = clip, alpha = False).tobytes("png")
+
+
+def _render_thumbnail_job(file_path: str, doc_id: int, page_no: int, rotation: int, size: int) -> bytes:
+    """
+    在后台渲染服务的子进程中渲染缩略图，见 `render_thumbnail` 。
+    """
+    return render_thumbnail(open_document(file_path, doc_id)[page_no], rotation, size)
+
+
+
+class ThumbnailRenderer:
+    """
+    渲染缩略图的后台线程。
+
+    - 缩略图由后台渲染服务的子进程渲染（见 `run_in_background`），`processes` 为 0 或渲染服务不可用时，线程用自己的文档对象渲染；
+    - 任务按提交的顺序分批执行，每批先跳过磁盘缓存中已有的页面，渲染完成后在一个事务中写入磁盘缓存；
+    - 结果放入队列，由 Tk 线程调用 `collect` 取回。
+    """
+
+    def __init__(self, file_path: str, cache: DiskCache | None, batch_size: int, processes: int = 0):
+        self.file_path: str = file_path
+        self.cache: DiskCache | None = cache
+        self.batch_size: int = max(batch_size, 1)
+        self.processes: int = processes
+
+        self._jobs: List[ThumbnailJob] = []
+        self._results: queue.SimpleQueue[ThumbnailResult] = queue.SimpleQueue()
+        self._condition = threading.Condition()
+        self._working = False
+        self._stopped = False
+        self._thread: threading.Thread | None = None
+
+
+    @property
+    def busy(self) -> bool:
+        """
+        是否还有尚未完成的任务或尚未取回的结果。
+        """
+        return bool(self._jobs) or self._working or not self._results.empty()
+
+
+    def schedule(self, jobs: Iterable[ThumbnailJob]) -> None:
+        """
+        取消尚未执行的任务，并按顺序提交新任务。
+        """
+        with self._condition:
+            self._jobs = list(jobs)
+            self._condition.notify()
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target = self._run, daemon = True)
+            self._thread.start()
+
+
+    def collect(self) -> List[ThumbnailResult]:
+        """
+        取回已完成的结果。
+        """
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+
+    def stop(self) -> None:
+        """
+        停止后台线程。
+        """
+        with self._condition:
+            self._stopped = True
+            self._jobs = []
+            self._condition.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout = 2)
+        self._thread = None
+
+
+    def _next_batch(self) -> List[ThumbnailJob] | None:
+        """
+        取出下一批任务，没有任务时阻塞等待。线程被停止时返回 None 。
+        """
+        with self._condition:
+            self._working = False
+            while not self._jobs and not self._stopped:
+                self._condition.wait()
+            if self._stopped:
+                return None
+            (batch, self._jobs) = (self._jobs[:self.batch_size], self._jobs[self.batch_size:])
+            self._working = True
+            return batch
+
+
+    def _run(self) -> None:
+        """
+        线程主循环。
+        """
+        doc = None
+
+        def render_in_thread(page_no: int, rotation: int, size: int) -> bytes:
+            nonlocal doc
+            if doc is None:
+                doc = fitz.open(self.file_path)
+            return render_thumbnail(doc[page_no], rotation, size)
+
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    break
+
+                present = self.cache.contains_many(prefix + str(page_no) for (prefix, page_no, _, _, _) in batch) if self.cache else set()
+                rendered = []
+                for (prefix, page_no, rotation, size, doc_id) in batch:
+                    if prefix + str(page_no) in present:
+                        self._results.put((prefix, page_no, None))
+                        continue
+                    if self._stopped:
+                        break
+                    try:
+                        data = run_in_background(
+                            self.processes, _render_thumbnail_job, self.file_path, doc_id, page_no, rotation, size,
+                            fallback = lambda: render_in_thread(page_no, rotation, size),
+                        )
+                    except Exception as error:
+                        print(f"in ThumbnailRenderer._run: page {page_no}: {error.__class__.__name__}: {error}")
+                        continue
+                    rendered.append((prefix + str(page_no), data))
+                    self._results.put((prefix, page_no, data))
+
+                if self.cache is not None:
+                    self.cache.put_many(rendered)
+        except Exception as error:
+            print(f"in ThumbnailRenderer._run: {error.__class__.__name__}: {error}")
+        finally:
+            self._working = False
+            if doc is not None:
+                doc.close()
+
+
+
+class ThumbnailPanel:
+    """
+    标签页 `tab` 左侧的缩略图面板，插入到标签页的 `paned` 中。
+
+    缩略图按网格排列（列数随面板宽度变化），长边为 `size` 像素；单击缩略图跳转到该页，当前页的缩略图带有边框。
+    `cache` 为 None 时不使用磁盘缓存，缩略图只保存在内存中。`processes` 为后台渲染服务的子进程数（见 `ThumbnailRenderer`）。
+    """
+
+    # 轮询后台线程渲染结果的间隔（单位：毫秒）
+    POLL_INTERVAL: int = 30
+
+    # 缩略图之间的间距、页码标签的高度（单位：屏幕像素）
+    PADDING: int = 8
+    LABEL_HEIGHT: int = 16
+
+    def __init__(self, tab: Tab, cache: DiskCache | None, size: int, batch_size: int, processes: int = 0):
+        self.tab: Tab = tab
+        self.cache: DiskCache | None = cache
+        self.size: int = size
+
+        self.frame = ttk.Frame(tab.paned)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient = tk.VERTICAL)
+        self.scrollbar.pack(side = tk.RIGHT, fill = tk.Y)
+        self.canvas = tk.Canvas(self.frame, yscrollcommand = self._on_scroll, highlightthickness = 0, width = 0)
+        self.canvas.pack(side = tk.LEFT, fill = tk.BOTH, expand = True)
+        self.scrollbar.config(command = self.canvas.yview)
+        self.layers = CanvasLayers(self.canvas)
+
+        self.renderer = ThumbnailRenderer(tab.file_path, cache, batch_size, processes)
+
+        # 缩略图所属的 (文档标识, 旋转角度) 及对应的缓存键前缀，二者之一改变时所有缩略图作废
+        self._doc_key: Tuple[int, int] | None = None
+        self._prefix: str = ""
+
+        # 已渲染（磁盘缓存或内存中已有）的页面
+        self._done: Set[int] = set()
+
+        # 不使用磁盘缓存时，已渲染的缩略图：{页码: PNG 数据}
+        self._memory: Dict[int, bytes] = {}
+
+        # 当前显示在面板中的缩略图：{页码: PhotoImage}
+        self._photos: Dict[int, tk.PhotoImage] = {}
+
+        # 当前网格的列数和显示的页面
+        self._columns: int = 1
+        self._visible: range = range(0)
+
+        self._refresh_id = None
+        self._poll_id = None
+
+        self.canvas.bind("<Configure>", lambda event: self.request_refresh())
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<MouseWheel>", lambda event: self.canvas.yview_scroll(int(-event.delta / 120), "units"))
+        self.canvas.bind("<Button-4>", lambda event: self.canvas.yview_scroll(-1, "units"))
+        self.canvas.bind("<Button-5>", lambda event: self.canvas.yview_scroll(1, "units"))
+
+
+    #### 布局 ####
+
+    @property
+    def cell_size(self) -> Tuple[int, int]:
+        """
+        网格中每一格的 (宽度, 高度) 。
+        """
+        return (self.size + 2 * self.PADDING, self.size + self.LABEL_HEIGHT + 2 * self.PADDING)
+
+
+    def cell_origin(self, page_no: int) -> Tuple[int, int]:
+        """
+        第 `page_no` 页所在格子的左上角（画布坐标）。
+        """
+        (cell_width, cell_height) = self.cell_size
+        (row, column) = divmod(page_no, self._columns)
+        return (column * cell_width, row * cell_height)
+
+
+    def page_at(self, x: float, y: float) -> int | None:
+        """
+        画布坐标 (x, y) 处的缩略图的页码，不在任何缩略图上时返回 None 。
+        """
+        (cell_width, cell_height) = self.cell_size
+        (column, row) = (int(x // cell_width), int(y // cell_height))
+        page_no = row * self._columns + column
+        if x < 0 or y < 0 or column >= self._columns or not 0 <= page_no < self.tab.total_pages:
+            return None
+        return page_no
+
+
+    #### 缩略图数据 ####
+
+    def _reset(self) -> None:
+        """
+        文档或旋转角度改变后，丢弃所有缩略图。
+        """
+        self.renderer.schedule([])
+        self.renderer.collect()
+        self._doc_key = (self.tab.doc_id, self.tab.rotation)
+        self._prefix = f"{self.tab.fingerprint}/{self.size}/{self.tab.rotation}/"
+        self._done.clear()
+        self._memory.clear()
+        self._photos.clear()
+
+
+    def _load(self, page_numbers: List[int]) -> Dict[int, bytes]:
+        """
+        从磁盘缓存（或内存）中读取页面 `page_numbers` 的缩略图，返回 {页码: PNG 数据} 。
+        """
+        if self.cache is None:
+            return {page_no: self._memory[page_no] for page_no in page_numbers if page_no in self._memory}
+        found = self.cache.get_many(self._prefix + str(page_no) for page_no in page_numbers)
+        return {int(key[len(self._prefix):]): data for (key, data) in found.items()}
+
+
+    def _schedule_missing(self) -> None:
+        """
+        把尚未渲染的页面交给后台线程：当前显示的页面在前，其余页面按页码顺序在后。
+        """
+        rotation = self.tab.rotation
+        visible = [page_no for page_no in self._visible if page_no not in self._photos]
+        rest = [page_no for page_no in range(self.tab.total_pages) if page_no not in self._done and page_no not in self._visible]
+        if not visible and not rest:
+            return
+        doc_id = self.tab.doc_id
+        self.renderer.schedule((self._prefix, page_no, rotation, self.size, doc_id) for page_no in visible + rest)
+        if self._poll_id is None:
+            self._poll_id = self.canvas.after(self.POLL_INTERVAL, self._poll)
+
+
+    def _poll(self) -> None:
+        """
+        取回后台线程渲染的缩略图，显示其中可见的部分。
+        """
+        self._poll_id = None
+        changed = False
+        for (prefix, page_no, data) in self.renderer.collect():
+            if prefix != self._prefix:
+                continue
+            self._done.add(page_no)
+            if data is None:
+                # 磁盘缓存中已有，滚动到该页时再读取
+                if page_no in self._visible and page_no not in self._photos:
+                    changed = True
+                continue
+            if self.cache is None:
+                self._memory[page_no] = data
+            if page_no in self._visible:
+                self._photos[page_no] = tk.PhotoImage(data = data, format = "png")
+                changed = True
+        if changed:
+            self.refresh()
+        if self.renderer.busy:
+            self._poll_id = self.canvas.after(self.POLL_INTERVAL, self._poll)
+
+
+    #### 绘制 ####
+
+    def request_refresh(self) -> None:
+        """
+        请求在 Tk 空闲时重新绘制面板。短时间内的多次请求只绘制一次。
+        """
+        if self._refresh_id is None:
+            self._refresh_id = self.canvas.after_idle(self.refresh)
+
+
+    def refresh(self) -> None:
+        """
+        重新计算网格，只为当前显示的页面创建 PhotoImage 并绘制，其余页面的缩略图交给后台线程渲染。
+        """
+        self._refresh_id = None
+        tab = self.tab
+        if not tab.doc:
+            return
+        if self._doc_key != (tab.doc_id, tab.rotation):
+            self._reset()
+
+        (cell_width, cell_height) = self.cell_size
+        width = max(self.canvas.winfo_width(), cell_width)
+        self._columns = max(width // cell_width, 1)
+        rows = ceil(tab.total_pages / self._columns)
+        self.canvas.configure(scrollregion = (0, 0, self._columns * cell_width, rows * cell_height))
+
+        # 当前显示的行
+        top = self.canvas.canvasy(0)
+        bottom = self.canvas.canvasy(self.canvas.winfo_height())
+        first = max(int(top // cell_height), 0) * self._columns
+        last = min((int(bottom // cell_height) + 1) * self._columns, tab.total_pages)
+        self._visible = range(first, max(last, first))
+
+        # 只保留当前显示的缩略图
+        self._photos = {page_no: photo for (page_no, photo) in self._photos.items() if page_no in self._visible}
+        missing = [page_no for page_no in self._visible if page_no not in self._photos]
+        for (page_no, data) in self._load(missing).items():
+            self._photos[page_no] = tk.PhotoImage(data = data, format = "png")
+            self._done.add(page_no)
+
+        self.canvas.delete("label")
+        self.layers.begin_frame()
+        for page_no in self._visible:
+            (x, y) = self.cell_origin(page_no)
+            photo = self._photos.get(page_no)
+            if photo is None:
+                # 占位框
+                self.canvas.create_rectangle(
+                    x + self.PADDING, y + self.PADDING, x + self.PADDING + self.size, y + self.PADDING + self.size,
+                    outline = "#c0c0c0", tags = ("label",),
+                )
+            else:
+                self.layers.place_image(
+                    "tile", page_no,
+                    x + self.PADDING + (self.size - photo.width()) // 2,
+                    y + self.PADDING + (self.size - photo.height()) // 2,
+                    photo,
+                )
+            self.canvas.create_text(
+                x + cell_width / 2, y + self.PADDING + self.size + self.LABEL_HEIGHT / 2,
+                text = str(page_no + 1), tags = ("label",),
+            )
+        self.layers.end_frame()
+        self.highlight_current_page()
+
+        self._schedule_missing()
+
+
+    def highlight_current_page(self) -> None:
+        """
+        为当前页的缩略图加上边框。
+        """
+        self.canvas.delete("current")
+        page_no = self.tab.page_no
+        if page_no not in self._visible:
+            return
+        (x, y) = self.cell_origin(page_no)
+        (cell_width, cell_height) = self.cell_size
+        self.canvas.create_rectangle(x + 2, y + 2, x + cell_width - 2, y + cell_height - 2, outline = "#3070d0", width = 2, tags = ("current",))
+
+
+    def show_current_page(self) -> None:
+        """
+        当前页改变后调用：更新边框，当前页的缩略图不在面板中时滚动到该处。
+        """
+        page_no = self.tab.page_no
+        if page_no in self._visible[self._columns:-self._columns] or not self.tab.total_pages:
+            self.highlight_current_page()
+            return
+        (_, y) = self.cell_origin(page_no)
+        (_, cell_height) = self.cell_size
+        rows = ceil(self.tab.total_pages / self._columns)
+        self.canvas.yview_moveto(max(y - cell_height, 0) / (rows * cell_height))
+        self.request_refresh()
+
+
+    #### 事件 ####
+
+    def _on_scroll(self, first: str, last: str) -> None:
+        """
+        面板的视图范围改变时，更新滚动条并重新绘制。
+        """
+        self.scrollbar.set(first, last)
+        self.request_refresh()
+
+
+    def _on_click(self, event) -> None:
+        """
+        单击缩略图：跳转到该页。
+        """
+        page_no = self.page_at(self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+        if page_no is None or page_no == self.tab.page_no:
+            return
+        self.tab.scroll_pos = (self.tab.scroll_pos[0], 0)
+        self.tab.page_no = page_no
+
+
+    def close(self) -> None:
+        """
+        停止后台线程，释放所有缩略图。
+        """
+        if self._refresh_id is not None:
+            self.canvas.after_cancel(self._refresh_id)
+            self._refresh_id = None
+        if self._poll_id is not None:
+            self.canvas.after_cancel(self._poll_id)
+            self._poll_id = None
+        self.renderer.stop()
+        self._photos.clear()
+        self._memory.clear()
+        self.frame.destroy()
@@ -0,0 +1,148 @@
+r"""
+磁盘图块缓存：把渲染好的图块压缩后保存到磁盘，下次打开同一文档时，同样的视图直接从磁盘读取，无需重新渲染。
+
+图块以 zlib 压缩的 PPM 数据保存在 `DiskCache` 中，键由以下部分组成：
+
+- 文档内容的指纹和文件的修改时间：文件被修改后，原来的图块不再命中；
+- PyMuPDF 的版本：渲染结果可能随版本变化；
+- 页码、缩放比例、旋转角度、分辨率、颜色主题、图块位置（与 `TileKey` 相同，只是不含每次打开时重新分配的文档标识）。
+
+写入在后台线程中进行，不占用渲染线程的时间。
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import re
+import threading
+from typing import Dict, Iterable, Tuple
+import zlib
+
+import fitz  # PyMuPDF
+
+from plugins.Tab.DiskCache import DiskCache, file_fingerprint, get_disk_cache
+from plugins.Tab.RenderCache import Tile, TileKey
+
+
+# PPM 文件头，见 `samples_to_ppm`
+_PPM_HEADER = re.compile(rb"P6\s+(\d+)\s+(\d+)\s+255\s")
+
+
+def tile_ppm(tile: Tile) -> bytes | None:
+    """
+    图块的 PPM 数据。图块已转换为 PhotoImage （原始数据已释放）时返回 None 。
+    """
+    if tile.ppm is not None:
+        return tile.ppm
+    image = tile.image
+    if image is None:
+        return None
+    return f"P6\n{image.width} {image.height}\n255\n".encode("ascii") + image.convert("RGB").tobytes()
+
+
+def tile_checksum(ppm: bytes) -> int:
+    """
+    PPM 数据的校验和，用于比较两次渲染的结果是否相同。
+    """
+    return zlib.crc32(ppm)
+
+
+
+class TileStore:
+    """
+    保存在磁盘缓存 `cache` 中的图块。线程安全。
+    """
+
+    # zlib 压缩等级：页面图像大多是大片的纯色，最快的等级已有很高的压缩率
+    COMPRESS_LEVEL: int = 1
+
+    def __init__(self, cache: DiskCache):
+        self.cache: DiskCache = cache
+
+        # 待写入的图块：(键, PPM 数据)
+        self._pending: queue.SimpleQueue[Tuple[str, bytes]] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+
+    @staticmethod
+    def document_prefix(file_path: str) -> str:
+        """
+        文件 `file_path` 的所有图块的键的公共前缀。
+        """
+        return f"{file_fingerprint(file_path)}/{os.stat(file_path).st_mtime_ns}/{fitz.VersionBind}/"
+
+
+    @staticmethod
+    def tile_id(prefix: str, key: TileKey) -> str:
+        """
+        图块 `key` 在磁盘缓存中的键。
+        """
+        theme = "-".join(str(part) for part in key.theme)
+        return f"{prefix}{key.page_no}/{key.zoom!r}/{key.rotation}/{key.dpi}/{theme}/{key.column}/{key.row}"
+
+
+    def load_many(self, prefix: str, keys: Iterable[TileKey]) -> Dict[TileKey, Tile]:
+        """
+        从磁盘读取图块，返回 {缓存键: 图块} ，磁盘中没有的图块不出现在结果中。
+        """
+        ids = {self.tile_id(prefix, key): key for key in keys}
+        tiles: Dict[TileKey, Tile] = {}
+        for (tile_id, data) in self.cache.get_many(ids).items():
+            try:
+                ppm = zlib.decompress(data)
+                (width, height) = map(int, _PPM_HEADER.match(ppm).groups())
+            except (zlib.error, AttributeError):
+                # 数据损坏，当作不存在
+                continue
+            tiles[ids[tile_id]] = Tile(ppm = ppm, size = (width, height))
+        return tiles
+
+
+    def save_many(self, prefix: str, tiles: Iterable[Tuple[TileKey, bytes]]) -> None:
+        """
+        在后台把图块的 PPM 数据 [(缓存键, PPM 数据), ...] 压缩后写入磁盘。
+        """
+        for (key, ppm) in tiles:
+            self._pending.put((self.tile_id(prefix, key), ppm))
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target = self._write, daemon = True)
+                self._thread.start()
+
+
+    def _write(self) -> None:
+        """
+        后台线程：取出待写入的图块，压缩后分批写入磁盘。
+        """
+        while True:
+            batch = [self._pending.get()]
+            # 一次写入当前已积压的所有图块
+            while True:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.cache.put_many((tile_id, zlib.compress(ppm, self.COMPRESS_LEVEL)) for (tile_id, ppm) in batch)
+            except Exception as error:
+                print(f"in TileStore._write: {error.__class__.__name__}: {error}")
+
+
+
+# 各数据库文件对应的图块缓存，所有标签页共用
+_tile_stores: Dict[str, TileStore] = {}
+
+
+def get_tile_store(directory: str, max_bytes: int) -> TileStore | None:
+    """
+    获取保存在 `directory` 中的磁盘图块缓存，无法打开时返回 None 。
+    """
+    cache = get_disk_cache(os.path.join(directory, "tiles.sqlite3"), max_bytes)
+    if cache is None:
+        return None
+    store = _tile_stores.get(cache.path)
+    if store is None:
+        store = _tile_stores[cache.path] = TileStore(cache)
+    return store
@@ -0,0 +1,96 @@
+"""
+在画布上显示渲染性能统计。
+"""
+
+from typing import override
+
+from glueous_plugin import Plugin
+
+
+class PerformanceHUDPlugin(Plugin):
+    """
+    性能统计插件：允许用户通过菜单项在画布上显示 / 隐藏渲染流水线各阶段的耗时统计。
+    """
+
+    # 插件信息
+    name = "PerformanceHUDPlugin"
+    description = """
+# PerformanceHUDPlugin
+
+- name: PerformanceHUDPlugin
+- author: Jerry
+- hotkeys: None
+- menu entrance: `视图 → 性能统计` / `视图 → 重置性能统计`
+
+## Function
+
+Show or hide a HUD in the top-left corner of the canvas with the p50/p95/p99 timings (in milliseconds) of each render pipeline stage:
+frame, layout, page load, display list, `get_pixmap`, `Image.frombuffer`, `convert_color`, resize, `PhotoImage` creation and canvas update.
+
+Showing the HUD also turns on timing collection (the `render_stats` setting). Hiding it keeps collecting if the setting is on.
+
+## Api
+
+None. The statistics themselves are available as `context.render_stats` (see TabPlugin).
+
+## Depend
+
+Python extension library: None
+
+Other plugins:
+- TabPlugin
+
+## Others
+
+None.
+"""
+
+    # 快捷键设置
+    hotkeys = []
+
+
+    @override
+    def loaded(self) -> None:
+        """
+        注册菜单项。
+        """
+        self.context.add_menu_command(
+            path = ["视图"],
+            label = "性能统计",
+            command = self.run,
+        )
+        self.context.add_menu_command(
+            path = ["视图"],
+            label = "重置性能统计",
+            command = self.reset,
+        )
+
+
+    @override
+    def run(self) -> None:
+        """
+        显示 / 隐藏性能统计。
+        """
+        stats = self.context.render_stats
+        stats.hud = not stats.hud
+        stats.enabled = stats.hud or self.context.get_setting("render_stats", False)
+
+        current_tab = self.context.get_current_tab()
+        if current_tab is not None:
+            current_tab.draw_render_hud()
+            current_tab.request_render()
+
+
+    def reset(self) -> None:
+        """
+        清空已记录的耗时。
+        """
+        self.context.render_stats.reset()
+        current_tab = self.context.get_current_tab()
+        if current_tab is not None and self.context.render_stats.hud:
+            current_tab.draw_render_hud()
+
+
+    @override
+    def unloaded(self) -> None:
+        pass
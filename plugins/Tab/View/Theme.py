@@ -0,0 +1,138 @@
+"""
+切换颜色主题。
+"""
+
+from tkinter import colorchooser
+from typing import override
+
+from glueous_plugin import Plugin
+
+
+class ThemePlugin(Plugin):
+    """
+    颜色主题插件：允许用户通过菜单项切换白天、夜晚、自定义颜色主题。
+    """
+
+    # 插件信息
+    name = "ThemePlugin"
+    description = """
+# ThemePlugin
+
+- name: ThemePlugin
+- author: Jerry
+- hotkeys: None
+- menu entrance: `视图 → 主题 → 白天` / `视图 → 主题 → 夜晚` / `视图 → 主题 → 自定义` / `视图 → 主题 → 选择自定义颜色...`
+
+## Function
+
+Switch the color theme of all tabs:
+
+| Theme  | Background       | Text       | Images         |
+| ------ | ---------------- | ---------- | -------------- |
+| Day    | original         | original   | original       |
+| Night  | black            | white      | inverted       |
+| Custom | background color | text color | linear mapping |
+
+See `schedule/多样化主题切换的可能实现方案.md` and `ColorTheme` in `plugins/Tab/ColorTheme.py`.
+
+The theme is stored in the settings `color_theme`, `theme_text_color` and `theme_background_color`, and saved in `data.json` so it is restored on the next start.
+
+## Api
+
+None.
+
+## Depend
+
+Python extension library: None
+
+Other plugins:
+- TabPlugin
+
+## Others
+
+Themed tiles are cached separately from the original ones, so switching back and forth does not re-render pages that are still in the cache.
+"""
+
+    # 快捷键设置
+    hotkeys = []
+
+    # 菜单项：(标签, 主题)
+    THEMES = (
+        ("白天"  , "day"),
+        ("夜晚"  , "night"),
+        ("自定义", "custom"),
+    )
+
+
+    @override
+    def loaded(self) -> None:
+        """
+        恢复上次使用的主题，注册菜单项。
+        """
+        saved = self.context.data.get("color_theme")
+        if saved:
+            self.context.set_setting("color_theme", saved.get("name", "day"))
+            for key in ("theme_text_color", "theme_background_color"):
+                if key in saved:
+                    self.context.set_setting(key, saved[key])
+
+        for (label, theme) in self.THEMES:
+            self.context.add_menu_command(
+                path = ["视图", "主题"],
+                label = label,
+                command = lambda theme = theme: self.set_theme(theme),
+            )
+        self.context.add_menu_command(
+            path = ["视图", "主题"],
+            label = "选择自定义颜色...",
+            command = self.choose_custom_colors,
+        )
+
+
+    def set_theme(self, theme: str) -> None:
+        """
+        将颜色主题设为 `theme` ，并重新渲染所有标签页。
+        """
+        self.context.set_setting("color_theme", theme)
+        self.context.data["color_theme"] = {
+            "name": theme,
+            "theme_text_color": list(self.context.get_setting("theme_text_color", [0, 0, 0])),
+            "theme_background_color": list(self.context.get_setting("theme_background_color", [255, 255, 255])),
+        }
+
+        for tab in self.context.tabs:
+            tab.canvas.configure(bg = tab.color_theme.background_hex)
+            tab.request_render()
+
+
+    def choose_custom_colors(self) -> None:
+        """
+        让用户选择自定义主题的文字色和背景色，然后切换到自定义主题。
+        """
+        colors = []
+        for (key, title, default) in (
+            ("theme_text_color"      , "选择文字颜色", [0, 0, 0]),
+            ("theme_background_color", "选择背景颜色", [255, 255, 255]),
+        ):
+            (rgb, _) = colorchooser.askcolor(
+                color = "#{:02x}{:02x}{:02x}".format(*self.context.get_setting(key, default)),
+                title = title,
+            )
+            if rgb is None:
+                # 用户取消
+                return
+            colors.append((key, [int(c) for c in rgb]))
+
+        for (key, rgb) in colors:
+            self.context.set_setting(key, rgb)
+        self.set_theme("custom")
+
+
+    @override
+    def run(self) -> None:
+        pass
+
+
+    @override
+    def unloaded(self) -> None:
+        pass
@@ -0,0 +1,151 @@
+"""
+显示 / 隐藏缩略图面板。
+"""
+
+import os
+from typing import Dict, override
+
+from glueous_plugin import Plugin
+
+from plugins.Tab.DiskCache import get_disk_cache
+from plugins.Tab.ThumbnailPanel import ThumbnailPanel
+
+
+class ThumbnailPlugin(Plugin):
+    """
+    缩略图插件：允许用户通过菜单项在标签页左侧显示 / 隐藏页面缩略图面板。
+    """
+
+    # 插件信息
+    name = "ThumbnailPlugin"
+    description = """
+# ThumbnailPlugin
+
+- name: ThumbnailPlugin
+- author: Jerry
+- hotkeys: None
+- menu entrance: `视图 → 缩略图`
+
+## Function
+
+Show or hide a panel of page thumbnails on the left side of the current tab. Click a thumbnail to jump to that page; the current page is framed.
+
+- Thumbnails are rendered at low resolution (`thumbnail_size` pixels on the long side) by a background thread in batches of `thumbnail_batch_size` pages, the pages shown in the panel first. The rendering itself runs in `background_processes` worker processes (0 renders them in the background thread).
+- Only the thumbnails currently shown in the panel exist as `PhotoImage`s.
+- Rendered thumbnails are saved in `thumbnails.sqlite3` in the `cache_directory`, keyed by the document's content fingerprint, so reopening a document shows its thumbnails without rendering them again. The file is limited to `thumbnail_cache_size` bytes (least recently used thumbnails are dropped).
+
+Whether the panel is shown and its width are stored per document (`FileState.show_toc` / `FileState.sidebar_dx`).
+
+## Api
+
+- `context.update_thumbnails()`: Update the current page frame in the current tab's thumbnail panel. Called by `Tab` when the current page changes.
+
+## Depend
+
+Python extension library:
+- fitz (PyMuPDF)
+
+Other plugins:
+- TabPlugin
+
+## Others
+
+See `ThumbnailPanel` in `plugins/Tab/ThumbnailPanel.py` and `DiskCache` in `plugins/Tab/DiskCache.py`.
+"""
+
+    # 快捷键设置
+    hotkeys = []
+
+
+    @override
+    def loaded(self) -> None:
+        """
+        注册菜单项，切换标签页时按该文档的设置显示 / 隐藏面板。
+        """
+        # 各标签页的缩略图面板：{id(标签页): 面板}
+        self.panels: Dict[int, ThumbnailPanel] = {}
+
+        self.context.add_menu_command(
+            path = ["视图"],
+            label = "缩略图",
+            command = self.run,
+        )
+        self.context.add_at_notebook_tab_changed_function(self.sync_current_tab)
+        self.context.update_thumbnails = self.update_thumbnails
+
+
+    @override
+    def run(self) -> None:
+        """
+        显示 / 隐藏当前标签页的缩略图面板。
+        """
+        current_tab = self.context.get_current_tab()
+        if current_tab is None or not current_tab.doc:
+            return
+        current_tab.show_toc = not current_tab.show_toc
+        self.sync_current_tab()
+
+
+    def sync_current_tab(self, event = None) -> None:
+        """
+        按当前标签页的 `show_toc` 创建或移除缩略图面板。
+        """
+        tab = self.context.get_current_tab()
+        if tab is None or not tab.doc:
+            return
+        panel = self.panels.get(id(tab))
+        if tab.show_toc and panel is None:
+            self.create_panel(tab)
+        elif not tab.show_toc and panel is not None:
+            tab.paned.forget(panel.frame)
+            self.close_panel(tab)
+
+
+    def create_panel(self, tab) -> ThumbnailPanel:
+        """
+        为标签页 `tab` 创建缩略图面板，插入到显示区域的左侧。
+        """
+        cache = get_disk_cache(
+            os.path.join(self.context.get_setting("cache_directory", "./config/cache"), "thumbnails.sqlite3"),
+            self.context.get_setting("thumbnail_cache_size", 128 * 1024 * 1024),
+        )
+        panel = ThumbnailPanel(
+            tab,
+            cache,
+            self.context.get_setting("thumbnail_size", 128),
+            self.context.get_setting("thumbnail_batch_size", 16),
+            self.context.get_setting("background_processes", 1),
+        )
+        self.panels[id(tab)] = panel
+        tab.add_close_callback(lambda: self.close_panel(tab))
+
+        tab.paned.insert(0, panel.frame, weight = 0)
+        # 面板加入后才能设置分隔条的位置
+        tab.paned.update_idletasks()
+        tab.paned.sashpos(0, tab.sidebar_dx)
+        panel.request_refresh()
+        return panel
+
+
+    def close_panel(self, tab) -> None:
+        """
+        关闭标签页 `tab` 的缩略图面板（若有）。
+        """
+        panel = self.panels.pop(id(tab), None)
+        if panel is not None:
+            panel.close()
+
+
+    def update_thumbnails(self) -> None:
+        """
+        当前页改变后，更新当前标签页缩略图面板中的边框。
+        """
+        current_tab = self.context.get_current_tab()
+        panel = current_tab and self.panels.get(id(current_tab))
+        if panel is not None:
+            panel.show_current_page()
+
+
+    @override
+    def unloaded(self) -> None:
+        pass
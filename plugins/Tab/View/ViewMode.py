@@ -0,0 +1,107 @@
+"""
+切换视图模式。
+"""
+
+from typing import override
+
+from glueous_plugin import Plugin
+
+
+class ViewModePlugin(Plugin):
+    """
+    视图模式插件：允许用户通过菜单项切换当前标签页的视图模式（页面布局）。
+    """
+
+    # 插件信息
+    name = "ViewModePlugin"
+    description = """
+# ViewModePlugin
+
+- name: ViewModePlugin
+- author: Jerry
+- hotkeys: None
+- menu entrance: `视图 → 单页` / `视图 → 单页连续` / `视图 → 双页` / `视图 → 双页连续` / `视图 → 书本` / `视图 → 书本连续` / `视图 → 从右到左`
+
+## Function
+
+Switch the display mode (page layout) of the current tab.
+
+In facing and book modes, pages are shown side by side as spreads. In book mode the first page (the cover) is shown alone on the right.
+`视图 → 从右到左` toggles right-to-left page order for spreads (`Tab.display_r2l`).
+
+## Api
+
+None.
+
+## Depend
+
+Python extension library: None
+
+Other plugins:
+- TabPlugin
+
+## Others
+
+The display mode is stored in `Tab.display_mode`, see `DisplayMode` in `plugins/Tab/FileState.py`.
+"""
+
+    # 快捷键设置
+    hotkeys = []
+
+    # 菜单项：(标签, 视图模式)
+    MODES = (
+        ("单页"    , "single"),
+        ("单页连续", "continuous"),
+        ("双页"    , "single facing"),
+        ("双页连续", "continuous facing"),
+        ("书本"    , "single book"),
+        ("书本连续", "continuous book"),
+    )
+
+
+    @override
+    def loaded(self) -> None:
+        """
+        注册菜单项。
+        """
+        for (label, mode) in self.MODES:
+            self.context.add_menu_command(
+                path = ["视图"],
+                label = label,
+                command = lambda mode = mode: self.set_display_mode(mode),
+            )
+        self.context.add_menu_command(
+            path = ["视图"],
+            label = "从右到左",
+            command = self.toggle_r2l,
+        )
+
+
+    def set_display_mode(self, mode: str) -> None:
+        """
+        将当前标签页的视图模式设为 `mode` 。
+        """
+        current_tab = self.context.get_current_tab()
+        if current_tab is None or current_tab.display_mode == mode:
+            return
+        current_tab.display_mode = mode
+
+
+    def toggle_r2l(self) -> None:
+        """
+        切换当前标签页的双页、书本视图是否从右到左排列。
+        """
+        current_tab = self.context.get_current_tab()
+        if current_tab is None:
+            return
+        current_tab.display_r2l = not current_tab.display_r2l
+
+
+    @override
+    def run(self) -> None:
+        pass
+
+
+    @override
+    def unloaded(self) -> None:
+        pass
@@ -29,6 +29,9 @@ class ZoomPlugin(Plugin):
 
 Allow zooming in/out by holding Ctrl and using the mouse wheel.
 
+The point under the cursor stays in place. While the wheel is turning, the cached low-resolution page previews are scaled for instant feedback;
+the page is rendered at full resolution once the wheel has been idle for `zoom_settle_delay` milliseconds (see `Tab.zoom_gesture`).
+
 ## Api
 
 None.
@@ -77,9 +80,9 @@ None.
         current_tab = self.context.get_current_tab()
         if current_tab is not None:
             if event.delta > 0:
-                current_tab.zoom *= 1.1
+                current_tab.zoom_gesture(current_tab.zoom * 1.1, (event.x, event.y))
             elif event.delta < 0:
-                current_tab.zoom /= 1.1
+                current_tab.zoom_gesture(current_tab.zoom / 1.1, (event.x, event.y))
 
 
     def _on_mousewheel_linux_up(self, event) -> None:
@@ -88,7 +91,7 @@ None.
         """
         current_tab = self.context.get_current_tab()
         if current_tab is not None:
-            current_tab.zoom *= 1.1
+            current_tab.zoom_gesture(current_tab.zoom * 1.1, (event.x, event.y))
 
 
     def _on_mousewheel_linux_down(self, event) -> None:
@@ -97,7 +100,7 @@ None.
         """
         current_tab = self.context.get_current_tab()
         if current_tab is not None:
-            current_tab.zoom /= 1.1
+            current_tab.zoom_gesture(current_tab.zoom / 1.1, (event.x, event.y))
 
 
     @override
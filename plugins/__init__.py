@@ -12,12 +12,19 @@ plugin_loading_order: List[str] = [
     # 文件
     "OpenPlugin",
     "ClosePlugin",
+    "LibrarySearchPlugin",
 
     # 翻页
     "PageUpPlugin",
     "PageNoPlugin",
     "PageDownPlugin",
 
+    # 视图
+    "ViewModePlugin",
+    "ThemePlugin",
+    "PerformanceHUDPlugin",
+    "ThumbnailPlugin",
+
     # 缩放
     "ZoomPlugin",
     "ZoomOutPlugin",
@@ -36,6 +43,7 @@ plugin_loading_order: List[str] = [
     "CopyPlugin",
     "TranslatePlugin",
     "SearchPlugin",
+    "FindPlugin",
     "HighLightPlugin",
 
     # AI